@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations
+
+import common.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0011_trigram_extension'),
+        ('accounts', '0003_alter_account_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='accounts_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='accounts_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('billing_city'), name='gin_trgm_ops'), name='accounts_billing_city_trgm'),
+        ),
+        common.search.CreateSearchTrigger(
+            table="accounts",
+            weights={
+                "A": ["name"],
+                "B": ["email", "contact_name"],
+                "C": ["billing_city", "industry", "website"],
+                "D": ["description"],
+            },
+        ),
+    ]
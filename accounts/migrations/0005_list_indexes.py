@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['org', 'status', '-created_at', '-id'], name='account_org_status_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "accounts_assigned_to_rev_idx" ON "accounts_assigned_to" ("profile_id", "account_id")',
+            'DROP INDEX IF EXISTS "accounts_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "accounts_teams_rev_idx" ON "accounts_teams" ("teams_id", "account_id")',
+            'DROP INDEX IF EXISTS "accounts_teams_rev_idx"',
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:45
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_states(apps, schema_editor):
+    # everything already in the table went through the old dispatcher, only
+    # emails still waiting for their time are put on the queue
+    AccountEmail = apps.get_model("accounts", "AccountEmail")
+    AccountEmail.objects.update(state="sent")
+    AccountEmail.objects.filter(
+        scheduled_later=True, scheduled_date_time__gt=timezone.now()
+    ).update(state="scheduled")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountemail',
+            name='queued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='accountemail',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='accountemail',
+            name='state',
+            field=models.CharField(choices=[('scheduled', 'Scheduled'), ('queued', 'Queued'), ('sent', 'Sent'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+        migrations.RunPython(set_states, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='accountemail',
+            index=models.Index(condition=models.Q(('state', 'scheduled')), fields=['scheduled_date_time'], name='account_email_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountemail',
+            index=models.Index(condition=models.Q(('state', 'queued')), fields=['queued_at'], name='account_email_queued_idx'),
+        ),
+    ]
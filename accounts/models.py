@@ -1,4 +1,5 @@
 import arrow
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
@@ -7,7 +8,8 @@ from phonenumber_field.modelfields import PhoneNumberField
 
 from common import utils
 from common.models import Org, Profile
-from common.utils import COUNTRIES, INDCHOICES
+from common.search import search_vector_index, trigram_index
+from common.utils import COUNTRIES, EMAIL_STATE, INDCHOICES
 from contacts.models import Contact
 from teams.models import Teams
 from common.base import BaseModel
@@ -87,12 +89,23 @@ class Account(BaseModel):
         blank=True,
         related_name="account_org",
     )
+    # maintained by a database trigger, see common/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Account"
         verbose_name_plural = "Accounts"
         db_table = "accounts"
         ordering = ("-created_at",)
+        indexes = [
+            search_vector_index("accounts"),
+            trigram_index("accounts", "name"),
+            trigram_index("accounts", "billing_city"),
+            models.Index(
+                fields=["org", "status", "-created_at", "-id"],
+                name="account_org_status_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -148,16 +161,32 @@ class AccountEmail(BaseModel):
     message_subject = models.TextField(null=True)
     message_body = models.TextField(null=True)
     timezone = models.CharField(max_length=100, default="UTC")
+    # stored in UTC, ``timezone`` is only the one the sender picked it in
     scheduled_date_time = models.DateTimeField(null=True)
     scheduled_later = models.BooleanField(default=False)
     from_email = models.EmailField()
     rendered_message_body = models.TextField(null=True)
+    state = models.CharField(max_length=20, choices=EMAIL_STATE, default="queued")
+    queued_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = "Account Email"
         verbose_name_plural = "Account Emails"
         db_table = "account_email"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["scheduled_date_time"],
+                name="account_email_due_idx",
+                condition=models.Q(state="scheduled"),
+            ),
+            models.Index(
+                fields=["queued_at"],
+                name="account_email_queued_idx",
+                condition=models.Q(state="queued"),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.message_subject}"
@@ -0,0 +1,128 @@
+"""
+Queue of scheduled account emails.
+
+A scheduled email waits in state ``scheduled`` with its due time in UTC;
+the partial index on ``scheduled_date_time`` only holds those rows. Every
+beat tick claims the rows that are due in batches with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of workers can drain
+the queue side by side and anything overdue after an outage is caught up on
+the next tick. Claimed rows move to ``queued`` and are handed to
+``send_email``, which marks them ``sent``. A row left ``queued`` by a worker
+that died is put back once it has been queued for
+``SCHEDULED_EMAIL_REQUEUE_AFTER`` seconds and none of its chunks has logged
+a sent message in that time either; a long email still being sent by its
+parallel chunks keeps its rows, and a requeued one skips the contacts it
+already reached.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from accounts.models import AccountEmail, AccountEmailLog
+from common.utils import convert_to_custom_timezone
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "scheduled_email:stats"
+
+
+def schedule(email, scheduled_date_time):
+    """Queue ``email`` for ``scheduled_date_time``, read in the email's timezone."""
+    email.scheduled_later = True
+    email.scheduled_date_time = convert_to_custom_timezone(
+        scheduled_date_time, email.timezone or "UTC", to_utc=True
+    )
+    email.state = "scheduled"
+    email.save(update_fields=["scheduled_later", "scheduled_date_time", "state"])
+
+
+def claim_due(now, limit):
+    """Move up to ``limit`` due emails to ``queued``, return their (id, due)."""
+    with transaction.atomic():
+        due = list(
+            AccountEmail.objects.select_for_update(skip_locked=True)
+            .filter(state="scheduled", scheduled_date_time__lte=now)
+            .order_by("scheduled_date_time")
+            .values_list("id", "scheduled_date_time")[:limit]
+        )
+        if due:
+            AccountEmail.objects.filter(id__in=[pk for pk, _ in due]).update(
+                state="queued", queued_at=now
+            )
+    return due
+
+
+def requeue_stalled(now):
+    cutoff = now - datetime.timedelta(seconds=settings.SCHEDULED_EMAIL_REQUEUE_AFTER)
+    progress = AccountEmailLog.objects.filter(
+        email=OuterRef("pk"), created_at__gte=cutoff
+    )
+    return (
+        AccountEmail.objects.filter(
+            state="queued", queued_at__lt=cutoff, scheduled_later=True
+        )
+        .exclude(Exists(progress))
+        .update(state="scheduled", queued_at=None)
+    )
+
+
+def dispatch_due(send, now=None):
+    """Claim every due email and pass its id to ``send``, return the stats."""
+    now = now or timezone.now()
+    requeued = requeue_stalled(now)
+    dispatched = 0
+    max_lag = total_lag = 0.0
+    while True:
+        due = claim_due(now, settings.SCHEDULED_EMAIL_BATCH_SIZE)
+        for pk, scheduled_date_time in due:
+            send(pk)
+            lag = (now - scheduled_date_time).total_seconds()
+            max_lag = max(max_lag, lag)
+            total_lag += lag
+        dispatched += len(due)
+        if len(due) < settings.SCHEDULED_EMAIL_BATCH_SIZE:
+            break
+    stats = {
+        "run_at": now,
+        "dispatched": dispatched,
+        "requeued": requeued,
+        "max_lag": max_lag,
+        "mean_lag": total_lag / dispatched if dispatched else 0.0,
+    }
+    cache.set(STATS_KEY, stats, None)
+    if dispatched or requeued:
+        logger.info(
+            "Dispatched %s scheduled emails (%s requeued), lag max %.1fs mean %.1fs",
+            dispatched,
+            requeued,
+            stats["max_lag"],
+            stats["mean_lag"],
+        )
+    return stats
+
+
+def queue_metrics(now=None):
+    """
+    The state of the queue: emails overdue but not yet claimed, the age of
+    the oldest of them and the stats of the last dispatcher run.
+    """
+    now = now or timezone.now()
+    overdue = AccountEmail.objects.filter(
+        state="scheduled", scheduled_date_time__lte=now
+    )
+    oldest = (
+        overdue.order_by("scheduled_date_time")
+        .values_list("scheduled_date_time", flat=True)
+        .first()
+    )
+    return {
+        "overdue": overdue.count(),
+        "oldest_overdue_lag": (now - oldest).total_seconds() if oldest else 0.0,
+        "queued": AccountEmail.objects.filter(state="queued").count(),
+        "last_run": cache.get(STATS_KEY),
+    }
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
 from accounts.models import Account, AccountEmail, Tags, AccountEmailLog
+from common.bulk import BulkRecordSerializer
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import (
     AttachmentsSerializer,
     OrganizationSerializer,
@@ -30,6 +32,7 @@ class AccountSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Account
+        list_serializer_class = EagerLoadingListSerializer
         # fields = ‘__all__’
         fields = (
             "id",
@@ -62,6 +65,7 @@ class AccountSerializer(serializers.ModelSerializer):
 
 class EmailSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
+        kwargs.pop("request_obj", None)
         super().__init__(*args, **kwargs)
 
     class Meta:
@@ -168,6 +172,26 @@ class AccountCreateSerializer(serializers.ModelSerializer):
             "contact_name",
         )
 
+class AccountBulkSerializer(BulkRecordSerializer):
+    lead = serializers.UUIDField(required=False, allow_null=True)
+    contacts = serializers.ListField(child=serializers.UUIDField(), required=False)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=20), required=False
+    )
+
+    unique_in_org = ("name",)
+
+    class Meta(BulkRecordSerializer.Meta):
+        model = Account
+        fields = AccountCreateSerializer.Meta.fields + (
+            "id",
+            "assigned_to",
+            "teams",
+            "contacts",
+            "tags",
+        )
+        extra_kwargs = {"status": {"required": False}}
+
 class AccountDetailEditSwaggerSerializer(serializers.Serializer):
     comment = serializers.CharField()
     account_attachment = serializers.FileField()
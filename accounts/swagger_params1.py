@@ -14,6 +14,10 @@ account_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("open_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("close_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
 
 
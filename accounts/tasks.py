@@ -1,112 +1,151 @@
-from datetime import datetime
+from functools import lru_cache
 
-import pytz
 from celery import Celery
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.template import Context, Template
-from django.template.loader import render_to_string
+from django.utils import timezone
 
 from accounts.models import Account, AccountEmail, AccountEmailLog
-from common.models import Profile
-from common.utils import convert_to_custom_timezone
+from accounts.scheduler import dispatch_due
+from common.notifications import Notification, active_profiles, send_messages
+from contacts.models import Contact
 
 app = Celery("redis://")
 
 
+@lru_cache(maxsize=32)
+def compile_template(message_body):
+    """Parse a campaign body once per worker, not once per recipient."""
+    return Template(message_body)
+
+
+def contact_context(contact):
+    return {
+        "email": contact.primary_email or "",
+        "name": " ".join(
+            name for name in (contact.first_name, contact.last_name) if name
+        ),
+    }
+
+
+def sent_contact_ids(email_obj, contact_ids=None):
+    logs = AccountEmailLog.objects.filter(email=email_obj, is_sent=True)
+    if contact_ids is not None:
+        logs = logs.filter(contact_id__in=contact_ids)
+    return set(logs.values_list("contact_id", flat=True))
+
+
+def has_unsent_recipients(email_obj):
+    sent = AccountEmailLog.objects.filter(email=email_obj, is_sent=True)
+    return (
+        email_obj.recipients.exclude(primary_email="")
+        .exclude(id__in=sent.values("contact_id"))
+        .exists()
+    )
+
+
 @app.task
 def send_email(email_obj_id):
-    email_obj = Email.objects.filter(id=email_obj_id).first()
-    if email_obj:
-        from_email = email_obj.from_email
-        contacts = email_obj.recipients.all()
-        for contact_obj in contacts:
-            if not EmailLog.objects.filter(
-                email=email_obj, contact=contact_obj, is_sent=True
-            ).exists():
-                html = email_obj.message_body
-                context_data = {
-                    "email": contact_obj.primary_email
-                    if contact_obj.primary_email
-                    else "",
-                    "name": contact_obj.first_name
-                    if contact_obj.first_name
-                    else "" + " " + contact_obj.last_name
-                    if contact_obj.last_name
-                    else "",
-                }
-                try:
-                    html_content = Template(html).render(Context(context_data))
-                    subject = email_obj.message_subject
-                    msg = EmailMessage(
-                        subject,
-                        html_content,
-                        from_email=from_email,
-                        to=[
-                            contact_obj.primary_email,
-                        ],
-                    )
-                    msg.content_subtype = "html"
-                    res = msg.send()
-                    if res:
-                        email_obj.rendered_message_body = html_content
-                        email_obj.save()
-                        EmailLog.objects.create(
-                            email=email_obj, contact=contact_obj, is_sent=True
-                        )
-                except Exception as e:
-                    print(e)
+    """Split an account email into chunks of recipients sent in parallel"""
+    email_obj = AccountEmail.objects.filter(id=email_obj_id).first()
+    if not email_obj:
+        return
+    chunk_size = settings.ACCOUNT_EMAIL_CHUNK_SIZE
+    already_sent = sent_contact_ids(email_obj)
+    contact_ids = (
+        email_obj.recipients.order_by("id")
+        .values_list("id", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    chunks = 0
+    for contact_id in contact_ids:
+        if contact_id in already_sent:
+            continue
+        chunk.append(str(contact_id))
+        if len(chunk) == chunk_size:
+            send_email_chunk.delay(email_obj.id, chunk)
+            chunk = []
+            chunks += 1
+    if chunk:
+        send_email_chunk.delay(email_obj.id, chunk)
+        chunks += 1
+    if not chunks:
+        AccountEmail.objects.filter(id=email_obj.id).update(
+            state="sent", sent_at=timezone.now()
+        )
+
+
+@app.task
+def send_email_chunk(email_obj_id, contact_ids):
+    """Send an account email to one chunk of its recipients"""
+    email_obj = AccountEmail.objects.filter(id=email_obj_id).first()
+    if not email_obj:
+        return
+    template = compile_template(email_obj.message_body or "")
+    already_sent = sent_contact_ids(email_obj, contact_ids)
+    contacts = (
+        Contact.objects.filter(id__in=contact_ids)
+        .exclude(id__in=already_sent)
+        .only("id", "primary_email", "first_name", "last_name")
+    )
+    messages = []
+    for contact in contacts.iterator():
+        if not contact.primary_email:
+            continue
+        msg = EmailMessage(
+            email_obj.message_subject,
+            template.render(Context(contact_context(contact))),
+            from_email=email_obj.from_email,
+            to=[contact.primary_email],
+        )
+        msg.content_subtype = "html"
+        msg.contact_id = contact.id
+        messages.append(msg)
+
+    logs = []
+
+    def log_sent(msg):
+        logs.append(
+            AccountEmailLog(email=email_obj, contact_id=msg.contact_id, is_sent=True)
+        )
+        if len(logs) == settings.NOTIFICATION_BATCH_SIZE:
+            AccountEmailLog.objects.bulk_create(logs)
+            logs.clear()
+
+    sent = send_messages(messages, on_sent=log_sent)
+    AccountEmailLog.objects.bulk_create(logs)
+
+    emails = AccountEmail.objects.filter(id=email_obj.id)
+    if sent < len(messages):
+        emails.update(state="failed")
+    elif messages:
+        emails.update(rendered_message_body=messages[-1].body)
+    # the last chunk to finish marks the whole email sent
+    if not has_unsent_recipients(email_obj):
+        emails.filter(state="queued").update(state="sent", sent_at=timezone.now())
 
 
 @app.task
 def send_email_to_assigned_user(recipients, from_email):
     """Send Mail To Users When they are assigned to a contact"""
     account = Account.objects.filter(id=from_email).first()
-    created_by = account.created_by
-
-    for profile_id in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=profile_id, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            context = {}
-            context["url"] = settings.DOMAIN_NAME
-            context["user"] = profile.user
-            context["account"] = account
-            context["created_by"] = created_by
-            subject = "Assigned a account for you."
-            html_content = render_to_string(
-                "assigned_to/account_assigned.html", context=context
-            )
-
-            msg = EmailMessage(subject, html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    notification = Notification(
+        "Assigned a account for you.",
+        "assigned_to/account_assigned.html",
+        {
+            "url": settings.DOMAIN_NAME,
+            "account": account,
+            "created_by": account.created_by,
+        },
+    )
+    for profile in active_profiles(recipients):
+        notification.add(profile.user.email, {"user": profile.user})
+    notification.send()
 
 
 @app.task
 def send_scheduled_emails():
-    email_objs = Email.objects.filter(scheduled_later=True)
-    # TODO: modify this later , since models are updated
-    for each in email_objs:
-        scheduled_date_time = each.scheduled_date_time
-
-        sent_time = datetime.now().strftime("%Y-%m-%d %H:%M")
-        sent_time = datetime.strptime(sent_time, "%Y-%m-%d %H:%M")
-        local_tz = pytz.timezone(settings.TIME_ZONE)
-        sent_time = local_tz.localize(sent_time)
-        sent_time = convert_to_custom_timezone(sent_time, each.timezone, to_utc=True)
-
-        # if (
-        #     str(each.scheduled_date_time.date()) == str(sent_time.date()) and
-        #     str(scheduled_date_time.hour) == str(sent_time.hour) and
-        #     (str(scheduled_date_time.minute + 5) < str(sent_time.minute) or
-        #     str(scheduled_date_time.minute - 5) > str(sent_time.minute))
-        # ):
-        #     send_email.delay(each.id)
-        if (
-            str(each.scheduled_date_time.date()) == str(sent_time.date())
-            and str(scheduled_date_time.hour) == str(sent_time.hour)
-            and str(scheduled_date_time.minute) == str(sent_time.minute)
-        ):
-            send_email.delay(each.id)
+    """Hand every scheduled email that is due over to send_email"""
+    dispatch_due(send_email.delay)
@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 from django.test import TestCase
 from django.test.utils import override_settings
 
-from accounts.models import Email
+from accounts.models import AccountEmail
 from accounts.tasks import (
     send_email,
     send_email_to_assigned_user,
@@ -19,7 +19,7 @@ class TestCeleryTasks(AccountCreateTest, TestCase):
         BROKER_BACKEND="memory",
     )
     def test_celery_tasks(self):
-        email_scheduled = Email.objects.create(
+        email_scheduled = AccountEmail.objects.create(
             message_subject="message subject",
             message_body="message body",
             scheduled_later=True,
@@ -0,0 +1,64 @@
+from django.core import mail
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts import tasks
+from accounts.models import AccountEmail, AccountEmailLog
+from common.models import Org
+from contacts.models import Contact
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    ACCOUNT_EMAIL_CHUNK_SIZE=10,
+    NOTIFICATION_RATE_LIMIT=0,
+)
+class EmailCampaignTest(TestCase):
+    def setUp(self):
+        org = Org.objects.create(name="campaign")
+        self.contacts = [
+            Contact.objects.create(
+                first_name="first{}".format(i),
+                last_name="last",
+                primary_email="contact{}@example.com".format(i),
+                org=org,
+            )
+            for i in range(25)
+        ]
+        self.email = AccountEmail.objects.create(
+            message_subject="subject",
+            message_body="Hello {{ name }} <{{ email }}>",
+            from_email="from@example.com",
+        )
+        self.email.recipients.set(self.contacts)
+
+        # run the chunk tasks in process
+        tasks.app.conf.task_always_eager = True
+        self.addCleanup(setattr, tasks.app.conf, "task_always_eager", False)
+
+    def send(self):
+        tasks.send_email(self.email.id)
+
+    def test_campaign_is_sent_once_per_contact(self):
+        AccountEmailLog.objects.create(
+            email=self.email, contact=self.contacts[0], is_sent=True
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.send()
+
+        self.assertEqual(len(mail.outbox), 24)
+        self.assertIn(
+            "Hello first1 last <contact1@example.com>",
+            [msg.body for msg in mail.outbox],
+        )
+        self.assertEqual(
+            AccountEmailLog.objects.filter(email=self.email, is_sent=True).count(), 25
+        )
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.state, "sent")
+        # a fixed number of queries per chunk, not per contact
+        self.assertLess(len(queries), 40)
+
+        self.send()
+        self.assertEqual(len(mail.outbox), 24)
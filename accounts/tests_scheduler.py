@@ -0,0 +1,78 @@
+import datetime
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from accounts.models import AccountEmail, AccountEmailLog
+from accounts.scheduler import dispatch_due, queue_metrics, schedule
+
+
+@override_settings(SCHEDULED_EMAIL_BATCH_SIZE=2)
+class ScheduledEmailQueueTest(TestCase):
+    def create_email(self, minutes):
+        email = AccountEmail.objects.create(
+            message_subject="subject",
+            message_body="body",
+            from_email="from@example.com",
+        )
+        schedule(email, timezone.now() + datetime.timedelta(minutes=minutes))
+        return email
+
+    def test_overdue_emails_are_caught_up(self):
+        overdue = [self.create_email(-minutes) for minutes in (1, 60, 60 * 24)]
+        upcoming = self.create_email(10)
+        self.assertEqual(queue_metrics()["overdue"], 3)
+
+        sent = []
+        stats = dispatch_due(sent.append)
+
+        self.assertEqual(sorted(sent), sorted(email.id for email in overdue))
+        self.assertEqual(stats["dispatched"], 3)
+        self.assertGreaterEqual(stats["max_lag"], 60 * 60 * 24)
+        self.assertEqual(queue_metrics()["overdue"], 0)
+        upcoming.refresh_from_db()
+        self.assertEqual(upcoming.state, "scheduled")
+
+        # claimed rows are not handed out twice
+        self.assertEqual(dispatch_due(sent.append)["dispatched"], 0)
+
+    def test_schedule_reads_the_emails_timezone(self):
+        email = AccountEmail.objects.create(
+            message_subject="subject",
+            from_email="from@example.com",
+            timezone="Asia/Kolkata",
+        )
+        schedule(email, datetime.datetime(2030, 1, 1, 10, 0))
+        email.refresh_from_db()
+        self.assertEqual(
+            email.scheduled_date_time,
+            datetime.datetime(2030, 1, 1, 4, 30, tzinfo=datetime.timezone.utc),
+        )
+
+    @override_settings(SCHEDULED_EMAIL_REQUEUE_AFTER=60)
+    def test_stalled_emails_are_requeued(self):
+        email = self.create_email(-5)
+        dispatch_due(lambda pk: None)
+        AccountEmail.objects.filter(id=email.id).update(
+            queued_at=timezone.now() - datetime.timedelta(minutes=5)
+        )
+
+        sent = []
+        stats = dispatch_due(sent.append)
+        self.assertEqual(stats["requeued"], 1)
+        self.assertEqual(sent, [email.id])
+
+    @override_settings(SCHEDULED_EMAIL_REQUEUE_AFTER=60)
+    def test_emails_still_being_sent_are_not_requeued(self):
+        email = self.create_email(-5)
+        dispatch_due(lambda pk: None)
+        long_ago = timezone.now() - datetime.timedelta(minutes=5)
+        AccountEmail.objects.filter(id=email.id).update(queued_at=long_ago)
+        log = AccountEmailLog.objects.create(email=email, is_sent=True)
+
+        self.assertEqual(dispatch_due(lambda pk: None)["requeued"], 0)
+
+        # no chunk has logged anything since the cutoff
+        AccountEmailLog.objects.filter(id=log.id).update(created_at=long_ago)
+        self.assertEqual(dispatch_due(lambda pk: None)["requeued"], 1)
@@ -1,11 +1,14 @@
 from django.urls import path
 
+from common.views import BulkView, ExportView
 from accounts import views
 
 app_name = "api_accounts"
 
 urlpatterns = [
     path("", views.AccountsListView.as_view()),
+    path("bulk/", BulkView.as_view(entity="accounts")),
+    path("export/", ExportView.as_view(entity="accounts")),
     path("<str:pk>/", views.AccountDetailView.as_view()),
     path("<str:pk>/create_mail/", views.AccountCreateMailView.as_view()),
     path("comment/<str:pk>/", views.AccountCommentView.as_view()),
@@ -1,5 +1,6 @@
 import json
 
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
@@ -7,7 +8,6 @@ from drf_rw_serializers import generics
 
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -27,9 +27,14 @@ from accounts.serializer import (
     EmailWriteSerializer
 )
 from teams.serializer import TeamsSerializer
+from accounts.scheduler import schedule
 from accounts.tasks import send_email, send_email_to_assigned_user
 from cases.serializer import CaseSerializer
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
+from common.response_cache import ALL, cache_response
 from leads.models import Lead
 from leads.serializer import LeadSerializer
 
@@ -39,6 +44,7 @@ from common.serializer import (
     CommentSerializer,
     ProfileSerializer,
 )
+from common.tags import set_tags
 from common.utils import (
     CASE_TYPE,
     COUNTRIES,
@@ -56,7 +62,7 @@ from tasks.serializer import TaskSerializer
 from teams.models import Teams
 
 
-class AccountsListView(APIView, LimitOffsetPagination):
+class AccountsListView(APIView, KeysetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Account
@@ -64,7 +70,7 @@ class AccountsListView(APIView, LimitOffsetPagination):
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             queryset = queryset.filter(
                 Q(created_by=self.request.profile.user) | Q(assigned_to=self.request.profile)
@@ -85,35 +91,20 @@ class AccountsListView(APIView, LimitOffsetPagination):
         context = {}
         queryset_open = queryset.filter(status="open")
         results_accounts_open = self.paginate_queryset(
-            queryset_open.distinct(), self.request, view=self
+            queryset_open.distinct(), self.request, view=self, cursor_query_param="open_cursor"
         )
-        if results_accounts_open:
-            offset = queryset_open.filter(id__gte=results_accounts_open[-1].id).count()
-            if offset == queryset_open.count():
-                offset = None
-        else:
-            offset = 0
         accounts_open = AccountSerializer(results_accounts_open, many=True).data
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
+        context["per_page"] = self.limit
         context["active_accounts"] = {
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
             "open_accounts": accounts_open,
         }
 
         queryset_close = queryset.filter(status="close")
         results_accounts_close = self.paginate_queryset(
-            queryset_close.distinct(), self.request, view=self
+            queryset_close.distinct(), self.request, view=self, cursor_query_param="close_cursor"
         )
-        if results_accounts_close:
-            offset = queryset_close.filter(
-                id__gte=results_accounts_close[-1].id
-            ).count()
-            if offset == queryset_close.count():
-                offset = None
-        else:
-            offset = 0
         accounts_close = AccountSerializer(results_accounts_close, many=True).data
 
         contacts = Contact.objects.filter(org=self.request.profile.org).values(
@@ -121,7 +112,8 @@ class AccountsListView(APIView, LimitOffsetPagination):
         )
         context["contacts"] = contacts
         context["closed_accounts"] = {
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
             "close_accounts": accounts_close,
         }
         context["teams"] = TeamsSerializer(
@@ -147,11 +139,22 @@ class AccountsListView(APIView, LimitOffsetPagination):
         return context
 
     @extend_schema(tags=["Accounts"], parameters=swagger_params1.account_get_params)
+    @cache_response(
+        "accounts",
+        "leads",
+        "contacts",
+        "profiles",
+        "teams",
+        "tags",
+        "attachments",
+        "comments",
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
 
     @extend_schema(tags=["Accounts"], parameters=swagger_params1.organization_params,request=AccountWriteSerializer)
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         data = request.data
         serializer = AccountCreateSerializer(
@@ -168,14 +171,7 @@ class AccountsListView(APIView, LimitOffsetPagination):
                 if contacts:
                     account_object.contacts.add(*contacts)
             if data.get("tags"):
-                tags = json.loads(data.get("tags"))
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(slug=tag.lower())
-                    if tag_obj.exists():
-                        tag_obj = tag_obj[0]
-                    else:
-                        tag_obj = Tags.objects.create(name=tag)
-                    account_object.tags.add(tag_obj)
+                set_tags(account_object, json.loads(data.get("tags")))
             if data.get("teams"):
                 teams_list = json.loads(data.get("teams"))
                 teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
@@ -200,7 +196,8 @@ class AccountsListView(APIView, LimitOffsetPagination):
             recipients = list(
                 account_object.assigned_to.all().values_list("id", flat=True)
             )
-            send_email_to_assigned_user.delay(
+            enqueue(
+                send_email_to_assigned_user,
                 recipients,
                 account_object.id,
             )
@@ -223,6 +220,7 @@ class AccountDetailView(APIView):
         return get_object_or_404(Account, id=pk)
 
     @extend_schema(tags=["Accounts"], parameters=swagger_params1.organization_params,request=AccountWriteSerializer)
+    @transaction.atomic
     def put(self, request, pk, format=None):
         data = request.data
         account_object = self.get_object(pk=pk)
@@ -252,43 +250,34 @@ class AccountDetailView(APIView):
                         status=status.HTTP_403_FORBIDDEN,
                     )
             account_object = serializer.save()
-            previous_assigned_to_users = list(
-                account_object.assigned_to.all().values_list("id", flat=True)
-            )
 
-            account_object.contacts.clear()
-            if data.get("contacts"):
-                contacts_list = json.loads(data.get("contacts"))
-                contacts = Contact.objects.filter(id__in=contacts_list, org=request.profile.org)
-                if contacts:
-                    account_object.contacts.add(*contacts)
+            contacts_list = json.loads(data.get("contacts")) if data.get("contacts") else []
+            sync_m2m(
+                account_object,
+                "contacts",
+                Contact.objects.filter(id__in=contacts_list, org=request.profile.org),
+            )
 
-            account_object.tags.clear()
-            if data.get("tags"):
-                tags = json.loads(data.get("tags"))
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(slug=tag.lower())
-                    if tag_obj.exists():
-                        tag_obj = tag_obj[0]
-                    else:
-                        tag_obj = Tags.objects.create(name=tag)
-                    account_object.tags.add(tag_obj)
+            tags = json.loads(data.get("tags")) if data.get("tags") else []
+            set_tags(account_object, tags, clear=True)
 
-            account_object.teams.clear()
-            if data.get("teams"):
-                teams_list = json.loads(data.get("teams"))
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                if teams:
-                    account_object.teams.add(*teams)
+            teams_list = json.loads(data.get("teams")) if data.get("teams") else []
+            sync_m2m(
+                account_object,
+                "teams",
+                Teams.objects.filter(id__in=teams_list, org=request.profile.org),
+            )
 
-            account_object.assigned_to.clear()
-            if data.get("assigned_to"):
-                assigned_to_list = json.loads(data.get("assigned_to"))
-                profiles = Profile.objects.filter(
+            assigned_to_list = (
+                json.loads(data.get("assigned_to")) if data.get("assigned_to") else []
+            )
+            recipients, _ = sync_m2m(
+                account_object,
+                "assigned_to",
+                Profile.objects.filter(
                     id__in=assigned_to_list, org=request.profile.org, is_active=True
-                )
-                if profiles:
-                    account_object.assigned_to.add(*profiles)
+                ),
+            )
 
             if self.request.FILES.get("account_attachment"):
                 attachment = Attachments()
@@ -298,12 +287,9 @@ class AccountDetailView(APIView):
                 attachment.attachment = self.request.FILES.get("account_attachment")
                 attachment.save()
 
-            assigned_to_list = list(
-                account_object.assigned_to.all().values_list("id", flat=True)
-            )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email_to_assigned_user.delay(
-                recipients,
+            enqueue(
+                send_email_to_assigned_user,
+                list(recipients),
                 account_object.id,
             )
             return Response(
@@ -339,6 +325,7 @@ class AccountDetailView(APIView):
         )
 
     @extend_schema(tags=["Accounts"], parameters=swagger_params1.organization_params)
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, format=None):
         self.account = self.get_object(pk=pk)
         if self.account.org != request.profile.org:
@@ -591,6 +578,7 @@ class AccountCreateMailView(APIView):
     serializer_class = EmailWriteSerializer
 
     @extend_schema(tags=["Accounts"], parameters=swagger_params1.organization_params,request=EmailWriteSerializer)
+    @transaction.atomic
     def post(self, request, pk, *args, **kwargs):
         data = request.data
         scheduled_later = data.get("scheduled_later")
@@ -601,18 +589,28 @@ class AccountCreateMailView(APIView):
             request_obj=request,  # account=account,
         )
 
+        recipients = data.get("recipients")
         data = {}
         if serializer.is_valid():
-            email_obj = serializer.save(from_account=account)
-            if scheduled_later not in ["", None, False, "false"]:
-                if scheduled_date_time in ["", None]:
-                    return Response(
-                        {"error": True, "errors": serializer.errors},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+            scheduled_later = scheduled_later not in ["", None, False, "false"]
+            if scheduled_later and scheduled_date_time in ["", None]:
+                return Response(
+                    {
+                        "error": True,
+                        "errors": {
+                            "scheduled_date_time": ["This field is required."]
+                        },
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            email_obj = serializer.save(
+                from_account=account, scheduled_later=False, state="queued"
+            )
 
-            if data.get("recipients"):
-                contacts = json.loads(data.get("recipients"))
+            if recipients:
+                contacts = (
+                    json.loads(recipients) if isinstance(recipients, str) else recipients
+                )
                 for contact in contacts:
                     obj_contact = Contact.objects.filter(id=contact, org=request.profile.org)
                     if obj_contact.exists():
@@ -621,11 +619,10 @@ class AccountCreateMailView(APIView):
                         email_obj.delete()
                         data["recipients"] = "Please enter valid recipient"
                         return Response({"error": True, "errors": data})
-            if data.get("scheduled_later") != "true":
-                send_email.delay(email_obj.id)
+            if scheduled_later:
+                schedule(email_obj, serializer.validated_data["scheduled_date_time"])
             else:
-                email_obj.scheduled_later = True
-                email_obj.scheduled_date_time = scheduled_date_time
+                enqueue(send_email, email_obj.id)
             return Response(
                 {"error": False, "message": "Email sent successfully"},
                 status=status.HTTP_200_OK,
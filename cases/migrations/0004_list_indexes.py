@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0003_alter_case_created_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['org', 'status', '-created_at', '-id'], name='case_org_status_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "case_assigned_to_rev_idx" ON "case_assigned_to" ("profile_id", "case_id")',
+            'DROP INDEX IF EXISTS "case_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "case_teams_rev_idx" ON "case_teams" ("teams_id", "case_id")',
+            'DROP INDEX IF EXISTS "case_teams_rev_idx"',
+        ),
+    ]
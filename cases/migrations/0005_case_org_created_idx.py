@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:50
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # built without locking writes to the table
+    atomic = False
+
+    dependencies = [
+        ('cases', '0004_list_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='case',
+            index=models.Index(fields=['org', '-created_at', '-id'], name='case_org_created_idx'),
+        ),
+    ]
@@ -46,6 +46,17 @@ class Case(BaseModel):
         verbose_name_plural = "Cases"
         db_table = "case"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "status", "-created_at", "-id"],
+                name="case_org_status_created_idx",
+            ),
+            # the default list order, without a status filter
+            models.Index(
+                fields=["org", "-created_at", "-id"],
+                name="case_org_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from accounts.serializer import AccountSerializer
 from cases.models import Case
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import OrganizationSerializer, ProfileSerializer,UserSerializer
 from contacts.serializer import ContactSerializer
 from teams.serializer import TeamsSerializer
@@ -17,6 +18,7 @@ class CaseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Case
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "name",
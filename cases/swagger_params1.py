@@ -15,4 +15,7 @@ cases_list_get_params = [
     OpenApiParameter("status", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("priority", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("account", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
@@ -1,11 +1,13 @@
 from django.urls import path
 
+from common.views import ExportView
 from cases import views
 
 app_name = "api_cases"
 
 urlpatterns = [
     path("", views.CaseListView.as_view()),
+    path("export/", ExportView.as_view(entity="cases")),
     path("<str:pk>/", views.CaseDetailView.as_view()),
     path("comment/<str:pk>/", views.CaseCommentView.as_view()),
     path("attachment/<str:pk>/", views.CaseAttachmentView.as_view()),
@@ -1,9 +1,9 @@
 import json
 
+from django.db import transaction
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -14,7 +14,11 @@ from cases import swagger_params1
 from cases.models import Case
 from cases.serializer import CaseCreateSerializer, CaseSerializer,CaseCreateSwaggerSerializer,CaseDetailEditSwaggerSerializer,CaseCommentEditSwaggerSerializer
 from cases.tasks import send_email_to_assigned_user
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
+from common.response_cache import ALL, cache_response
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import AttachmentsSerializer, CommentSerializer
@@ -24,14 +28,14 @@ from contacts.serializer import ContactSerializer
 from teams.models import Teams
 
 
-class CaseListView(APIView, LimitOffsetPagination):
+class CaseListView(APIView, KeysetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Case
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         accounts = Account.objects.filter(org=self.request.profile.org).order_by("-id")
         contacts = Contact.objects.filter(org=self.request.profile.org).order_by("-id")
         profiles = Profile.objects.filter(is_active=True, org=self.request.profile.org)
@@ -62,16 +66,11 @@ class CaseListView(APIView, LimitOffsetPagination):
         results_cases = self.paginate_queryset(queryset, self.request, view=self)
         cases = CaseSerializer(results_cases, many=True).data
 
-        if results_cases:
-            offset = queryset.filter(id__gte=results_cases[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
         context.update(
             {
                 "cases_count": self.count,
-                "offset": offset,
+                "next_cursor": self.next_cursor,
+                "previous_cursor": self.previous_cursor,
             }
         )
         context["cases"] = cases
@@ -85,6 +84,9 @@ class CaseListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["Cases"], parameters=swagger_params1.cases_list_get_params
     )
+    @cache_response(
+        "cases", "accounts", "leads", "contacts", "profiles", "teams", "tags"
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -92,6 +94,7 @@ class CaseListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["Cases"], parameters=swagger_params1.organization_params,request=CaseCreateSwaggerSerializer
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         params = request.data
         serializer = CaseCreateSerializer(data=params, request_obj=request)
@@ -132,7 +135,8 @@ class CaseListView(APIView, LimitOffsetPagination):
                 attachment.save()
 
             recipients = list(cases_obj.assigned_to.all().values_list("id", flat=True))
-            send_email_to_assigned_user.delay(
+            enqueue(
+                send_email_to_assigned_user,
                 recipients,
                 cases_obj.id,
             )
@@ -158,6 +162,7 @@ class CaseDetailView(APIView):
     @extend_schema(
         tags=["Cases"], parameters=swagger_params1.organization_params,request=CaseCreateSwaggerSerializer
     )
+    @transaction.atomic
     def put(self, request, pk, format=None):
         params = request.data
         cases_object = self.get_object(pk=pk)
@@ -189,31 +194,29 @@ class CaseDetailView(APIView):
             cases_object = serializer.save(
                 closed_on=params.get("closed_on"), case_type=params.get("case_type")
             )
-            previous_assigned_to_users = list(
-                cases_object.assigned_to.all().values_list("id", flat=True)
+            sync_m2m(
+                cases_object,
+                "contacts",
+                Contact.objects.filter(
+                    id__in=params.get("contacts") or [], org=request.profile.org
+                ),
+            )
+            sync_m2m(
+                cases_object,
+                "teams",
+                Teams.objects.filter(
+                    id__in=params.get("teams") or [], org=request.profile.org
+                ),
+            )
+            recipients, _ = sync_m2m(
+                cases_object,
+                "assigned_to",
+                Profile.objects.filter(
+                    id__in=params.get("assigned_to") or [],
+                    org=request.profile.org,
+                    is_active=True,
+                ),
             )
-            cases_object.contacts.clear()
-            if params.get("contacts"):
-                contacts_list = params.get("contacts")
-                contacts = Contact.objects.filter(id__in=contacts_list, org=request.profile.org)
-                if contacts:
-                    cases_object.contacts.add(*contacts)
-
-            cases_object.teams.clear()
-            if params.get("teams"):
-                teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                if teams.exists():
-                    cases_object.teams.add(*teams)
-
-            cases_object.assigned_to.clear()
-            if params.get("assigned_to"):
-                assinged_to_list = params.get("assigned_to")
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org, is_active=True
-                )
-                if profiles:
-                    cases_object.assigned_to.add(*profiles)
 
             if self.request.FILES.get("case_attachment"):
                 attachment = Attachments()
@@ -223,12 +226,9 @@ class CaseDetailView(APIView):
                 attachment.attachment = self.request.FILES.get("case_attachment")
                 attachment.save()
 
-            assigned_to_list = list(
-                cases_object.assigned_to.all().values_list("id", flat=True)
-            )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email_to_assigned_user.delay(
-                recipients,
+            enqueue(
+                send_email_to_assigned_user,
+                list(recipients),
                 cases_object.id,
             )
             return Response(
@@ -268,6 +268,7 @@ class CaseDetailView(APIView):
     @extend_schema(
         tags=["Cases"], parameters=swagger_params1.organization_params
     )
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, format=None):
         self.cases = self.get_object(pk=pk)
         if self.cases.org != request.profile.org:
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class CommonConfig(AppConfig):
     name = "common"
+
+    def ready(self):
+        from django.conf import settings
+
+        from common import metrics, signals  # noqa: F401
+
+        if settings.METRICS_ENABLED:
+            metrics.install()
@@ -0,0 +1,81 @@
+"""
+Audit stamping of ``created_by``/``updated_by`` and ``updated_at``.
+
+The acting user is the one set with ``acting_user`` (Celery tasks, management
+commands) or else the user of the current request. ``BaseModel.save`` stamps
+single rows; ``BulkAuditQuerySet``, the default manager of every
+``BaseModel``, stamps ``bulk_create``, ``bulk_update`` and ``update`` the same
+way so set-based writes keep the audit columns right::
+
+    with acting_user(job.profile.user):
+        Lead.objects.bulk_create(leads)
+        Lead.objects.filter(id__in=ids).update(status="closed")
+
+Values given explicitly are never overwritten.
+"""
+import contextlib
+import contextvars
+
+from crum import get_current_user
+from django.db import models
+from django.utils import timezone
+
+_acting_user = contextvars.ContextVar("acting_user", default=None)
+
+
+@contextlib.contextmanager
+def acting_user(user):
+    """Stamp everything written inside the block as done by ``user``."""
+    token = _acting_user.set(user)
+    try:
+        yield user
+    finally:
+        _acting_user.reset(token)
+
+
+def get_acting_user():
+    user = _acting_user.get() or get_current_user()
+    if user is None or user.is_anonymous:
+        return None
+    return user
+
+
+def stamp(instances, adding, user=None):
+    """Fill the audit fields of new (``adding``) or changed ``instances``."""
+    user = user or get_acting_user()
+    if user is None:
+        return
+    for instance in instances:
+        if not adding:
+            instance.updated_by = user
+            continue
+        if instance.created_by_id is None:
+            instance.created_by = user
+        if instance.updated_by_id is None:
+            instance.updated_by = user
+
+
+class BulkAuditQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        stamp(objs, adding=True)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        user = get_acting_user()
+        fields = set(fields) | {"updated_at"}
+        for obj in objs:
+            obj.updated_at = now
+        if user is not None:
+            stamp(objs, adding=False, user=user)
+            fields.add("updated_by")
+        return super().bulk_update(objs, list(fields), *args, **kwargs)
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        user = get_acting_user()
+        if user is not None and not {"updated_by", "updated_by_id"} & set(kwargs):
+            kwargs["updated_by"] = user
+        return super().update(**kwargs)
@@ -0,0 +1,166 @@
+"""
+Request authentication is resolved once per request by
+``GetProfileAndOrg`` and reused by ``CustomDualAuthentication``.
+
+Resolved users and profiles are cached in the shared cache (Redis in
+production) for ``AUTH_CACHE_TIMEOUT`` seconds and in a small per-process
+LRU for ``AUTH_LOCAL_CACHE_TTL`` seconds. The signal handlers in
+``common.signals`` delete the shared entries and clear this process' LRU
+when a user, profile or org changes; other processes pick the change up once
+their local entry expires.
+"""
+import hashlib
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+
+from common.models import Profile, User
+
+
+class LocalLRUCache:
+    """Thread-safe, size-bounded LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRUCache(settings.AUTH_LOCAL_CACHE_SIZE, settings.AUTH_LOCAL_CACHE_TTL)
+
+
+def user_cache_key(user_id):
+    return "auth:user:{}".format(user_id)
+
+
+def profile_cache_key(user_id, org_id):
+    return "auth:profile:{}:{}".format(user_id, org_id)
+
+
+def api_key_cache_key(api_key):
+    return "auth:apikey:{}".format(hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+
+
+def _cached(key, loader):
+    # the local copy is kept pickled so concurrent requests never share (and
+    # mutate) the same model instance
+    data = local_cache.get(key)
+    if data is None:
+        value = cache.get(key)
+        if value is None:
+            value = loader()
+            if value is None:
+                return None
+            cache.set(key, value, settings.AUTH_CACHE_TIMEOUT)
+        data = pickle.dumps(value)
+        local_cache.set(key, data)
+    return pickle.loads(data)
+
+
+def get_user(user_id):
+    return _cached(
+        user_cache_key(user_id), lambda: User.objects.filter(id=user_id).first()
+    )
+
+
+def get_active_profile(user_id, org_id):
+    return _cached(
+        profile_cache_key(user_id, org_id),
+        lambda: Profile.objects.select_related("user", "org")
+        .filter(user_id=user_id, org_id=org_id, is_active=True)
+        .first(),
+    )
+
+
+def get_api_key_profile(api_key):
+    """The org's admin profile requests authenticated by the org API key act as."""
+    return _cached(
+        api_key_cache_key(api_key),
+        lambda: Profile.objects.select_related("user", "org")
+        .filter(org__api_key=api_key, role="ADMIN")
+        .first(),
+    )
+
+
+def invalidate(keys):
+    keys = list(keys)
+    cache.delete_many(keys)
+    local_cache.delete_many(keys)
+
+
+def decode_token(token):
+    return jwt.decode(token, (settings.SECRET_KEY), algorithms=[settings.JWT_ALGO])
+
+
+class AuthResolution:
+    def __init__(self, user=None, profile=None, api_key=False):
+        self.user = user
+        self.profile = profile
+        self.api_key = api_key
+
+
+def resolve_request(request):
+    """
+    Resolve the user and profile of ``request`` (a Django HttpRequest) once.
+    Raises ``jwt.InvalidTokenError`` or ``ValueError`` for bad credentials.
+    """
+    resolution = getattr(request, "auth_resolution", None)
+    if resolution is not None:
+        return resolution
+
+    resolution = AuthResolution()
+    api_key = request.headers.get("Token")
+    if api_key:
+        profile = get_api_key_profile(api_key)
+        if profile is None:
+            raise ValueError("Invalid API Key")
+        resolution = AuthResolution(profile.user, profile, api_key=True)
+    elif request.headers.get("Authorization"):
+        token = request.headers.get("Authorization").split(" ")[1]
+        user_id = decode_token(token)["user_id"]
+        org_id = request.headers.get("org")
+        if org_id:
+            profile = get_active_profile(user_id, uuid.UUID(org_id))
+            if profile is None:
+                raise ValueError("Profile not found")
+            resolution = AuthResolution(profile.user, profile)
+        else:
+            resolution = AuthResolution(get_user(user_id))
+
+    request.auth_resolution = resolution
+    return resolution
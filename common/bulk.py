@@ -0,0 +1,435 @@
+"""
+Bulk create, update and delete of leads, contacts, accounts and tasks.
+
+A batch of up to ``BULK_MAX_RECORDS`` records is validated by a ``many=True``
+serializer whose records never query the database on their own: the names
+that must be unique are checked for the whole batch with one query per
+field, and the related records given by id (assignees, teams, contacts,
+foreign keys) or by name (tags) are resolved with one query per relation.
+The rows and their m2m links are then written with ``bulk_create`` and
+``bulk_update`` in one transaction, along with the outbox message (see
+common/outbox.py) of the single task that notifies every new assignee of
+the batch.
+
+bulk_create and the m2m link tables send no signals, so the cached
+responses and dashboards of the org are invalidated here.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+from common import response_cache
+from common.audit import acting_user
+from common.dashboard import mark_stale
+from common.export import is_org_admin, visible_to
+from common.notifications import Notification, active_profiles, send_messages
+from common.outbox import enqueue
+from common.tags import get_tag_ids
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Checks the unique fields of the child serializer across the batch."""
+
+    def to_internal_value(self, data):
+        # checked here rather than in validate() so the errors are keyed by
+        # record like the errors of the records themselves
+        attrs = super().to_internal_value(data)
+        errors = {}
+        for index, record in enumerate(attrs):
+            # updates (partial) name their record, creates must not
+            if self.partial and not record.get("id"):
+                errors[index] = {"id": ["This field is required."]}
+            elif not self.partial and record.get("id"):
+                errors[index] = {"id": ["Only records being updated have an id."]}
+        for field in self.child.unique_in_org:
+            self.check_unique(attrs, errors, field, in_org=True)
+        for field in self.child.unique:
+            self.check_unique(attrs, errors, field, in_org=False)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def check_unique(self, attrs, errors, field, in_org):
+        def key(value):
+            return str(value).lower() if in_org else str(value)
+
+        seen = {}
+        for index, record in enumerate(attrs):
+            if record.get(field) in (None, ""):
+                continue
+            if key(record[field]) in seen:
+                errors.setdefault(index, {})[field] = ["Duplicate in this batch."]
+            seen.setdefault(key(record[field]), index)
+        if not seen:
+            return
+        model = self.child.Meta.model
+        if in_org:
+            rows = (
+                model.objects.filter(org=self.context["org"])
+                .annotate(key=Lower(field))
+                .filter(key__in=list(seen))
+                .values_list("key", "id")
+            )
+        else:
+            values = [attrs[index][field] for index in seen.values()]
+            rows = model.objects.filter(**{"{}__in".format(field): values}).values_list(
+                field, "id"
+            )
+        for value, pk in rows:
+            index = seen.get(key(value))
+            if index is not None and attrs[index].get("id") != pk:
+                errors.setdefault(index, {})[field] = [
+                    "{} already exists with this {}".format(
+                        model._meta.verbose_name.title(), field.replace("_", " ")
+                    )
+                ]
+
+
+class BulkRecordSerializer(serializers.ModelSerializer):
+    """
+    One record of a bulk write. ``id`` selects the record to update; the
+    relations are lists of ids, tags a list of names. ``unique_in_org`` are
+    the fields unique (case-insensitively) within an org, ``unique`` those
+    unique across the table.
+    """
+
+    id = serializers.UUIDField(required=False)
+    assigned_to = serializers.ListField(child=serializers.UUIDField(), required=False)
+    teams = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+    unique_in_org = ()
+    unique = ()
+
+    class Meta:
+        list_serializer_class = BulkListSerializer
+
+    def get_extra_kwargs(self):
+        # the batch checks these with one query, see BulkListSerializer
+        extra_kwargs = super().get_extra_kwargs()
+        for field in self.unique:
+            extra_kwargs.setdefault(field, {})["validators"] = []
+        return extra_kwargs
+
+
+class BulkEntity:
+    """
+    ``m2m`` maps the m2m fields a record may set to the model of their
+    targets, ``foreign_keys`` does the same for the foreign keys given by id.
+    ``notification`` is the subject, template and context builder of the
+    email sent to new assignees. ``owner`` and ``admin`` are as for
+    ``common.export.ExportEntity``.
+    """
+
+    def __init__(
+        self,
+        name,
+        model,
+        serializer,
+        m2m,
+        foreign_keys=None,
+        notification=None,
+        owner="user",
+        admin="profile",
+    ):
+        self.name = name
+        self.model = model
+        self.serializer = serializer
+        self.m2m = m2m
+        self.foreign_keys = foreign_keys or {}
+        self.notification = notification
+        self.owner = owner
+        self.admin = admin
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def get_serializer(self, records, org, partial=False):
+        return import_string(self.serializer)(
+            data=records,
+            many=True,
+            partial=partial,
+            allow_empty=False,
+            max_length=settings.BULK_MAX_RECORDS,
+            context={"org": org},
+        )
+
+    def get_queryset(self, profile, user):
+        queryset = self.get_model().objects.filter(org=profile.org)
+        return visible_to(queryset, profile, user, self.owner, self.admin)
+
+    def get_deletable(self, profile, user):
+        # like the detail views, only admins and the creator delete a record
+        queryset = self.get_model().objects.filter(org=profile.org)
+        if is_org_admin(profile, user, self.admin):
+            return queryset
+        return queryset.filter(created_by=profile if self.owner == "profile" else user)
+
+    def resolve(self, records, org):
+        """
+        Replace the related ids of every record by those that exist in
+        ``org`` and the tag names by tag ids, one query per relation.
+        """
+        for field, label in {**self.m2m, **self.foreign_keys}.items():
+            given = {
+                value
+                for record in records
+                for value in (
+                    record.get(field, [])
+                    if field in self.m2m
+                    else [record.get(field)]
+                )
+                if value
+            }
+            if not given:
+                continue
+            if label == "accounts.Tags":
+                found = get_tag_ids(given)
+            else:
+                related = apps.get_model(label).objects.filter(id__in=given, org=org)
+                if label == "common.Profile":
+                    related = related.filter(is_active=True)
+                found = {pk: pk for pk in related.values_list("id", flat=True)}
+            for record in records:
+                if field not in record:
+                    continue
+                if field in self.m2m:
+                    record[field] = list(
+                        dict.fromkeys(found[v] for v in record[field] if v in found)
+                    )
+                else:
+                    record[field] = found.get(record[field])
+
+    def split(self, record):
+        fields = {}
+        links = {}
+        for field, value in record.items():
+            if field in self.m2m:
+                links[field] = value
+            elif field in self.foreign_keys:
+                fields["{}_id".format(field)] = value
+            elif field != "id":
+                fields[field] = value
+        return fields, links
+
+    def link(self, links_by_id, replace=False):
+        """
+        Write the m2m links of ``links_by_id`` ({record id: {field: ids}}),
+        replacing the current links of those fields when ``replace``: only
+        the pairs that go are deleted and only those that are new inserted.
+        Returns the newly assigned profile ids of each record.
+        """
+        model = self.get_model()
+        assigned = {}
+        for field in self.m2m:
+            targets = {
+                pk: links[field] for pk, links in links_by_id.items() if field in links
+            }
+            if not targets:
+                continue
+            m2m_field = model._meta.get_field(field)
+            through = m2m_field.remote_field.through
+            source = m2m_field.m2m_field_name()
+            target = m2m_field.m2m_reverse_field_name()
+            current = {}
+            if replace:
+                rows = through.objects.filter(**{"{}__in".format(source): targets})
+                for pk, target_id in rows.values_list(
+                    "{}_id".format(source), "{}_id".format(target)
+                ):
+                    current.setdefault(pk, set()).add(target_id)
+                removed = Q()
+                for pk, values in targets.items():
+                    gone = current.get(pk, set()).difference(values)
+                    if gone:
+                        removed |= Q(
+                            **{
+                                "{}_id".format(source): pk,
+                                "{}_id__in".format(target): gone,
+                            }
+                        )
+                if removed:
+                    through.objects.filter(removed).delete()
+            through.objects.bulk_create(
+                [
+                    through(
+                        **{"{}_id".format(source): pk, "{}_id".format(target): value}
+                    )
+                    for pk, values in targets.items()
+                    for value in values
+                    if value not in current.get(pk, ())
+                ]
+            )
+            if field == "assigned_to":
+                for pk, values in targets.items():
+                    new = [v for v in values if v not in current.get(pk, ())]
+                    if new:
+                        assigned[pk] = new
+        return assigned
+
+    def changed(self, org_id, assigned):
+        response_cache.invalidate(org_id, response_cache.NAMESPACES[self.model])
+        mark_stale(org_id)
+        if assigned and self.notification is not None:
+            from common.tasks import send_bulk_assignment_emails
+
+            assigned = {
+                str(pk): [str(v) for v in values] for pk, values in assigned.items()
+            }
+            enqueue(send_bulk_assignment_emails, self.name, assigned)
+
+    def create(self, records, profile):
+        """Insert ``records`` (validated and resolved) for ``profile``, return the ids."""
+        model = self.get_model()
+        instances = []
+        links_by_id = {}
+        for record in records:
+            fields, links = self.split(record)
+            instance = model(org=profile.org, **fields)
+            instances.append(instance)
+            links_by_id[instance.id] = links
+        with transaction.atomic(), acting_user(profile.user):
+            model.objects.bulk_create(instances)
+            assigned = self.link(links_by_id)
+            self.changed(profile.org_id, assigned)
+        return [instance.id for instance in instances]
+
+    def update(self, records, instances, profile):
+        """Apply ``records`` to ``instances`` ({id: instance}), return the ids."""
+        model = self.get_model()
+        fields_changed = set()
+        links_by_id = {}
+        for record in records:
+            instance = instances[record["id"]]
+            fields, links = self.split(record)
+            for field, value in fields.items():
+                setattr(instance, field, value)
+            fields_changed.update(fields)
+            links_by_id[instance.id] = links
+        with transaction.atomic(), acting_user(profile.user):
+            if fields_changed:
+                model.objects.bulk_update(
+                    list(instances.values()),
+                    list(fields_changed),
+                    batch_size=settings.BULK_MAX_RECORDS,
+                )
+            assigned = self.link(links_by_id, replace=True)
+            self.changed(profile.org_id, assigned)
+        return list(instances)
+
+    def delete(self, queryset, profile):
+        with transaction.atomic():
+            ids = list(queryset.values_list("id", flat=True))
+            self.get_model().objects.filter(id__in=ids).delete()
+            self.changed(profile.org_id, {})
+        return ids
+
+    def notify(self, assigned):
+        """Email every profile of ``assigned`` ({record id: profile ids})."""
+        subject, template_name, get_context = self.notification
+        records = self.get_model().objects.filter(id__in=assigned).select_related(
+            "created_by"
+        )
+        profiles = {
+            str(profile.id): profile
+            for profile in active_profiles(
+                {pk for values in assigned.values() for pk in values}
+            )
+        }
+        messages = []
+        for record in records:
+            notification = Notification(subject, template_name, get_context(record))
+            for pk in assigned[str(record.id)]:
+                if pk in profiles:
+                    user = profiles[pk].user
+                    notification.add(user.email, {"user": user})
+            messages.extend(notification.messages)
+        return send_messages(messages)
+
+
+def _context(name):
+    def get_context(record):
+        return {
+            "url": settings.DOMAIN_NAME,
+            name: record,
+            "created_by": record.created_by,
+        }
+
+    return get_context
+
+
+def _task_context(task):
+    return {
+        "task_title": task.title,
+        "task_id": task.id,
+        "task_created_by": task.created_by,
+        "url": settings.DOMAIN_NAME,
+    }
+
+
+BULK_ENTITIES = {
+    entity.name: entity
+    for entity in (
+        BulkEntity(
+            "leads",
+            "leads.Lead",
+            "leads.serializer.LeadBulkSerializer",
+            {
+                "assigned_to": "common.Profile",
+                "teams": "teams.Teams",
+                "contacts": "contacts.Contact",
+                "tags": "accounts.Tags",
+            },
+            {"company": "leads.Company"},
+            (
+                "Assigned a lead for you. ",
+                "assigned_to/leads_assigned.html",
+                _context("lead"),
+            ),
+            admin="superuser",
+        ),
+        BulkEntity(
+            "contacts",
+            "contacts.Contact",
+            "contacts.serializer.ContactBulkSerializer",
+            {"assigned_to": "common.Profile", "teams": "teams.Teams"},
+            notification=(
+                "Assigned a contact for you.",
+                "assigned_to/contact_assigned.html",
+                _context("contact"),
+            ),
+        ),
+        BulkEntity(
+            "accounts",
+            "accounts.Account",
+            "accounts.serializer.AccountBulkSerializer",
+            {
+                "assigned_to": "common.Profile",
+                "teams": "teams.Teams",
+                "contacts": "contacts.Contact",
+                "tags": "accounts.Tags",
+            },
+            {"lead": "leads.Lead"},
+            (
+                "Assigned a account for you.",
+                "assigned_to/account_assigned.html",
+                _context("account"),
+            ),
+        ),
+        BulkEntity(
+            "tasks",
+            "tasks.Task",
+            "tasks.serializer.TaskBulkSerializer",
+            {
+                "assigned_to": "common.Profile",
+                "teams": "teams.Teams",
+                "contacts": "contacts.Contact",
+            },
+            {"account": "accounts.Account"},
+            (" Assigned a task for you .", "tasks_email_template.html", _task_context),
+        ),
+    )
+}
@@ -0,0 +1,44 @@
+import time
+
+from django.core.cache import cache
+
+
+def _generation_key(namespace, org_id=None):
+    return "gen:{}:{}".format(namespace, org_id or "global")
+
+
+def get_generation(namespace, org_id=None):
+    """
+    Return the current generation stamp for ``namespace`` (optionally scoped
+    to an org). A missing stamp is seeded from the clock rather than 1, so an
+    evicted counter can never hand out a value a client has already seen.
+    """
+    key = _generation_key(namespace, org_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_generations(namespaces, org_id=None):
+    """Fetch several generation stamps with a single cache round trip."""
+    keys = {_generation_key(namespace, org_id): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    generations = {}
+    for key, namespace in keys.items():
+        if key in found:
+            generations[namespace] = found[key]
+        else:
+            generations[namespace] = get_generation(namespace, org_id)
+    return generations
+
+
+def bump_generation(namespace, org_id=None):
+    key = _generation_key(namespace, org_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        generation = int(time.time() * 1000)
+        cache.set(key, generation, None)
+        return generation
@@ -0,0 +1,129 @@
+"""
+Dashboard aggregates served by ``ApiHomeView``.
+
+Snapshots are recomputed in the background: the signal handlers in
+``common.signals`` mark an org's snapshots stale whenever an account,
+contact, lead or opportunity changes and schedule one debounced refresh,
+and ``refresh_stale_dashboards`` sweeps up anything that was missed.
+
+Marking a snapshot stale also bumps its ``version``. A rebuild reads the
+version before it counts and only clears ``is_stale`` if nothing bumped it
+in the meantime; otherwise the snapshot stays stale for the refresh that
+the change scheduled, instead of keeping counts that missed it until the
+``DASHBOARD_MAX_AGE`` sweep.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from common.models import DashboardSnapshot
+
+
+def snapshot_profile(profile, user):
+    """Admins share the org-wide snapshot, everybody else gets their own."""
+    if profile.role == "ADMIN" or user.is_superuser:
+        return None
+    return profile
+
+
+def dashboard_querysets(org, profile=None):
+    from accounts.models import Account
+    from contacts.models import Contact
+    from leads.models import Lead
+    from opportunity.models import Opportunity
+
+    querysets = {
+        "accounts": Account.objects.filter(status="open", org=org),
+        "contacts": Contact.objects.filter(org=org),
+        "leads": Lead.objects.filter(org=org).exclude(
+            Q(status="converted") | Q(status="closed")
+        ),
+        "opportunities": Opportunity.objects.filter(org=org),
+    }
+    if profile is not None:
+        visible = Q(assigned_to=profile) | Q(created_by=profile.user)
+        querysets = {
+            name: queryset.filter(visible).distinct()
+            for name, queryset in querysets.items()
+        }
+    return querysets
+
+
+def build_snapshot(org, profile=None):
+    from accounts.serializer import AccountSerializer
+    from contacts.serializer import ContactSerializer
+    from leads.serializer import LeadSerializer
+    from opportunity.serializer import OpportunitySerializer
+
+    serializers = {
+        "accounts": AccountSerializer,
+        "contacts": ContactSerializer,
+        "leads": LeadSerializer,
+        "opportunities": OpportunitySerializer,
+    }
+    snapshot, _ = DashboardSnapshot.objects.get_or_create(org=org, profile=profile)
+    version = snapshot.version
+    limit = settings.DASHBOARD_RECENT_LIMIT
+    counts = {}
+    recent = {}
+    for name, queryset in dashboard_querysets(org, profile).items():
+        counts["{}_count".format(name)] = queryset.count()
+        recent[name] = serializers[name](
+            queryset.order_by("-created_at")[:limit], many=True
+        ).data
+    values = dict(recent=recent, refreshed_at=timezone.now(), **counts)
+    rows = DashboardSnapshot.objects.filter(id=snapshot.id)
+    snapshot.is_stale = not rows.filter(version=version).update(
+        is_stale=False, **values
+    )
+    if snapshot.is_stale:
+        rows.update(**values)
+    for name, value in values.items():
+        setattr(snapshot, name, value)
+    return snapshot
+
+
+def get_snapshot(org, profile=None):
+    """The current snapshot, built on first use and refreshed when stale."""
+    snapshot = DashboardSnapshot.objects.filter(org=org, profile=profile).first()
+    if snapshot is None:
+        return build_snapshot(org, profile)
+    if snapshot.is_stale:
+        schedule_refresh(org.id)
+    return snapshot
+
+
+def _refresh_key(org_id):
+    return "dashboard:refresh:{}".format(org_id)
+
+
+def schedule_refresh(org_id):
+    """Queue at most one refresh per org every ``DASHBOARD_REFRESH_DELAY`` seconds."""
+    from common.tasks import refresh_dashboards
+
+    delay = settings.DASHBOARD_REFRESH_DELAY
+    if cache.add(_refresh_key(org_id), 1, delay):
+        transaction.on_commit(
+            lambda: refresh_dashboards.apply_async((str(org_id),), countdown=delay)
+        )
+
+
+def mark_stale(org_id):
+    if org_id is None:
+        return
+    DashboardSnapshot.objects.filter(org_id=org_id).update(
+        is_stale=True, version=F("version") + 1
+    )
+    schedule_refresh(org_id)
+
+
+def refresh_org(org_id):
+    cache.delete(_refresh_key(org_id))
+    snapshots = DashboardSnapshot.objects.filter(
+        org_id=org_id, is_stale=True
+    ).select_related("org", "profile__user")
+    for snapshot in snapshots:
+        build_snapshot(snapshot.org, snapshot.profile)
+    return len(snapshots)
@@ -0,0 +1,304 @@
+"""
+Streaming CSV and NDJSON exports of the CRM records.
+
+An export never builds model instances or serializers: the rows come from a
+``values_list`` projection read through a server-side cursor
+(``iterator(chunk_size=EXPORT_CHUNK_SIZE)``) and are encoded and handed to
+the ``StreamingHttpResponse`` one chunk at a time, so memory stays flat
+whatever the row count. The response starts as soon as the first chunk is
+read and keeps the connection busy until the last, which the ``gthread``
+gunicorn workers (scripts/gunicorn.sh) serve without hitting the worker
+timeout.
+
+Exports too big for a request run as an ``ExportJob``: ``write_export``
+encodes the same rows into gzipped parts of ``EXPORT_FILE_ROWS`` rows each,
+saved through the default storage (S3 in production, the filesystem
+locally), and the parts are fetched with signed, expiring download links
+that need no other credentials.
+
+The rows are scoped like the list views: admins get the whole org, anyone
+else the records assigned to them or created by them.
+"""
+import csv
+import gzip
+import io
+import itertools
+import tempfile
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.urls import reverse
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def is_org_admin(profile, user, admin="profile"):
+    """
+    Whether the list views of an entity show ``profile`` the whole org: the
+    ADMIN role, or the flag those views check besides it (``admin`` is
+    ``"profile"`` for ``profile.is_admin``, ``"superuser"`` for
+    ``user.is_superuser``).
+    """
+    if profile.role == "ADMIN":
+        return True
+    if admin == "superuser":
+        return user.is_superuser
+    return profile.is_admin
+
+
+def visible_to(queryset, profile, user, owner="user", admin="profile"):
+    """
+    The records of ``queryset`` ``profile`` may see: all of them for admins
+    (see ``is_org_admin``), else those assigned to the profile or created by
+    it (``owner`` is what ``created_by`` points at, ``"user"`` or
+    ``"profile"``).
+    """
+    if is_org_admin(profile, user, admin):
+        return queryset
+    # a subquery rather than a join on assigned_to, which would need a
+    # DISTINCT over the whole result
+    assigned = queryset.model.objects.filter(assigned_to=profile).values("id")
+    creator = profile if owner == "profile" else user
+    return queryset.filter(Q(id__in=assigned) | Q(created_by=creator))
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    # phone numbers and anything else without a JSON form are exported as text
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+class ExportEntity:
+    """
+    ``fields`` are ``values()`` lookups, exported under their lookup with
+    ``__`` written as ``.``. ``owner`` is what ``created_by`` points at,
+    ``"user"`` or ``"profile"``, ``admin`` the admin check of the entity's
+    list view (see ``is_org_admin``).
+    """
+
+    def __init__(
+        self, name, model, fields, queryset=None, owner="user", admin="profile"
+    ):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.queryset = queryset
+        self.owner = owner
+        self.admin = admin
+
+    @property
+    def header(self):
+        return [field.replace("__", ".") for field in self.fields]
+
+    def get_queryset(self, profile, user):
+        model = apps.get_model(self.model)
+        queryset = model.objects.filter(org=profile.org)
+        if self.queryset:
+            queryset = self.queryset(queryset)
+        return visible_to(queryset, profile, user, self.owner, self.admin)
+
+    def rows(self, profile, user):
+        return (
+            self.get_queryset(profile, user)
+            .order_by("created_at", "id")
+            .values_list(*self.fields)
+            .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        )
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_csv(header, rows, size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for chunk in _chunks(rows, size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_ndjson(header, rows, size):
+    encoder = ExportEncoder()
+    for chunk in _chunks(rows, size):
+        yield "".join(
+            encoder.encode(dict(zip(header, row))) + "\n" for row in chunk
+        )
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+
+def export(entity, profile, user, output="csv"):
+    """The encoded export of ``entity`` for ``profile``, chunk by chunk."""
+    entity = EXPORT_ENTITIES[entity] if isinstance(entity, str) else entity
+    return ENCODERS[output](
+        entity.header, entity.rows(profile, user), settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def write_export(job, on_progress=None):
+    """
+    Write the export of ``job`` to storage in gzipped parts, return their
+    names and the number of rows written. ``on_progress`` is called with the
+    rows written so far after every ``EXPORT_CHUNK_SIZE`` rows.
+    """
+    entity = EXPORT_ENTITIES[job.entity]
+    size = settings.EXPORT_CHUNK_SIZE
+    rows = iter(entity.rows(job.profile, job.profile.user))
+    names = []
+    processed = 0
+
+    def counted(part):
+        nonlocal processed
+        for row in part:
+            yield row
+            processed += 1
+            if on_progress is not None and processed % size == 0:
+                on_progress(processed)
+
+    while True:
+        first = next(rows, None)
+        # an empty export is still one part, with the csv header
+        if first is None and names:
+            return names, processed
+        part = itertools.chain([first], rows) if first is not None else iter(())
+        part = itertools.islice(part, settings.EXPORT_FILE_ROWS)
+        with tempfile.TemporaryFile() as temp:
+            with gzip.GzipFile(fileobj=temp, mode="wb") as archive:
+                for text in ENCODERS[job.output](entity.header, counted(part), size):
+                    archive.write(text.encode("utf-8"))
+            temp.seek(0)
+            name = "exports/{}/{}/{}-{:04d}.{}.gz".format(
+                job.org_id, job.id, job.entity, len(names) + 1, job.output
+            )
+            names.append(default_storage.save(name, File(temp)))
+        if first is None:
+            return names, processed
+
+
+def delete_export_files(job):
+    for name in job.files:
+        default_storage.delete(name)
+
+
+def download_url(request, job, part):
+    """A link to part ``part`` of ``job`` valid for ``EXPORT_URL_MAX_AGE``."""
+    token = signing.dumps([str(job.id), part], salt="export-download")
+    return request.build_absolute_uri(
+        reverse("common_urls:api_common:export_download", args=[token])
+    )
+
+
+def read_download_token(token):
+    """The (job id, part) signed into ``token``, None if invalid or expired."""
+    try:
+        return signing.loads(
+            token, salt="export-download", max_age=settings.EXPORT_URL_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+
+
+EXPORT_ENTITIES = {
+    entity.name: entity
+    for entity in (
+        ExportEntity(
+            "leads",
+            "leads.Lead",
+            (
+                "id", "title", "first_name", "last_name", "email", "phone",
+                "status", "source", "address_line", "street", "city", "state",
+                "postcode", "country", "website", "description", "account_name",
+                "opportunity_amount", "industry", "organization", "probability",
+                "close_date", "company__name", "created_by__email", "created_at",
+                "updated_at",
+            ),
+            lambda queryset: queryset.exclude(status="converted"),
+            admin="superuser",
+        ),
+        ExportEntity(
+            "contacts",
+            "contacts.Contact",
+            (
+                "id", "salutation", "first_name", "last_name", "date_of_birth",
+                "organization", "title", "primary_email", "secondary_email",
+                "mobile_number", "secondary_number", "department", "language",
+                "do_not_call", "country", "description", "linked_in_url",
+                "facebook_url", "twitter_username", "created_by__email",
+                "created_at", "updated_at",
+            ),
+        ),
+        ExportEntity(
+            "accounts",
+            "accounts.Account",
+            (
+                "id", "name", "email", "phone", "industry", "status",
+                "billing_address_line", "billing_street", "billing_city",
+                "billing_state", "billing_postcode", "billing_country", "website",
+                "description", "contact_name", "created_by__email", "created_at",
+                "updated_at",
+            ),
+        ),
+        ExportEntity(
+            "opportunities",
+            "opportunity.Opportunity",
+            (
+                "id", "name", "account__name", "stage", "currency", "amount",
+                "lead_source", "probability", "closed_on", "description",
+                "created_by__email", "created_at", "updated_at",
+            ),
+            admin="superuser",
+        ),
+        ExportEntity(
+            "cases",
+            "cases.Case",
+            (
+                "id", "name", "status", "priority", "case_type", "account__name",
+                "closed_on", "description", "created_by__email", "created_at",
+                "updated_at",
+            ),
+        ),
+        ExportEntity(
+            "tasks",
+            "tasks.Task",
+            (
+                "id", "title", "status", "priority", "due_date", "account__name",
+                "created_by__email", "created_at", "updated_at",
+            ),
+        ),
+        ExportEntity(
+            "events",
+            "events.Event",
+            (
+                "id", "name", "event_type", "status", "start_date", "start_time",
+                "end_date", "end_time", "date_of_meeting", "description",
+                "created_by__user__email", "created_at", "updated_at",
+            ),
+            owner="profile",
+        ),
+    )
+}
@@ -2,7 +2,7 @@ import jwt
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.request import Request
-from common.models import Org,Profile,User
+from common.auth_cache import resolve_request
 from django.conf import settings
 
 def verify_jwt_token(token):
@@ -18,36 +18,17 @@ def verify_jwt_token(token):
 class CustomDualAuthentication(BaseAuthentication):
 
     def authenticate(self, request):
-        jwt_user = None
-        profile = None
+        # GetProfileAndOrg has already resolved the credentials of this
+        # request; resolve_request returns that result without new queries
+        try:
+            resolution = resolve_request(request._request)
+        except ValueError as e:
+            raise AuthenticationFailed(str(e))
+        except (jwt.InvalidTokenError, IndexError, KeyError):
+            return None
 
-        # Check JWT authentication
-        jwt_token = request.headers.get('Authorization', '').split(' ')[1] if 'Authorization' in request.headers else None
-        if jwt_token:
-            is_valid, jwt_payload = verify_jwt_token(jwt_token)
-            if is_valid:
-                jwt_user = (User.objects.get(id=jwt_payload['user_id']), True)
-                if jwt_payload['user_id'] is not None:
-                    if request.headers.get("org"):
-                        profile = Profile.objects.get(
-                            user_id=jwt_payload['user_id'], org=request.headers.get("org"), is_active=True
-                        )
-                        if profile:
-                            request.profile = profile
-
-        # Check API key authentication
-        api_key = request.headers.get('Token')  # Get API key from request query params
-        if api_key:
-            try:
-                organization = Org.objects.get(api_key=api_key)
-                api_key_user = organization
-                request.META['org'] = api_key_user.id
-                profile = Profile.objects.filter(org=api_key_user, role="ADMIN").first()
-                request.profile = profile
-                profile = (profile.user, True)
-            except Org.DoesNotExist:
-                raise AuthenticationFailed('Invalid API Key')
-
-        # Select the appropriate user based on authentication method
-        # Return the user if any authentication method succeeded
-        return jwt_user or profile
+        if resolution.user is None or not resolution.user.is_active:
+            return None
+        if resolution.profile is not None:
+            request.profile = resolution.profile
+        return (resolution.user, True)
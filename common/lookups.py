@@ -0,0 +1,97 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from common.cache_utils import get_generation
+from common.utils import COUNTRIES, INDCHOICES, LEAD_SOURCE, LEAD_STATUS
+
+
+class Lookup:
+    """
+    Reference data served by ``/api/lookups/<name>/``.
+
+    Org scoped lookups are versioned by a per-org generation stamp which the
+    signal handlers in ``common.signals`` bump whenever the underlying rows
+    change, so the ETag can be computed without touching the database.
+    """
+
+    def __init__(self, name, builder=None, org_scoped=True, choices=None):
+        self.name = name
+        self.builder = builder
+        self.org_scoped = org_scoped
+        self.choices = choices
+
+    @property
+    def namespace(self):
+        return "lookup:{}".format(self.name)
+
+    def get_version(self, org_id):
+        if self.choices is not None:
+            return hashlib.md5(
+                json.dumps(self.choices, default=str).encode("utf-8")
+            ).hexdigest()
+        return get_generation(self.namespace, org_id if self.org_scoped else None)
+
+    def get_etag(self, org_id):
+        version = self.get_version(org_id)
+        digest = hashlib.md5(
+            "{}:{}:{}".format(self.name, org_id, version).encode("utf-8")
+        ).hexdigest()
+        return '"{}"'.format(digest)
+
+    def get_data(self, org):
+        if self.choices is not None:
+            return self.choices
+        cache_key = "{}:{}:{}".format(
+            self.namespace, org.id if self.org_scoped else "global", self.get_version(org.id)
+        )
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.builder(org)
+            cache.set(cache_key, data, settings.LOOKUP_CACHE_TIMEOUT)
+        return data
+
+
+def _contacts(org):
+    from contacts.models import Contact
+
+    return list(Contact.objects.filter(org=org).values("id", "first_name"))
+
+
+def _companies(org):
+    from leads.models import Company
+    from leads.serializer import CompanySerializer
+
+    return CompanySerializer(Company.objects.filter(org=org), many=True).data
+
+
+def _tags(org):
+    from accounts.models import Tags
+    from leads.serializer import TagsSerializer
+
+    return TagsSerializer(Tags.objects.all(), many=True).data
+
+
+def _users(org):
+    from common.models import Profile
+
+    return list(
+        Profile.objects.filter(is_active=True, org=org).values("id", "user__email")
+    )
+
+
+LOOKUPS = {
+    lookup.name: lookup
+    for lookup in (
+        Lookup("contacts", _contacts),
+        Lookup("companies", _companies),
+        Lookup("tags", _tags, org_scoped=False),
+        Lookup("users", _users),
+        Lookup("lead_status", choices=LEAD_STATUS),
+        Lookup("lead_source", choices=LEAD_SOURCE),
+        Lookup("countries", choices=COUNTRIES),
+        Lookup("industries", choices=INDCHOICES),
+    )
+}
@@ -0,0 +1,63 @@
+"""
+Diff-based updates of many-to-many links.
+
+The detail views used to ``clear()`` every relation of a record and add the
+submitted links back, deleting and reinserting every through row on each
+save even when nothing changed, with an ``m2m_changed`` for each step.
+``sync_m2m`` reads the current through rows once, deletes the links that
+go with one DELETE and inserts the new ones with one ``bulk_create``; a
+relation left as it was costs a single read and writes nothing.
+
+``m2m_changed`` (pre/post remove and add, with the ids in ``pk_set``) is
+sent only for the links that actually changed, so the response cache and
+dashboard receivers keep working without firing on no-op edits.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed
+
+
+def _send(instance, field, action, pk_set, using):
+    m2m_changed.send(
+        sender=field.remote_field.through,
+        instance=instance,
+        action=action,
+        reverse=False,
+        model=field.related_model,
+        pk_set=pk_set,
+        using=using,
+    )
+
+
+def sync_m2m(instance, field_name, targets):
+    """
+    Make ``targets`` (a queryset, instances or ids) the ``field_name`` links
+    of ``instance``; return the sets of target ids added and removed.
+    """
+    field = instance._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = "{}_id".format(field.m2m_field_name())
+    target = "{}_id".format(field.m2m_reverse_field_name())
+    to_python = field.related_model._meta.pk.to_python
+    if isinstance(targets, QuerySet):
+        wanted = set(targets.values_list("pk", flat=True))
+    else:
+        wanted = {to_python(getattr(value, "pk", value)) for value in targets or ()}
+
+    using = instance._state.db or "default"
+    rows = through.objects.using(using).filter(**{source: instance.pk})
+    current = set(rows.values_list(target, flat=True))
+    removed = current - wanted
+    added = wanted - current
+    if removed:
+        _send(instance, field, "pre_remove", removed, using)
+        rows.filter(**{"{}__in".format(target): removed}).delete()
+        _send(instance, field, "post_remove", removed, using)
+    if added:
+        _send(instance, field, "pre_add", added, using)
+        through.objects.using(using).bulk_create(
+            [through(**{source: instance.pk, target: pk}) for pk in added]
+        )
+        _send(instance, field, "post_add", added, using)
+    if added or removed:
+        getattr(instance, "_prefetched_objects_cache", {}).pop(field.name, None)
+    return added, removed
@@ -0,0 +1,260 @@
+import datetime
+import json
+import math
+import statistics
+import time
+import uuid
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.models import Org, Profile
+from leads.importer import import_rows
+from teams.tasks import update_team_users
+
+# (name, url, model of the {pk} in the url); every list view, the detail
+# view of the newest record and the dashboard
+ENDPOINTS = [
+    ("dashboard", "/api/dashboard/", None),
+    ("users", "/api/users/", None),
+    ("user_detail", "/api/user/{pk}/", "common.Profile"),
+    ("teams", "/api/teams/", None),
+    ("team_detail", "/api/teams/{pk}/", "teams.Teams"),
+    ("leads", "/api/leads/", None),
+    ("lead_detail", "/api/leads/{pk}/", "leads.Lead"),
+    ("contacts", "/api/contacts/", None),
+    ("contact_detail", "/api/contacts/{pk}/", "contacts.Contact"),
+    ("accounts", "/api/accounts/", None),
+    ("account_detail", "/api/accounts/{pk}/", "accounts.Account"),
+    ("opportunities", "/api/opportunities/", None),
+    ("opportunity_detail", "/api/opportunities/{pk}/", "opportunity.Opportunity"),
+    ("cases", "/api/cases/", None),
+    ("case_detail", "/api/cases/{pk}/", "cases.Case"),
+    ("tasks", "/api/tasks/", None),
+    ("task_detail", "/api/tasks/{pk}/", "tasks.Task"),
+    ("events", "/api/events/", None),
+    ("event_detail", "/api/events/{pk}/", "events.Event"),
+    ("documents", "/api/documents/", None),
+    ("document_detail", "/api/documents/{pk}/", "common.Document"),
+]
+# the writes, each run in a transaction that is rolled back
+JOBS = ["lead_import", "team_sync"]
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``."""
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the API of an org (see seed_org) in process: every list view, "
+        "the detail views, the dashboard, a lead import and a team sync. "
+        "Records p50/p95 latency and query counts per scenario to --output "
+        "and, with --baseline, fails when a scenario got slower than "
+        "--threshold percent or runs more queries than in the baseline. The "
+        "imports and syncs are rolled back; the response cache is off "
+        "unless --with-cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("org", help="id of the org to benchmark")
+        parser.add_argument(
+            "--profile", help="profile to call the API as, the first admin by default"
+        )
+        parser.add_argument(
+            "--only",
+            help="comma separated subset of: "
+            + ", ".join([name for name, _, _ in ENDPOINTS] + JOBS),
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--import-rows", type=int, default=1000, help="rows per lead import"
+        )
+        parser.add_argument("--output", help="file to write the results to (JSON)")
+        parser.add_argument("--baseline", help="results of an earlier run to compare to")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20,
+            help="slowdown of the p95 latency (percent) counted as a regression",
+        )
+        parser.add_argument(
+            "--with-cache", action="store_true", help="keep the response cache on"
+        )
+
+    def handle(self, *args, **options):
+        org = Org.objects.filter(id=options["org"]).first()
+        if org is None:
+            raise CommandError("Org not found")
+        profiles = Profile.objects.select_related("user").filter(org=org, is_active=True)
+        if options["profile"]:
+            profile = profiles.filter(id=options["profile"]).first()
+        else:
+            profile = profiles.filter(role="ADMIN").order_by("created_at").first()
+        if profile is None:
+            raise CommandError("Profile not found in this org")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        self.org = org
+        self.profile = profile
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Bearer {}".format(AccessToken.for_user(profile.user)),
+            HTTP_ORG=str(org.id),
+        )
+        scenarios = self.get_scenarios(options["import_rows"])
+        if options["only"]:
+            names = options["only"].split(",")
+            unknown = set(names) - set(scenarios)
+            if unknown:
+                raise CommandError("Unknown scenarios: " + ", ".join(sorted(unknown)))
+            scenarios = {name: scenarios[name] for name in names}
+
+        cache_settings = {} if options["with_cache"] else {"RESPONSE_CACHE_TIMEOUT": 0}
+        results = {}
+        with override_settings(**cache_settings):
+            for name, scenario in scenarios.items():
+                if scenario is None:
+                    self.stdout.write(
+                        self.style.WARNING("{}: no records, skipped".format(name))
+                    )
+                    continue
+                results[name] = self.measure(
+                    scenario, options["repeat"], options["warmup"]
+                )
+                self.stdout.write(
+                    "{:<20} p50 {p50_ms:>9.2f}ms  p95 {p95_ms:>9.2f}ms  "
+                    "{queries:>5} queries".format(name, **results[name])
+                )
+
+        report = {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "org": str(org.id),
+            "profile": str(profile.id),
+            "role": profile.role,
+            "repeat": options["repeat"],
+            "response_cache": options["with_cache"],
+            "rows": self.row_counts(),
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        if baseline is not None:
+            regressions = self.compare(baseline, report, options["threshold"])
+            if regressions:
+                raise CommandError(
+                    "{} regressions: {}".format(len(regressions), ", ".join(regressions))
+                )
+
+    def get_scenarios(self, import_rows_count):
+        scenarios = {}
+        for name, url, label in ENDPOINTS:
+            if label is None:
+                scenarios[name] = self.get(url)
+                continue
+            model = apps.get_model(label)
+            pk = (
+                model.objects.filter(org=self.org)
+                .order_by("-created_at")
+                .values_list("id", flat=True)
+                .first()
+            )
+            scenarios[name] = self.get(url.format(pk=pk)) if pk else None
+        scenarios["lead_import"] = self.rolled_back(
+            lambda: self.import_leads(import_rows_count)
+        )
+        team = (
+            apps.get_model("teams.Teams")
+            .objects.filter(org=self.org)
+            .order_by("-created_at")
+            .first()
+        )
+        scenarios["team_sync"] = (
+            self.rolled_back(lambda: update_team_users.apply(args=[str(team.id)]).get())
+            if team
+            else None
+        )
+        return scenarios
+
+    def import_leads(self, count):
+        run = uuid.uuid4().hex[:8]
+        rows = (
+            (line, {"title": "import {} {}".format(run, line)})
+            for line in range(2, count + 2)
+        )
+        import_rows(rows, self.org, self.profile.user)
+
+    def get(self, url):
+        def run():
+            response = self.client.get(url)
+            if response.status_code != 200:
+                raise CommandError("GET {}: {}".format(url, response.status_code))
+
+        return run
+
+    def rolled_back(self, func):
+        def run():
+            with transaction.atomic():
+                func()
+                transaction.set_rollback(True)
+
+        return run
+
+    def measure(self, scenario, repeat, warmup):
+        for _ in range(warmup):
+            scenario()
+        timings = []
+        queries = []
+        for _ in range(max(repeat, 1)):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                scenario()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+        return {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.mean(timings), 3),
+            "queries": max(queries),
+        }
+
+    def row_counts(self):
+        return {
+            label: apps.get_model(label).objects.filter(org=self.org).count()
+            for label in sorted({label for _, _, label in ENDPOINTS if label})
+        }
+
+    def compare(self, baseline, report, threshold):
+        regressions = []
+        for name, result in report["results"].items():
+            before = baseline.get("results", {}).get(name)
+            if before is None:
+                continue
+            change = (
+                (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+                if before["p95_ms"]
+                else 0
+            )
+            slower = change > threshold
+            more_queries = result["queries"] > before["queries"]
+            line = "{:<20} p95 {:>+7.1f}%  queries {} -> {}".format(
+                name, change, before["queries"], result["queries"]
+            )
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+        return regressions
@@ -0,0 +1,150 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from common.models import Org, Profile, User
+
+# (model, bucket filters as used by the list view, indexes backing it)
+LIST_VIEWS = {
+    "leads": (
+        "leads.Lead",
+        {
+            "open": ~Q(status__in=["converted", "closed"]),
+            "closed": Q(status="closed"),
+        },
+        [
+            "lead_org_status_created_idx",
+            "lead_org_open_created_idx",
+            "lead_assigned_to_rev_idx",
+        ],
+    ),
+    "accounts": (
+        "accounts.Account",
+        {"open": Q(status="open"), "closed": Q(status="close")},
+        ["account_org_status_created_idx", "accounts_assigned_to_rev_idx"],
+    ),
+    "contacts": (
+        "contacts.Contact",
+        {"all": Q()},
+        ["contact_org_created_idx", "contacts_assigned_to_rev_idx"],
+    ),
+    "opportunities": (
+        "opportunity.Opportunity",
+        {"all": Q()},
+        ["opportunity_org_created_idx", "opportunity_assigned_to_rev_idx"],
+    ),
+    "cases": (
+        "cases.Case",
+        {"all": Q()},
+        ["case_org_status_created_idx", "case_assigned_to_rev_idx"],
+    ),
+    "tasks": (
+        "tasks.Task",
+        {"all": Q()},
+        ["task_org_status_created_idx", "task_assigned_to_rev_idx"],
+    ),
+    "events": (
+        "events.Event",
+        {"all": Q()},
+        ["event_org_created_idx", "event_assigned_to_rev_idx"],
+    ),
+    "invoices": (
+        "invoices.Invoice",
+        {"all": Q()},
+        ["invoice_org_status_created_idx", "invoice_assigned_to_rev_idx"],
+    ),
+    "documents": (
+        "common.Document",
+        {"active": Q(status="active"), "inactive": Q(status="inactive")},
+        ["doc_org_status_created_idx", "document_shared_to_rev_idx"],
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plans of the list view queries for an org. With "
+        "--compare the plans are also shown with the list indexes dropped "
+        "inside a rolled back transaction; that locks the tables while it "
+        "runs, so use a staging copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("org", help="id of the org to explain the queries for")
+        parser.add_argument(
+            "--profile",
+            help="explain the non-admin queries as seen by this profile",
+        )
+        parser.add_argument(
+            "--views", help="comma separated subset of: " + ", ".join(LIST_VIEWS)
+        )
+        parser.add_argument("--limit", type=int, default=10, help="page size")
+        parser.add_argument(
+            "--analyze", action="store_true", help="run EXPLAIN ANALYZE"
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="also show the plans without the list indexes",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("explain_list_views needs a PostgreSQL database")
+        org = Org.objects.filter(id=options["org"]).first()
+        if org is None:
+            raise CommandError("Org not found")
+        profile = None
+        if options["profile"]:
+            profile = (
+                Profile.objects.select_related("user")
+                .filter(id=options["profile"], org=org)
+                .first()
+            )
+            if profile is None:
+                raise CommandError("Profile not found in this org")
+
+        names = options["views"].split(",") if options["views"] else list(LIST_VIEWS)
+        unknown = set(names) - set(LIST_VIEWS)
+        if unknown:
+            raise CommandError("Unknown views: " + ", ".join(sorted(unknown)))
+
+        for name in names:
+            model_label, buckets, indexes = LIST_VIEWS[name]
+            for bucket, condition in buckets.items():
+                queryset = self.get_queryset(
+                    model_label, org, profile, condition, options["limit"]
+                )
+                self.stdout.write(self.style.MIGRATE_HEADING("{} ({})".format(name, bucket)))
+                if options["compare"]:
+                    self.stdout.write(self.style.WARNING("-- without list indexes"))
+                    self.stdout.write(self.explain_without(queryset, indexes, options))
+                    self.stdout.write(self.style.SUCCESS("-- with list indexes"))
+                self.stdout.write(queryset.explain(analyze=options["analyze"]))
+                self.stdout.write("")
+
+    def get_queryset(self, model_label, org, profile, condition, limit):
+        model = apps.get_model(model_label)
+        queryset = model.objects.filter(condition, org=org)
+        if profile is not None and profile.role != "ADMIN":
+            # documents are shared rather than assigned, invoices go to users
+            field = "shared_to" if model_label == "common.Document" else "assigned_to"
+            member = profile
+            if model._meta.get_field(field).related_model is User:
+                member = profile.user
+            queryset = queryset.filter(
+                Q(**{field: member}) | Q(created_by=profile.user)
+            ).distinct()
+        return queryset.order_by("-created_at", "-id")[:limit]
+
+    def explain_without(self, queryset, indexes, options):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in indexes:
+                    cursor.execute(
+                        "DROP INDEX IF EXISTS {}".format(connection.ops.quote_name(index))
+                    )
+            plan = queryset.explain(analyze=options["analyze"])
+            transaction.set_rollback(True)
+        return plan
@@ -0,0 +1,277 @@
+import datetime
+import random
+import uuid
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from common.audit import acting_user
+from common.models import Org, Profile, User
+from common.utils import (
+    CASE_TYPE,
+    INDCHOICES,
+    LEAD_SOURCE,
+    PRIORITY_CHOICE,
+    STAGES,
+    STATUS_CHOICE,
+)
+
+LEAD_STATUSES = ["assigned", "in process", "recycled", "closed"]
+
+
+def _choices(choices):
+    return [value for value, _ in choices]
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a synthetic org of the given size for benchmarking, with "
+        "bulk inserts of --batch-size rows. Every record is assigned to "
+        "--assignees users and linked to one team and one contact; teams "
+        "have --team-size members. Run benchmark_api against the org it "
+        "prints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", help="org name, generated by default")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--teams", type=int, default=5)
+        parser.add_argument("--team-size", type=int, default=20)
+        parser.add_argument("--contacts", type=int, default=2000)
+        parser.add_argument("--accounts", type=int, default=500)
+        parser.add_argument("--leads", type=int, default=10000)
+        parser.add_argument("--opportunities", type=int, default=500)
+        parser.add_argument("--cases", type=int, default=500)
+        parser.add_argument("--tasks", type=int, default=500)
+        parser.add_argument("--events", type=int, default=500)
+        parser.add_argument(
+            "--assignees", type=int, default=2, help="users assigned to each record"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="seed of the generated data"
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.assignees = options["assignees"]
+        suffix = uuid.uuid4().hex[:8]
+        self.org = Org.objects.create(name=options["name"] or "benchmark-" + suffix)
+
+        users = [
+            User(email="bench-{}-{}@example.com".format(suffix, i))
+            for i in range(max(options["users"], 1))
+        ]
+        for user in users:
+            user.set_unusable_password()
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        admin = users[0]
+
+        with acting_user(admin):
+            profiles = Profile.objects.bulk_create(
+                [
+                    Profile(
+                        user=user,
+                        org=self.org,
+                        role="ADMIN" if user is admin else "USER",
+                        is_organization_admin=user is admin,
+                    )
+                    for user in users
+                ],
+                batch_size=self.batch_size,
+            )
+            self.profile_ids = [profile.id for profile in profiles]
+            self.team_ids = self.create(
+                "teams.Teams",
+                options["teams"],
+                lambda i: (
+                    {"name": "team {}".format(i), "description": "benchmark team"},
+                    {
+                        "users": self.random.sample(
+                            self.profile_ids,
+                            min(options["team_size"], len(self.profile_ids)),
+                        )
+                    },
+                ),
+            )
+            self.contact_ids = self.create(
+                "contacts.Contact",
+                options["contacts"],
+                lambda i: (
+                    {
+                        "first_name": "first {}".format(i),
+                        "last_name": "last {}".format(i),
+                        "primary_email": "contact-{}-{}@example.com".format(suffix, i),
+                        "organization": "organization {}".format(i % 1000),
+                        "country": "IN",
+                    },
+                    self.links(),
+                ),
+            )
+            self.account_ids = self.create(
+                "accounts.Account",
+                options["accounts"],
+                lambda i: (
+                    {
+                        "name": "account {}".format(i),
+                        "email": "account-{}@example.com".format(i),
+                        "industry": self.pick(INDCHOICES),
+                        "status": "open" if i % 5 else "close",
+                        "billing_city": "city {}".format(i % 100),
+                        "billing_country": "IN",
+                    },
+                    self.links(contacts=True),
+                ),
+            )
+            self.create(
+                "leads.Lead",
+                options["leads"],
+                lambda i: (
+                    {
+                        "title": "lead {}".format(i),
+                        "first_name": "first {}".format(i),
+                        "last_name": "last {}".format(i),
+                        "email": "lead-{}@example.com".format(i),
+                        "status": LEAD_STATUSES[i % len(LEAD_STATUSES)],
+                        "source": self.pick(LEAD_SOURCE),
+                        "city": "city {}".format(i % 100),
+                        "country": "IN",
+                        "opportunity_amount": i % 10000,
+                        "probability": i % 100,
+                    },
+                    self.links(contacts=True),
+                ),
+                keep_ids=False,
+            )
+            self.create(
+                "opportunity.Opportunity",
+                options["opportunities"],
+                lambda i: (
+                    {
+                        "name": "opportunity {}".format(i),
+                        "account_id": self.pick_id(self.account_ids),
+                        "stage": self.pick(STAGES),
+                        "currency": "INR",
+                        "amount": i % 100000,
+                        "probability": i % 100,
+                    },
+                    self.links(contacts=True),
+                ),
+                keep_ids=False,
+            )
+            self.create(
+                "cases.Case",
+                options["cases"],
+                lambda i: (
+                    {
+                        "name": "case {}".format(i),
+                        "status": self.pick(STATUS_CHOICE),
+                        "priority": self.pick(PRIORITY_CHOICE),
+                        "case_type": self.pick(CASE_TYPE),
+                        "account_id": self.pick_id(self.account_ids),
+                        "closed_on": self.date(i),
+                    },
+                    self.links(contacts=True),
+                ),
+                keep_ids=False,
+            )
+            self.create(
+                "tasks.Task",
+                options["tasks"],
+                lambda i: (
+                    {
+                        "title": "task {}".format(i),
+                        "status": ("New", "In Progress", "Completed")[i % 3],
+                        "priority": ("Low", "Medium", "High")[i % 3],
+                        "due_date": self.date(i),
+                        "account_id": self.pick_id(self.account_ids),
+                    },
+                    self.links(contacts=True),
+                ),
+                keep_ids=False,
+            )
+            self.create(
+                "events.Event",
+                options["events"],
+                lambda i: (
+                    {
+                        "name": "event {}".format(i),
+                        "event_type": "Non-Recurring",
+                        "status": "Planned",
+                        "start_date": self.date(i),
+                        "start_time": datetime.time(10),
+                        "end_date": self.date(i),
+                        "end_time": datetime.time(11),
+                        "date_of_meeting": self.date(i),
+                        "created_by_id": profiles[0].id,
+                    },
+                    self.links(contacts=True),
+                ),
+                keep_ids=False,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded org {} ({}), admin {}".format(self.org.id, self.org.name, admin.email)
+            )
+        )
+
+    def pick(self, choices):
+        return self.random.choice(_choices(choices))
+
+    def pick_id(self, ids):
+        return self.random.choice(ids) if ids else None
+
+    def date(self, i):
+        return datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 730)
+
+    def links(self, contacts=False):
+        links = {
+            "assigned_to": self.random.sample(
+                self.profile_ids, min(self.assignees, len(self.profile_ids))
+            )
+        }
+        if self.team_ids:
+            links["teams"] = [self.random.choice(self.team_ids)]
+        if contacts and self.contact_ids:
+            links["contacts"] = [self.random.choice(self.contact_ids)]
+        return links
+
+    def create(self, label, count, build, keep_ids=True):
+        """
+        Insert ``count`` rows of ``label`` built by ``build(i)``, which
+        returns the field values of row ``i`` and its m2m links
+        ({field: ids}), one batch per transaction.
+        """
+        model = apps.get_model(label)
+        ids = []
+        for start in range(0, count, self.batch_size):
+            rows = [
+                (model(org=self.org, **values), links)
+                for values, links in map(
+                    build, range(start, min(start + self.batch_size, count))
+                )
+            ]
+            with transaction.atomic():
+                model.objects.bulk_create([instance for instance, _ in rows])
+                for field in {field for _, links in rows for field in links}:
+                    m2m_field = model._meta.get_field(field)
+                    through = m2m_field.remote_field.through
+                    source = "{}_id".format(m2m_field.m2m_field_name())
+                    target = "{}_id".format(m2m_field.m2m_reverse_field_name())
+                    through.objects.bulk_create(
+                        [
+                            through(**{source: instance.id, target: value})
+                            for instance, links in rows
+                            for value in links.get(field, ())
+                        ]
+                    )
+            if keep_ids:
+                ids.extend(instance.id for instance, _ in rows)
+            self.stdout.write(
+                "{}: {}/{}".format(label, start + len(rows), count), ending="\r"
+            )
+        self.stdout.write("{}: {}".format(label, count))
+        return ids
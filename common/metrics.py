@@ -0,0 +1,329 @@
+"""
+Per-endpoint request metrics in the Prometheus text format.
+
+``common.middleware.metrics.RequestMetrics`` times every request and, through
+a ``connection.execute_wrapper``, counts its queries and the time spent in
+them. The time spent validating and serializing is measured by wrapping
+``BaseSerializer.is_valid`` and ``BaseSerializer.data`` (the outermost call
+only, so it includes the queries the serializers trigger). Observations go
+into histograms labelled with the URL route and the method, so every
+``api/leads/<str:pk>/`` request is one series whatever the pk. Streaming
+responses are timed until the view returns, not until the last chunk.
+
+Each process keeps its histograms in memory and at most every
+``METRICS_FLUSH_INTERVAL`` seconds writes them to one of ``SLOTS`` slots of
+the shared cache; ``render`` adds the slots up, so whichever gunicorn worker
+serves the scrape reports them all. The counts are cumulative per process,
+a slot outlives its process by ``PROCESS_TTL``.
+
+The scrape also reports the scheduled email queue of accounts/scheduler.py
+as gauges, read from the database and the dispatcher's last run stats.
+
+Requests slower than ``METRICS_SLOW_REQUEST`` seconds or running at least
+``METRICS_SLOW_QUERIES`` queries are logged with the statements they ran
+most often, which is where an N+1 shows up.
+"""
+import bisect
+import collections
+import contextvars
+import functools
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+HISTOGRAMS = {
+    "crm_http_request_duration_seconds": ("Time spent serving the request.", SECONDS),
+    "crm_http_request_db_seconds": ("Time spent in database queries.", SECONDS),
+    "crm_http_request_serializer_seconds": (
+        "Time spent validating and serializing.",
+        SECONDS,
+    ),
+    "crm_http_request_queries": ("Database queries run by the request.", QUERIES),
+}
+
+SLOTS = 64
+SLOT_KEY = "metrics:process:{}"
+PROCESS_TTL = 60 * 60 * 24
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """What one request spent, filled in while it runs."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.statements = collections.Counter()
+        self.depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+            self.statements[sql] += 1
+
+    def repeated(self, limit=5):
+        """The statements run more than once, most frequent first."""
+        return [
+            (count, sql)
+            for sql, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def _timed(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = _current.get()
+        if stats is None or stats.depth:
+            return func(*args, **kwargs)
+        stats.depth += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.serializer_time += time.perf_counter() - start
+            stats.depth -= 1
+
+    wrapper.timed = True
+    return wrapper
+
+
+def install():
+    """Time the serializers of instrumented requests, see CommonConfig.ready."""
+    if getattr(BaseSerializer.is_valid, "timed", False):
+        return
+    BaseSerializer.is_valid = _timed(BaseSerializer.is_valid)
+    BaseSerializer.data = property(_timed(BaseSerializer.data.fget))
+
+
+class Registry:
+    """The histograms of this process and its slot in the shared cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.histograms = {}
+        self.requests = collections.Counter()
+        self.owner = "{}:{}:{}".format(
+            socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8]
+        )
+        self.slot = None
+        self.flushed = 0.0
+
+    def observe(self, route, method, status, values):
+        labels = (route, method)
+        with self.lock:
+            self.requests[(route, method, str(status))] += 1
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][1]
+                # one count per bucket, the last one for +Inf, then the sum
+                series = self.histograms.get((name, labels))
+                if series is None:
+                    series = self.histograms[(name, labels)] = [0] * (len(buckets) + 2)
+                series[bisect.bisect_left(buckets, value)] += 1
+                series[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "owner": self.owner,
+                "histograms": {key: list(value) for key, value in self.histograms.items()},
+                "requests": dict(self.requests),
+            }
+
+    def flush(self, force=False):
+        if not force and (
+            time.monotonic() - self.flushed < settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.flushed = time.monotonic()
+            snapshot = self.snapshot()
+            if self.slot is not None:
+                current = cache.get(SLOT_KEY.format(self.slot))
+                if current is not None and current["owner"] != self.owner:
+                    # expired while this process was idle and taken since
+                    self.slot = None
+            if self.slot is not None:
+                cache.set(SLOT_KEY.format(self.slot), snapshot, PROCESS_TTL)
+                return
+            for slot in range(SLOTS):
+                if cache.add(SLOT_KEY.format(slot), snapshot, PROCESS_TTL):
+                    self.slot = slot
+                    return
+            logger.warning("No free metrics slot, %s is not reported", self.owner)
+        finally:
+            self.flush_lock.release()
+
+
+registry = Registry()
+
+
+def record(request, response, stats, duration):
+    match = request.resolver_match
+    route = match.route if match is not None else "unmatched"
+    registry.observe(
+        route,
+        request.method,
+        response.status_code,
+        {
+            "crm_http_request_duration_seconds": duration,
+            "crm_http_request_db_seconds": stats.db_time,
+            "crm_http_request_serializer_seconds": stats.serializer_time,
+            "crm_http_request_queries": stats.queries,
+        },
+    )
+    registry.flush()
+
+    slow = settings.METRICS_SLOW_REQUEST and duration >= settings.METRICS_SLOW_REQUEST
+    chatty = settings.METRICS_SLOW_QUERIES and stats.queries >= settings.METRICS_SLOW_QUERIES
+    if slow or chatty:
+        logger.warning(
+            "Slow request %s %s: %.3fs, %d queries in %.3fs, serializers %.3fs%s",
+            request.method,
+            request.path,
+            duration,
+            stats.queries,
+            stats.db_time,
+            stats.serializer_time,
+            "".join(
+                "\n  {} x {}".format(count, sql) for count, sql in stats.repeated()
+            ),
+        )
+
+
+def _labels(**labels):
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in labels.items()
+    )
+
+
+def _merged():
+    histograms = {}
+    requests = collections.Counter()
+    slots = cache.get_many([SLOT_KEY.format(slot) for slot in range(SLOTS)])
+    for snapshot in slots.values():
+        for key, values in snapshot["histograms"].items():
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+        requests.update(snapshot["requests"])
+    return histograms, requests
+
+
+def _scheduled_email_gauges():
+    # accounts depends on common, not the other way round
+    from accounts.scheduler import queue_metrics
+
+    queue = queue_metrics()
+    gauges = [
+        (
+            "crm_scheduled_emails_overdue",
+            "Scheduled emails due but not claimed yet.",
+            queue["overdue"],
+        ),
+        (
+            "crm_scheduled_emails_oldest_overdue_seconds",
+            "How long the oldest unclaimed email has been due.",
+            queue["oldest_overdue_lag"],
+        ),
+        (
+            "crm_scheduled_emails_queued",
+            "Claimed emails not sent yet.",
+            queue["queued"],
+        ),
+    ]
+    last_run = queue["last_run"]
+    if last_run is not None:
+        gauges += [
+            (
+                "crm_scheduled_emails_last_run_timestamp_seconds",
+                "When the dispatcher last ran.",
+                last_run["run_at"].timestamp(),
+            ),
+            (
+                "crm_scheduled_emails_last_run_dispatched",
+                "Emails dispatched by the last run.",
+                last_run["dispatched"],
+            ),
+            (
+                "crm_scheduled_emails_last_run_max_lag_seconds",
+                "The longest an email dispatched by the last run was overdue.",
+                last_run["max_lag"],
+            ),
+        ]
+    lines = []
+    for name, description, value in gauges:
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} gauge".format(name))
+        lines.append("{} {}".format(name, value))
+    return lines
+
+
+def render():
+    """The metrics of every process in the Prometheus text format."""
+    registry.flush(force=True)
+    histograms, requests = _merged()
+    lines = _scheduled_email_gauges()
+    lines += [
+        "# HELP crm_http_requests_total Requests served.",
+        "# TYPE crm_http_requests_total counter",
+    ]
+    for (route, method, status), count in sorted(requests.items()):
+        lines.append(
+            "crm_http_requests_total{{{}}} {}".format(
+                _labels(route=route, method=method, status=status), count
+            )
+        )
+    for name, (description, buckets) in HISTOGRAMS.items():
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} histogram".format(name))
+        for (metric, (route, method)), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                le = bound if isinstance(bound, str) else "{:g}".format(bound)
+                lines.append(
+                    "{}_bucket{{{}}} {}".format(
+                        name, _labels(route=route, method=method, le=le), cumulative
+                    )
+                )
+            labels = _labels(route=route, method=method)
+            lines.append("{}_sum{{{}}} {:g}".format(name, labels, values[-1]))
+            lines.append("{}_count{{{}}} {}".format(name, labels, cumulative))
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,4 @@
 import jwt
-from django.conf import settings
 from django.contrib.auth import logout
 from django.core.exceptions import ValidationError,PermissionDenied
 from rest_framework import status
@@ -7,7 +6,7 @@ from rest_framework.response import Response
 from crum import get_current_user
 from django.utils.functional import SimpleLazyObject
 
-from common.models import Org, Profile, User
+from common.auth_cache import resolve_request
 
 
 # def set_profile_request(request, org, token):
@@ -44,32 +43,12 @@ class GetProfileAndOrg(object):
         return self.get_response(request)
 
     def process_request(self, request):
-        try :
+        # resolve the user/profile once; CustomDualAuthentication reuses it
+        try:
             request.profile = None
-            user_id = None
-            # here I am getting the the jwt token passing in header
-            if request.headers.get("Authorization"):
-                token1 = request.headers.get("Authorization")
-                token = token1.split(" ")[1]  # getting the token value
-                decoded = jwt.decode(token, (settings.SECRET_KEY), algorithms=[settings.JWT_ALGO])
-                user_id = decoded['user_id']
-            api_key = request.headers.get('Token')  # Get API key from request query params
-            if api_key:
-                try:
-                    organization = Org.objects.get(api_key=api_key)
-                    api_key_user = organization
-                    request.META['org'] = api_key_user.id
-                    profile = Profile.objects.filter(org=api_key_user, role="ADMIN").first()
-                    user_id = profile.user.id
-                except Org.DoesNotExist:
-                    raise AuthenticationFailed('Invalid API Key')
-            if user_id is not None:
-                if request.headers.get("org"):
-                    profile = Profile.objects.get(
-                        user_id=user_id, org=request.headers.get("org"), is_active=True
-                    )
-                    if profile:
-                        request.profile = profile
-        except :
-             print('test1')
-             raise PermissionDenied()
+            resolution = resolve_request(request)
+            if resolution.api_key:
+                request.META["org"] = resolution.profile.org_id
+            request.profile = resolution.profile
+        except (jwt.InvalidTokenError, ValueError, IndexError, KeyError):
+            raise PermissionDenied()
@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from common import metrics
+
+
+class RequestMetrics(object):
+    """Records the latency, queries and serializer time of every request."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats.execute):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        metrics.record(request, response, stats, time.perf_counter() - start)
+        return response
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:30
+
+import django.core.serializers.json
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0009_user_is_staff'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('accounts_count', models.PositiveIntegerField(default=0)),
+                ('contacts_count', models.PositiveIntegerField(default=0)),
+                ('leads_count', models.PositiveIntegerField(default=0)),
+                ('opportunities_count', models.PositiveIntegerField(default=0)),
+                ('recent', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('is_stale', models.BooleanField(default=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshots', to='common.org')),
+                ('profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshots', to='common.profile')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Dashboard Snapshot',
+                'verbose_name_plural': 'Dashboard Snapshots',
+                'db_table': 'dashboard_snapshot',
+                'ordering': ('-created_at',),
+                'constraints': [models.UniqueConstraint(fields=('org', 'profile'), name='unique_dashboard_snapshot_profile'), models.UniqueConstraint(condition=models.Q(('profile__isnull', True)), fields=('org',), name='unique_dashboard_snapshot_org')],
+            },
+        ),
+    ]
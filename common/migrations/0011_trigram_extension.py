@@ -0,0 +1,13 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0010_dashboard_snapshot'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0011_trigram_extension'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['org', 'status', '-created_at', '-id'], name='doc_org_status_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "document_shared_to_rev_idx" ON "document_shared_to" ("profile_id", "document_id")',
+            'DROP INDEX IF EXISTS "document_shared_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "document_teams_rev_idx" ON "document_teams" ("teams_id", "document_id")',
+            'DROP INDEX IF EXISTS "document_teams_rev_idx"',
+        ),
+    ]
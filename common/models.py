@@ -7,6 +7,7 @@ import arrow
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from .manager import UserManager
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -22,7 +23,7 @@ from common.templatetags.common_tags import (
     is_document_file_video,
     is_document_file_zip,
 )
-from common.utils import COUNTRIES, ROLES
+from common.utils import COUNTRIES, EXPORT_ENTITY, EXPORT_OUTPUT, JOB_STATUS, ROLES
 from common.base import BaseModel
 
 
@@ -493,6 +494,12 @@ class Document(BaseModel):
         verbose_name_plural = "Documents"
         db_table = "document"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "status", "-created_at", "-id"],
+                name="doc_org_status_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -586,3 +593,115 @@ class APISettings(BaseModel):
         if not self.apikey or self.apikey is None or self.apikey == "":
             self.apikey = generate_key()
         super().save(*args, **kwargs)
+
+
+class DashboardSnapshot(BaseModel):
+    """
+    Pre-computed counts and a bounded "recent" slice for ``ApiHomeView``.
+    A snapshot without a profile is the org-wide view shown to admins.
+    """
+
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="dashboard_snapshots"
+    )
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="dashboard_snapshots",
+    )
+    accounts_count = models.PositiveIntegerField(default=0)
+    contacts_count = models.PositiveIntegerField(default=0)
+    leads_count = models.PositiveIntegerField(default=0)
+    opportunities_count = models.PositiveIntegerField(default=0)
+    recent = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    is_stale = models.BooleanField(default=True)
+    # bumped by every change, so a rebuild can tell it missed one
+    version = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Dashboard Snapshot"
+        verbose_name_plural = "Dashboard Snapshots"
+        db_table = "dashboard_snapshot"
+        ordering = ("-created_at",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "profile"], name="unique_dashboard_snapshot_profile"
+            ),
+            models.UniqueConstraint(
+                fields=["org"],
+                condition=models.Q(profile__isnull=True),
+                name="unique_dashboard_snapshot_org",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.org} <{self.profile_id or 'org'}>"
+
+
+class ExportJob(BaseModel):
+    """
+    A background export of one entity, written by ``common.tasks.run_export``
+    to gzipped parts in the default storage; ``files`` lists their names.
+    """
+
+    org = models.ForeignKey(Org, on_delete=models.CASCADE, related_name="export_jobs")
+    profile = models.ForeignKey(
+        Profile, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    entity = models.CharField(max_length=20, choices=EXPORT_ENTITY)
+    output = models.CharField(max_length=10, choices=EXPORT_OUTPUT, default="csv")
+    status = models.CharField(max_length=20, choices=JOB_STATUS, default="pending")
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    files = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        db_table = "export_job"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.entity} export ({self.status})"
+
+    @property
+    def progress(self):
+        if self.status == "completed":
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, self.processed_rows * 100 // self.total_rows)
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task call written in the transaction of the change that asked
+    for it, published by ``common.outbox.relay`` once committed.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Outbox Message"
+        verbose_name_plural = "Outbox Messages"
+        db_table = "outbox_message"
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=["available_at", "id"], name="outbox_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.id})"
@@ -0,0 +1,155 @@
+"""
+Batched delivery of the notification emails sent by the assignment tasks.
+
+The recipients of a notification are loaded with one query, its template is
+compiled once and rendered once per distinct recipient context, and all the
+messages go out over a single mail connection, recycled every
+``NOTIFICATION_BATCH_SIZE`` messages. A message that fails is retried on a
+fresh connection with exponential backoff; it never aborts the messages
+after it.
+
+``NOTIFICATION_RATE_LIMIT`` is the sending rate of the whole deployment, not
+of one task: every message takes a slot from a counter per one-second
+window in the shared cache, so the chunks of an account email sending in
+parallel on any number of workers stay under it together.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+
+from common.models import Profile, User
+
+logger = logging.getLogger(__name__)
+
+
+def active_profiles(profile_ids):
+    """The active profiles among ``profile_ids`` with their users, one query."""
+    return list(
+        Profile.objects.filter(id__in=profile_ids, is_active=True)
+        .select_related("user")
+        .order_by("created_at")
+    )
+
+
+def active_users(user_ids):
+    return list(User.objects.filter(id__in=user_ids, is_active=True).order_by("email"))
+
+
+class Notification:
+    """
+    One html email sent to many recipients.
+
+    ``context`` is shared by every message, the context passed to ``add`` is
+    merged into it for that recipient only.
+    """
+
+    def __init__(self, subject, template_name, context=None, from_email=None):
+        self.subject = subject
+        self.template_name = template_name
+        self.template = None
+        self.context = context or {}
+        self.from_email = from_email or settings.DEFAULT_FROM_EMAIL
+        self.messages = []
+        self._rendered = {}
+
+    def render(self, context):
+        try:
+            key = frozenset(context.items())
+        except TypeError:
+            key = None
+        if key is None or key not in self._rendered:
+            if self.template is None:
+                self.template = get_template(self.template_name)
+            html_content = self.template.render({**self.context, **context})
+            if key is None:
+                return html_content
+            self._rendered[key] = html_content
+        return self._rendered[key]
+
+    def add(self, email, context=None):
+        if not email:
+            return
+        msg = EmailMessage(
+            self.subject,
+            self.render(context or {}),
+            from_email=self.from_email,
+            to=[email],
+        )
+        msg.content_subtype = "html"
+        self.messages.append(msg)
+
+    def send(self):
+        """Deliver the queued messages, return the number sent."""
+        return send_messages(self.messages)
+
+
+RATE_KEY = "notifications:sent:{}"
+
+
+def wait_for_slot(rate_limit):
+    """Block until sending one more message stays under ``rate_limit``/s."""
+    window = max(1.0, 1.0 / rate_limit)
+    allowance = max(1, int(rate_limit * window))
+    while True:
+        now = time.time()
+        current = int(now // window)
+        key = RATE_KEY.format(current)
+        cache.add(key, 0, timeout=int(window) + 1)
+        try:
+            taken = cache.incr(key)
+        except ValueError:
+            # expired between add and incr
+            continue
+        if taken <= allowance:
+            return
+        time.sleep((current + 1) * window - now)
+
+
+def send_messages(messages, on_sent=None):
+    """
+    Deliver ``messages``, return the number sent. ``on_sent`` is called with
+    every message once it went out.
+    """
+    batch_size = max(settings.NOTIFICATION_BATCH_SIZE, 1)
+    rate_limit = settings.NOTIFICATION_RATE_LIMIT
+    connection = get_connection()
+    is_open = False
+    sent = 0
+    try:
+        for index, msg in enumerate(messages):
+            if is_open and index % batch_size == 0:
+                connection.close()
+                is_open = False
+            for attempt in range(settings.NOTIFICATION_MAX_RETRIES + 1):
+                if rate_limit:
+                    wait_for_slot(rate_limit)
+                try:
+                    if not is_open:
+                        connection.open()
+                        is_open = True
+                    if connection.send_messages([msg]):
+                        sent += 1
+                        if on_sent is not None:
+                            on_sent(msg)
+                    break
+                except Exception:
+                    # the connection itself may be what failed, start over
+                    connection.close()
+                    is_open = False
+                    if attempt == settings.NOTIFICATION_MAX_RETRIES:
+                        logger.exception(
+                            "Giving up on notification %r to %s", msg.subject, msg.to
+                        )
+                        break
+                    logger.warning(
+                        "Retrying notification %r to %s", msg.subject, msg.to
+                    )
+                    time.sleep(settings.NOTIFICATION_RETRY_DELAY * 2**attempt)
+    finally:
+        if is_open:
+            connection.close()
+    return sent
@@ -0,0 +1,86 @@
+"""
+Transactional outbox for the Celery tasks queued by the API.
+
+Calling ``task.delay()`` from a view publishes to the broker in the middle
+of the request, one round trip per call, before the change it is about has
+committed: a slow broker slows the request down, and a write that is
+rolled back still gets its emails sent. ``enqueue`` instead inserts an
+``OutboxMessage`` row through the connection of the request, so it commits
+or rolls back with the rows it describes, and the request never talks to
+the broker.
+
+``relay`` publishes the committed messages oldest first in batches of
+``OUTBOX_BATCH_SIZE``. It locks its batch with ``SKIP LOCKED``, so any
+number of relays can run side by side, and deletes the rows it published.
+A message the broker refuses is retried ``OUTBOX_RETRY_DELAY`` seconds
+later, up to ``OUTBOX_MAX_ATTEMPTS`` times, after which it stays in the
+table with its last error. It runs every ``OUTBOX_RELAY_INTERVAL`` seconds
+from the beat schedule, or continuously with ``manage.py relay_outbox``
+for lower latency.
+
+A message is published at least once: a relay that dies between
+publishing and committing the delete publishes the batch again, so the
+tasks must tolerate running twice, as they already had to for Celery's
+own redeliveries.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from common.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, *args, **kwargs):
+    """Queue ``task(*args, **kwargs)`` once the current transaction commits."""
+    return OutboxMessage.objects.create(task=task.name, args=args, kwargs=kwargs)
+
+
+def relay(batch_size=None):
+    """Publish one batch of due messages, return the number published."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    published = []
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=now, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+            .order_by("id")[:batch_size]
+        )
+        failed = []
+        for message in messages:
+            try:
+                import_string(message.task).apply_async(
+                    args=message.args, kwargs=message.kwargs
+                )
+            except Exception as e:
+                logger.warning("Could not publish %s: %s", message, e)
+                message.attempts += 1
+                message.last_error = str(e)
+                message.available_at = now + datetime.timedelta(
+                    seconds=settings.OUTBOX_RETRY_DELAY * message.attempts
+                )
+                failed.append(message)
+            else:
+                published.append(message.id)
+        OutboxMessage.objects.filter(id__in=published).delete()
+        if failed:
+            OutboxMessage.objects.bulk_update(
+                failed, ["attempts", "last_error", "available_at"]
+            )
+    return len(published)
+
+
+def relay_all():
+    """Publish every due message, batch by batch; return the number published."""
+    total = 0
+    while True:
+        count = relay()
+        total += count
+        if count < settings.OUTBOX_BATCH_SIZE:
+            return total
@@ -0,0 +1,113 @@
+import base64
+import json
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.settings import api_settings
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on ``(created_at, id)``.
+
+    Pages are fetched with ``WHERE (created_at, id) < (cursor)`` instead of
+    ``OFFSET``, so page N costs the same as page 1. Cursors are opaque
+    url-safe tokens; views that paginate more than one bucket pass a distinct
+    ``cursor_query_param`` per bucket.
+
+    The total is a full ``COUNT`` of the filtered rows, so it is only run for
+    ``?with_count=1`` (clients usually want it once, with the first page);
+    ``self.count`` is ``None`` otherwise.
+    """
+
+    page_size = api_settings.PAGE_SIZE or 10
+    max_page_size = 100
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    with_count_query_param = "with_count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None, cursor_query_param=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = queryset.count() if self.get_with_count(request) else None
+        self.next_cursor = None
+        self.previous_cursor = None
+
+        param = cursor_query_param or self.cursor_query_param
+        position = self.decode_cursor(request.query_params.get(param))
+        reverse = bool(position and position["reverse"])
+
+        if reverse:
+            queryset = queryset.order_by("created_at", "id")
+        else:
+            queryset = queryset.order_by("-created_at", "-id")
+        if position:
+            queryset = queryset.filter(self.get_seek_filter(position, reverse))
+
+        results = list(queryset[: self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[: self.limit]
+        if reverse:
+            results.reverse()
+
+        if results:
+            if reverse:
+                # walking backwards: the row after this page is the cursor we
+                # came from, the rows before it exist only if we over-fetched
+                self.next_cursor = self.encode_cursor(results[-1], reverse=False)
+                if has_more:
+                    self.previous_cursor = self.encode_cursor(results[0], reverse=True)
+            else:
+                if has_more:
+                    self.next_cursor = self.encode_cursor(results[-1], reverse=False)
+                if position:
+                    self.previous_cursor = self.encode_cursor(results[0], reverse=True)
+        return results
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if limit <= 0:
+            return self.page_size
+        return min(limit, self.max_page_size)
+
+    def get_with_count(self, request):
+        value = request.query_params.get(self.with_count_query_param, "")
+        return value.lower() in ("1", "true")
+
+    def get_seek_filter(self, position, reverse):
+        if reverse:
+            return Q(created_at__gt=position["created_at"]) | Q(
+                created_at=position["created_at"], id__gt=position["id"]
+            )
+        return Q(created_at__lt=position["created_at"]) | Q(
+            created_at=position["created_at"], id__lt=position["id"]
+        )
+
+    def encode_cursor(self, obj, reverse=False):
+        payload = {"c": obj.created_at.isoformat(), "i": str(obj.id), "r": int(reverse)}
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(encoded + padding))
+            created_at = parse_datetime(payload["c"])
+            if created_at is None:
+                raise ValueError
+            return {
+                "created_at": created_at,
+                "id": uuid.UUID(payload["i"]),
+                "reverse": bool(payload["r"]),
+            }
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
\ No newline at end of file
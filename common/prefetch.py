@@ -0,0 +1,155 @@
+"""
+Prefetch planner for nested read serializers.
+
+The plan of a serializer is derived from its declared fields: nested
+serializers over forward foreign keys become ``select_related`` paths and
+nested lists / many related fields become ``prefetch_related`` paths, all the
+way down. Relations a serializer reads without exposing them as fields
+(model properties, ``SerializerMethodField``) are declared on its ``Meta``::
+
+    class Meta:
+        model = Profile
+        select_related = ("user",)      # read by the user_details property
+        prefetch_related = ("teams",)
+
+A serializer opts in with ``list_serializer_class = EagerLoadingListSerializer``;
+``Serializer(page, many=True)`` then loads everything the plan names with a
+fixed number of queries, whatever the size of the page.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import QuerySet, prefetch_related_objects
+from rest_framework import serializers
+
+_plans = {}
+
+
+class PrefetchPlan:
+    def __init__(self, select_related=(), prefetch_related=()):
+        self.select_related = tuple(sorted(select_related))
+        self.prefetch_related = tuple(sorted(prefetch_related))
+
+    def __repr__(self):
+        return "<PrefetchPlan select_related={} prefetch_related={}>".format(
+            self.select_related, self.prefetch_related
+        )
+
+    def apply(self, data):
+        """Eager load a queryset (returned unevaluated) or a list of instances."""
+        if isinstance(data, QuerySet) and not data.query.is_sliced:
+            return data.select_related(*self.select_related).prefetch_related(
+                *self.prefetch_related
+            )
+        instances = list(data)
+        # a plain list cannot be joined, so every path is prefetched instead
+        prefetch_related_objects(
+            instances, *(self.select_related + self.prefetch_related)
+        )
+        return instances
+
+
+def validate_path(model, path):
+    """Follow ``path`` across relations, return the model it ends on."""
+    for name in path.split("__"):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                "Invalid prefetch path '{}': {} has no field '{}'".format(
+                    path, model.__name__, name
+                )
+            )
+        if not field.is_relation:
+            raise ImproperlyConfigured(
+                "Invalid prefetch path '{}': '{}' is not a relation".format(path, name)
+            )
+        model = field.related_model
+    return model
+
+
+def _collect(serializer, model, prefix, in_prefetch, select, prefetch):
+    meta = getattr(serializer, "Meta", None)
+    for path in getattr(meta, "select_related", ()):
+        validate_path(model, path)
+        (prefetch if in_prefetch else select).add(prefix + path)
+    for path in getattr(meta, "prefetch_related", ()):
+        validate_path(model, path)
+        prefetch.add(prefix + path)
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*" or "." in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+        path = prefix + field.source
+        if isinstance(field, serializers.ManyRelatedField):
+            prefetch.add(path)
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            nested, many = field.child, True
+        elif isinstance(field, serializers.BaseSerializer):
+            nested, many = field, model_field.many_to_many or model_field.one_to_many
+        else:
+            # primary key fields read the local column only
+            continue
+        if many or in_prefetch:
+            prefetch.add(path)
+        else:
+            select.add(path)
+        if hasattr(nested, "fields"):
+            _collect(
+                nested,
+                model_field.related_model,
+                path + "__",
+                in_prefetch or many,
+                select,
+                prefetch,
+            )
+
+
+def get_plan(serializer):
+    """The (cached) prefetch plan of a model serializer class or instance."""
+    serializer_class = serializer if isinstance(serializer, type) else type(serializer)
+    plan = _plans.get(serializer_class)
+    if plan is None:
+        if isinstance(serializer, type):
+            serializer = serializer_class()
+        select, prefetch = set(), set()
+        _collect(serializer, serializer_class.Meta.model, "", False, select, prefetch)
+        # a path that is prefetched anyway must not be joined as well
+        select = {
+            path
+            for path in select
+            if not any(path == p or path.startswith(p + "__") for p in prefetch)
+        }
+        plan = _plans[serializer_class] = PrefetchPlan(select, prefetch)
+    return plan
+
+
+def plan_queryset(queryset, serializer):
+    """Apply the plan of ``serializer`` to ``queryset``."""
+    return get_plan(serializer).apply(queryset)
+
+
+class EagerLoadingListSerializer(serializers.ListSerializer):
+    """List serializer that loads its child's prefetch plan before rendering."""
+
+    def to_representation(self, data):
+        # nested lists are loaded by the plan of the outermost serializer
+        if self.parent is None:
+            data = get_plan(self.child).apply(data)
+        return super().to_representation(data)
+
+
+def as_values(instances):
+    """Rows shaped like ``QuerySet.values()`` built from loaded instances."""
+    return [
+        {
+            field.attname: getattr(instance, field.attname)
+            for field in instance._meta.concrete_fields
+        }
+        for instance in instances
+    ]
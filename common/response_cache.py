@@ -0,0 +1,152 @@
+"""
+Per-org cache of GET responses.
+
+A cached view names the record types its response is built from; the key
+of a response combines the org, who is asking (admins of an org all see the
+same lists, anyone else only their own records), the request path and query
+parameters, and the current generation stamp of each of those types. The
+signal handlers in ``common.signals`` bump the stamps whenever a row or an
+m2m link of the type changes, which retires every response built from the
+old data at once. A hit is served from the cache alone: together with the
+cached request authentication it never reaches the database.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from common.cache_utils import bump_generation, get_generations
+
+# model label -> namespace of the responses built from its rows
+NAMESPACES = {
+    "leads.Lead": "leads",
+    "leads.Company": "companies",
+    "accounts.Account": "accounts",
+    "accounts.Tags": "tags",
+    "contacts.Contact": "contacts",
+    "opportunity.Opportunity": "opportunities",
+    "cases.Case": "cases",
+    "tasks.Task": "tasks",
+    "events.Event": "events",
+    "teams.Teams": "teams",
+    "common.Document": "documents",
+    "common.Profile": "profiles",
+    "common.Comment": "comments",
+    "common.Attachments": "attachments",
+    "invoices.Invoice": "invoices",
+}
+# tags are shared by every org
+GLOBAL_NAMESPACES = {"tags"}
+ALL = tuple(sorted(set(NAMESPACES.values())))
+
+STATS_KEY = "response_cache:stats:{}:{}"
+_views = set()
+
+
+def _namespace_key(namespace):
+    return "response:{}".format(namespace)
+
+
+def invalidate(org_id, *namespaces):
+    """Retire the cached responses of ``org_id`` built from ``namespaces``."""
+    for namespace in namespaces or ALL:
+        bump_generation(
+            _namespace_key(namespace),
+            None if namespace in GLOBAL_NAMESPACES else org_id,
+        )
+
+
+def _generations(namespaces, org_id):
+    org_scoped = [n for n in namespaces if n not in GLOBAL_NAMESPACES]
+    shared = [n for n in namespaces if n in GLOBAL_NAMESPACES]
+    generations = {}
+    for names, scope in ((org_scoped, org_id), (shared, None)):
+        if names:
+            found = get_generations([_namespace_key(n) for n in names], scope)
+            generations.update(found)
+    return [generations[_namespace_key(n)] for n in namespaces]
+
+
+def cache_key(request, view_name, namespaces, shared_by_admins):
+    profile = request.profile
+    # only the ADMIN role sees the whole org in every list view; superusers
+    # and organization admins do in some of them, so they cache on their own
+    if shared_by_admins and profile.role == "ADMIN":
+        audience = "admin"
+    else:
+        audience = "profile:{}".format(profile.id)
+    query = sorted(request.GET.lists())
+    digest = hashlib.md5(
+        "{}?{}:{}".format(
+            request.path, query, _generations(namespaces, profile.org_id)
+        ).encode("utf-8")
+    ).hexdigest()
+    return "response:{}:{}:{}:{}".format(view_name, profile.org_id, audience, digest)
+
+
+def _record(view_name, outcome):
+    key = STATS_KEY.format(view_name, outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def cache_response(*namespaces, shared_by_admins=True):
+    """
+    Cache the successful responses of an APIView ``get``. ``namespaces`` are
+    the record types the response is built from; pass ``shared_by_admins=False``
+    when the response depends on the requesting profile even for admins.
+    """
+
+    def decorator(get):
+        view_name = get.__qualname__.split(".")[0]
+        _views.add(view_name)
+
+        @functools.wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            profile = getattr(request, "profile", None)
+            if profile is None or not settings.RESPONSE_CACHE_TIMEOUT:
+                return get(self, request, *args, **kwargs)
+            key = cache_key(request, view_name, namespaces, shared_by_admins)
+            content = cache.get(key)
+            if content is not None:
+                _record(view_name, "hit")
+                response = HttpResponse(content, content_type="application/json")
+                response["X-Cache"] = "HIT"
+                return response
+            _record(view_name, "miss")
+            response = get(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(
+                    key,
+                    JSONRenderer().render(response.data),
+                    settings.RESPONSE_CACHE_TIMEOUT,
+                )
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def get_stats():
+    """Hits and misses per cached view since the counters were last evicted."""
+    keys = {
+        STATS_KEY.format(view_name, outcome): (view_name, outcome)
+        for view_name in _views
+        for outcome in ("hit", "miss")
+    }
+    found = cache.get_many(list(keys))
+    stats = {}
+    for key, (view_name, outcome) in keys.items():
+        stats.setdefault(view_name, {"hit": 0, "miss": 0})[outcome] = found.get(key, 0)
+    for counts in stats.values():
+        total = counts["hit"] + counts["miss"]
+        counts["hit_ratio"] = round(counts["hit"] / total, 4) if total else None
+    return stats
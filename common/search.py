@@ -0,0 +1,216 @@
+"""
+Full-text search over leads, contacts, accounts and opportunities.
+
+Every searchable table carries a weighted ``search_vector`` column that a
+PostgreSQL trigger keeps in sync on INSERT/UPDATE (so ``bulk_create`` and
+``QuerySet.update`` are covered too), indexed with GIN. The columns the list
+views filter with ``icontains`` get trigram GIN indexes on ``UPPER(column)``,
+which is the expression Django compiles ``icontains`` to on PostgreSQL.
+"""
+import re
+
+from django.apps import apps
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.migrations.operations.base import Operation
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+
+from common.export import is_org_admin
+
+SEARCH_CONFIG = "simple"
+
+
+def search_vector_index(table):
+    return GinIndex(fields=["search_vector"], name="{}_search_gin".format(table))
+
+
+def trigram_index(table, field):
+    return GinIndex(
+        OpClass(Upper(field), name="gin_trgm_ops"),
+        name="{}_{}_trgm".format(table, field),
+    )
+
+
+class CreateSearchTrigger(Operation):
+    """
+    Install the trigger maintaining ``table.search_vector`` from ``weights``
+    (a mapping of weight letter to columns) and backfill existing rows.
+    A no-op on databases other than PostgreSQL.
+    """
+
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, table, weights):
+        self.table = table
+        self.weights = weights
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _names(self, schema_editor):
+        qn = schema_editor.quote_name
+        return (
+            qn(self.table),
+            qn("{}_search_vector_update".format(self.table)),
+            qn("{}_search_vector_trigger".format(self.table)),
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        qn = schema_editor.quote_name
+        table, function, trigger = self._names(schema_editor)
+        vector = " || ".join(
+            "setweight(to_tsvector('{config}', {columns}), '{weight}')".format(
+                config=SEARCH_CONFIG,
+                columns=" || ' ' || ".join(
+                    "coalesce(NEW.{}::text, '')".format(qn(column)) for column in columns
+                ),
+                weight=weight,
+            )
+            for weight, columns in sorted(self.weights.items())
+        )
+        schema_editor.execute(
+            "CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$ "
+            "BEGIN NEW.search_vector := {vector}; RETURN NEW; END "
+            "$$ LANGUAGE plpgsql".format(function=function, vector=vector)
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER {trigger} BEFORE INSERT OR UPDATE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION {function}()".format(
+                trigger=trigger, table=table, function=function
+            )
+        )
+        schema_editor.execute("UPDATE {} SET search_vector = NULL".format(table))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        table, function, trigger = self._names(schema_editor)
+        schema_editor.execute("DROP TRIGGER IF EXISTS {} ON {}".format(trigger, table))
+        schema_editor.execute("DROP FUNCTION IF EXISTS {}()".format(function))
+
+    def describe(self):
+        return "Create search vector trigger on {}".format(self.table)
+
+    def deconstruct(self):
+        return (
+            self.__class__.__qualname__,
+            [],
+            {"table": self.table, "weights": self.weights},
+        )
+
+
+def parse_query(text):
+    """
+    A prefix-matching tsquery for free text: every word must match the
+    start of a lexeme, so "jo smi" finds "John Smith".
+    """
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return None
+    return SearchQuery(
+        " & ".join("{}:*".format(term) for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+
+
+class SearchEntity:
+    """``admin`` is the admin check of the entity's list view, see ``is_org_admin``."""
+
+    def __init__(
+        self,
+        name,
+        model,
+        label_fields,
+        substring_fields,
+        queryset=None,
+        admin="profile",
+    ):
+        self.name = name
+        self.model = model
+        self.label_fields = label_fields
+        self.substring_fields = substring_fields
+        self.queryset = queryset
+        self.admin = admin
+
+    def get_queryset(self, profile, user):
+        model = apps.get_model(self.model)
+        queryset = model.objects.filter(org=profile.org)
+        if self.queryset:
+            queryset = self.queryset(queryset)
+        if not is_org_admin(profile, user, self.admin):
+            queryset = queryset.filter(
+                Q(assigned_to=profile) | Q(created_by=user)
+            ).distinct()
+        return queryset
+
+    def search(self, text, query, profile, user, limit):
+        # the full-text match covers whole words and prefixes, the substring
+        # match (trigram indexed) anything in the middle of a name
+        match = Q(search_vector=query)
+        for field in self.substring_fields:
+            match |= Q(**{"{}__icontains".format(field): text})
+        rows = (
+            self.get_queryset(profile, user)
+            .filter(match)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at")
+            .values("id", "rank", "created_at", *self.label_fields)[:limit]
+        )
+        return [
+            {
+                "type": self.name,
+                "id": row["id"],
+                "label": " ".join(
+                    str(row[field]) for field in self.label_fields if row[field]
+                ),
+                "rank": row["rank"],
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ]
+
+
+SEARCH_ENTITIES = {
+    entity.name: entity
+    for entity in (
+        SearchEntity(
+            "leads",
+            "leads.Lead",
+            ("title", "first_name", "last_name"),
+            ("title", "first_name", "last_name", "email"),
+            lambda queryset: queryset.exclude(status="converted"),
+            admin="superuser",
+        ),
+        SearchEntity(
+            "contacts",
+            "contacts.Contact",
+            ("first_name", "last_name"),
+            ("first_name", "last_name", "primary_email"),
+        ),
+        SearchEntity("accounts", "accounts.Account", ("name",), ("name",)),
+        SearchEntity(
+            "opportunities",
+            "opportunity.Opportunity",
+            ("name",),
+            ("name",),
+            admin="superuser",
+        ),
+    )
+}
+
+
+def search(text, profile, user, types=None, limit=20):
+    """Search the given entity types and merge the hits by rank."""
+    query = parse_query(text)
+    if query is None:
+        return []
+    results = []
+    for name in types or SEARCH_ENTITIES:
+        results.extend(SEARCH_ENTITIES[name].search(text, query, profile, user, limit))
+    results.sort(key=lambda hit: (hit["rank"], hit["created_at"]), reverse=True)
+    return results[:limit]
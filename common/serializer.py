@@ -1,5 +1,6 @@
 import re
 
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import check_password
 from django.contrib.auth.tokens import default_token_generator
@@ -13,10 +14,13 @@ from common.models import (
     Attachments,
     Comment,
     Document,
+    ExportJob,
     Org,
     Profile,
     User,
 )
+from common.export import download_url
+from common.prefetch import EagerLoadingListSerializer, as_values
 
 
 class OrganizationSerializer(serializers.ModelSerializer):
@@ -188,6 +192,9 @@ class ProfileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Profile
+        list_serializer_class = EagerLoadingListSerializer
+        # read by the user_details property
+        select_related = ("user",)
         fields = (
             "id",
             "user_details",
@@ -221,10 +228,12 @@ class DocumentSerializer(serializers.ModelSerializer):
     org = OrganizationSerializer()
 
     def get_teams(self, obj):
-        return obj.teams.all().values()
+        return as_values(obj.teams.all())
 
     class Meta:
         model = Document
+        list_serializer_class = EagerLoadingListSerializer
+        prefetch_related = ("teams",)
         fields = [
             "id",
             "title",
@@ -305,10 +314,12 @@ class APISettingsListSerializer(serializers.ModelSerializer):
     org = OrganizationSerializer()
 
     def get_tags(self, obj):
-        return obj.tags.all().values()
+        return as_values(obj.tags.all())
 
     class Meta:
         model = APISettings
+        list_serializer_class = EagerLoadingListSerializer
+        prefetch_related = ("tags",)
         fields = [
             "title",
             "apikey",
@@ -377,3 +388,50 @@ class UserUpdateStatusSwaggerSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices = STATUS_CHOICES,required=True)
 
 
+class ExportJobSerializer(serializers.ModelSerializer):
+    files = serializers.SerializerMethodField()
+
+    def get_files(self, obj):
+        # signed links are only handed out once every part is written
+        if obj.status != "completed":
+            return []
+        request = self.context["request"]
+        return [download_url(request, obj, part) for part in range(len(obj.files))]
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            "id",
+            "entity",
+            "output",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "progress",
+            "files",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+
+
+class ExportJobCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExportJob
+        fields = ("entity", "output")
+
+
+class BulkWriteSwaggerSerializer(serializers.Serializer):
+    records = serializers.ListField(child=serializers.DictField())
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+    def validate_ids(self, ids):
+        if len(ids) > settings.BULK_MAX_RECORDS:
+            raise serializers.ValidationError(
+                "At most {} ids per request".format(settings.BULK_MAX_RECORDS)
+            )
+        return ids
@@ -0,0 +1,162 @@
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Account, Tags
+from common import auth_cache, dashboard, response_cache
+from common.cache_utils import bump_generation
+from common.models import Org, Profile, User
+from contacts.models import Contact
+from leads.models import Company, Lead
+from opportunity.models import Opportunity
+
+
+@receiver([post_save, post_delete], sender=Contact)
+def contact_lookup_changed(sender, instance, **kwargs):
+    bump_generation("lookup:contacts", instance.org_id)
+
+
+@receiver([post_save, post_delete], sender=Company)
+def company_lookup_changed(sender, instance, **kwargs):
+    bump_generation("lookup:companies", instance.org_id)
+
+
+@receiver([post_save, post_delete], sender=Tags)
+def tags_lookup_changed(sender, instance, **kwargs):
+    bump_generation("lookup:tags")
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def profile_lookup_changed(sender, instance, **kwargs):
+    bump_generation("lookup:users", instance.org_id)
+
+
+@receiver(post_save, sender=User)
+def user_lookup_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    for org_id in Profile.objects.filter(user=instance).values_list("org_id", flat=True):
+        bump_generation("lookup:users", org_id)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def profile_auth_changed(sender, instance, **kwargs):
+    keys = [auth_cache.profile_cache_key(instance.user_id, instance.org_id)]
+    api_key = Org.objects.filter(id=instance.org_id).values_list("api_key", flat=True).first()
+    if api_key:
+        keys.append(auth_cache.api_key_cache_key(api_key))
+    auth_cache.invalidate(keys)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_auth_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    keys = [auth_cache.user_cache_key(instance.id)]
+    for profile in Profile.objects.filter(user=instance).select_related("org"):
+        keys.append(auth_cache.profile_cache_key(instance.id, profile.org_id))
+        if profile.org.api_key:
+            keys.append(auth_cache.api_key_cache_key(profile.org.api_key))
+    auth_cache.invalidate(keys)
+
+
+@receiver(pre_save, sender=Org)
+def org_api_key_changing(sender, instance, **kwargs):
+    # the entry cached under the previous key has to go as well
+    if instance._state.adding:
+        return
+    old_key = Org.objects.filter(id=instance.id).values_list("api_key", flat=True).first()
+    if old_key and old_key != instance.api_key:
+        auth_cache.invalidate([auth_cache.api_key_cache_key(old_key)])
+
+
+@receiver([post_save, post_delete], sender=Org)
+def org_auth_changed(sender, instance, **kwargs):
+    keys = [
+        auth_cache.profile_cache_key(user_id, instance.id)
+        for user_id in Profile.objects.filter(org=instance).values_list("user_id", flat=True)
+    ]
+    if instance.api_key:
+        keys.append(auth_cache.api_key_cache_key(instance.api_key))
+    auth_cache.invalidate(keys)
+
+
+def dashboard_record_changed(sender, instance, **kwargs):
+    dashboard.mark_stale(instance.org_id)
+
+
+def dashboard_assignees_changed(sender, instance, action, **kwargs):
+    # assignment decides what non-admin dashboards show
+    if action.startswith("post_"):
+        dashboard.mark_stale(instance.org_id)
+
+
+for model in (Account, Contact, Lead, Opportunity):
+    post_save.connect(dashboard_record_changed, sender=model)
+    post_delete.connect(dashboard_record_changed, sender=model)
+    m2m_changed.connect(dashboard_assignees_changed, sender=model.assigned_to.through)
+
+
+def _record_org_id(instance):
+    org_id = getattr(instance, "org_id", None)
+    if org_id is None:
+        # comments and attachments belong to the org of the record they are on
+        for field in (
+            "lead",
+            "account",
+            "contact",
+            "opportunity",
+            "case",
+            "task",
+            "invoice",
+            "event",
+        ):
+            if getattr(instance, "{}_id".format(field), None):
+                org_id = getattr(instance, field).org_id
+                break
+    return org_id
+
+
+def response_record_changed(sender, instance, **kwargs):
+    response_cache.invalidate(
+        _record_org_id(instance), response_cache.NAMESPACES[sender._meta.label]
+    )
+
+
+def response_relations_changed(sender, instance, action, model, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    through_owner = response_relations_changed.owners[sender]
+    namespace = response_cache.NAMESPACES[through_owner._meta.label]
+    if isinstance(instance, through_owner):
+        org_ids = {_record_org_id(instance)}
+    elif pk_set:
+        # changed from the other side (e.g. tag.accounts.add), the records
+        # changed are the ones in pk_set
+        org_ids = set(
+            model.objects.filter(pk__in=pk_set).values_list("org_id", flat=True)
+        )
+    else:
+        org_ids = {getattr(instance, "org_id", None)}
+    for org_id in org_ids:
+        response_cache.invalidate(org_id, namespace)
+
+
+response_relations_changed.owners = {}
+for label in response_cache.NAMESPACES:
+    model = apps.get_model(label)
+    post_save.connect(response_record_changed, sender=model)
+    post_delete.connect(response_record_changed, sender=model)
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        response_relations_changed.owners[through] = model
+        m2m_changed.connect(response_relations_changed, sender=through)
+
+
+@receiver(post_save, sender=User)
+def user_responses_changed(sender, instance, created, update_fields=None, **kwargs):
+    # users are rendered inside the profiles of every org they belong to
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    for org_id in Profile.objects.filter(user=instance).values_list("org_id", flat=True):
+        response_cache.invalidate(org_id, "profiles")
@@ -21,6 +21,29 @@ user_list_params = [
         OpenApiParameter.QUERY,
         enum=["Active", "In Active"],
     ),
+    OpenApiParameter("active_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("inactive_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+]
+
+search_params = [
+    organization_params_in_header,
+    OpenApiParameter("q", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True),
+    OpenApiParameter(
+        "types",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="Comma separated: leads, contacts, accounts, opportunities",
+    ),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+]
+
+export_params = [
+    organization_params_in_header,
+    OpenApiParameter(
+        "output", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["csv", "ndjson"]
+    ),
 ]
 
 document_get_params = [
@@ -33,5 +56,9 @@ document_get_params = [
         enum=["Active", "In Active"],
     ),
     OpenApiParameter("shared_to", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("active_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("inactive_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
 
@@ -0,0 +1,83 @@
+"""
+Resolution of tag names to ``Tags`` rows.
+
+Tags are shared by every org and identified by the slug of their name, so
+"Hot Lead" and "hot lead" are the same tag. ``get_tag_ids`` resolves any
+number of names with one ``IN`` query for the slugs this process has not
+seen yet and one ``bulk_create(ignore_conflicts=True)`` for the tags that do
+not exist, which is safe when two requests create the same tag at once.
+
+Known slug -> id pairs are kept in a per-process LRU of ``TAG_CACHE_SIZE``
+entries, stamped with the ``lookup:tags`` generation: the signal handlers in
+``common.signals`` bump it whenever a tag is saved or deleted, which retires
+the entries of every process at once.
+"""
+from django.conf import settings
+from django.utils.text import slugify
+
+from accounts.models import Tags
+from common import response_cache
+from common.auth_cache import LocalLRUCache
+from common.cache_utils import bump_generation, get_generation
+from common.m2m import sync_m2m
+
+local_cache = LocalLRUCache(settings.TAG_CACHE_SIZE, settings.TAG_CACHE_TTL)
+
+NAME_LENGTH = Tags._meta.get_field("name").max_length
+
+
+def _slugs(names):
+    slugs = {}
+    for name in names:
+        slug = slugify(str(name).strip()[:NAME_LENGTH])
+        if slug:
+            slugs.setdefault(name, slug)
+    return slugs
+
+
+def _created():
+    # bulk_create sends no post_save, see common.signals.tags_lookup_changed
+    bump_generation("lookup:tags")
+    response_cache.invalidate(None, "tags")
+
+
+def get_tag_ids(names):
+    """Map every name of ``names`` to the id of its tag, creating missing tags."""
+    slugs = _slugs(names)
+    generation = get_generation("lookup:tags")
+    ids = {}
+    missing = {}
+    for name, slug in slugs.items():
+        pk = local_cache.get((generation, slug))
+        if pk is None:
+            missing.setdefault(slug, name)
+        else:
+            ids[slug] = pk
+    if missing:
+        found = dict(Tags.objects.filter(slug__in=missing).values_list("slug", "id"))
+        new = [
+            Tags(name=str(name).strip()[:NAME_LENGTH], slug=slug)
+            for slug, name in missing.items()
+            if slug not in found
+        ]
+        if new:
+            Tags.objects.bulk_create(new, ignore_conflicts=True)
+            # a concurrent request may have created some of them first
+            found = dict(
+                Tags.objects.filter(slug__in=missing).values_list("slug", "id")
+            )
+            _created()
+            generation = get_generation("lookup:tags")
+        for slug, pk in found.items():
+            local_cache.set((generation, slug), pk)
+        ids.update(found)
+    return {name: ids[slug] for name, slug in slugs.items() if slug in ids}
+
+
+def set_tags(instance, names, clear=False):
+    """Add the tags named ``names`` to ``instance``, replacing its tags if ``clear``."""
+    tag_ids = list(dict.fromkeys(get_tag_ids(names or []).values()))
+    if clear:
+        sync_m2m(instance, "tags", tag_ids)
+    elif tag_ids:
+        instance.tags.add(*tag_ids)
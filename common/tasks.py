@@ -269,3 +269,88 @@ def send_email_to_reset_password(user_email):
         )
         msg.content_subtype = "html"
         msg.send()
+
+
+@app.task
+def refresh_dashboards(org_id):
+    """Rebuild the stale dashboard snapshots of an org"""
+    from common.dashboard import refresh_org
+
+    return refresh_org(org_id)
+
+
+@app.task
+def refresh_stale_dashboards():
+    """Periodic sweep for snapshots a signal-triggered refresh did not reach"""
+    from common.dashboard import refresh_org
+    from common.models import DashboardSnapshot
+
+    max_age = timezone.now() - datetime.timedelta(seconds=settings.DASHBOARD_MAX_AGE)
+    DashboardSnapshot.objects.filter(refreshed_at__lt=max_age, is_stale=False).update(
+        is_stale=True
+    )
+    org_ids = set(
+        DashboardSnapshot.objects.filter(is_stale=True).values_list("org_id", flat=True)
+    )
+    return sum(refresh_org(org_id) for org_id in org_ids)
+
+
+@app.task
+def run_export(job_id):
+    """Write the files of an ExportJob, recording its progress as it goes."""
+    from common.export import EXPORT_ENTITIES, write_export
+    from common.models import ExportJob
+
+    job = ExportJob.objects.select_related("org", "profile__user").get(id=job_id)
+    jobs = ExportJob.objects.filter(id=job.id)
+    try:
+        if job.profile is None:
+            raise ValueError("The profile of the export was deleted")
+        entity = EXPORT_ENTITIES[job.entity]
+        jobs.update(
+            status="processing",
+            started_at=timezone.now(),
+            total_rows=entity.get_queryset(job.profile, job.profile.user).count(),
+        )
+        files, processed = write_export(
+            job, lambda processed: jobs.update(processed_rows=processed)
+        )
+    except Exception as e:
+        jobs.update(status="failed", error=str(e), finished_at=timezone.now())
+        raise
+    jobs.update(
+        status="completed",
+        files=files,
+        processed_rows=processed,
+        finished_at=timezone.now(),
+    )
+
+
+@app.task
+def delete_expired_exports():
+    """Drop the export jobs older than EXPORT_RETENTION along with their files."""
+    from common.export import delete_export_files
+    from common.models import ExportJob
+
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.EXPORT_RETENTION)
+    jobs = list(ExportJob.objects.filter(created_at__lt=cutoff))
+    for job in jobs:
+        delete_export_files(job)
+    ExportJob.objects.filter(id__in=[job.id for job in jobs]).delete()
+    return len(jobs)
+
+
+@app.task
+def send_bulk_assignment_emails(entity, assigned):
+    """Notify the new assignees of a whole bulk write over one connection"""
+    from common.bulk import BULK_ENTITIES
+
+    return BULK_ENTITIES[entity].notify(assigned)
+
+
+@app.task
+def relay_outbox():
+    """Publish the tasks waiting in the outbox, see common/outbox.py"""
+    from common.outbox import relay_all
+
+    return relay_all()
@@ -0,0 +1,39 @@
+"""
+Fixtures shared by the API tests: profiles, clients authenticated as them
+and an org with an admin and a user.
+"""
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.models import Org, Profile, User
+
+
+def create_profile(org, email, role="USER"):
+    return Profile.objects.create(
+        user=User.objects.create(email=email), org=org, role=role
+    )
+
+
+def api_client(profile):
+    """An ``APIClient`` sending the JWT of ``profile`` and its org header."""
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION="Bearer {}".format(AccessToken.for_user(profile.user)),
+        HTTP_ORG=str(profile.org_id),
+    )
+    return client
+
+
+class OrgTestMixin:
+    """``self.org`` with an ADMIN (``self.admin``) and a USER (``self.user``)."""
+
+    org_name = "test org"
+
+    def setUp(self):
+        super().setUp()
+        self.org = Org.objects.create(name=self.org_name)
+        self.admin = create_profile(self.org, "admin@example.com", "ADMIN")
+        self.user = create_profile(self.org, "user@example.com")
+
+    def client_for(self, profile):
+        return api_client(profile)
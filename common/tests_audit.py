@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+from common.audit import acting_user
+from common.models import Org, User
+from leads.models import Lead
+
+
+class BulkAuditTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="audit")
+        self.user = User.objects.create(email="audit@example.com")
+        self.other = User.objects.create(email="other@example.com")
+
+    def test_bulk_create_is_stamped(self):
+        with acting_user(self.user):
+            Lead.objects.bulk_create(
+                [
+                    Lead(title="stamped", org=self.org),
+                    Lead(title="explicit", org=self.org, created_by=self.other),
+                ]
+            )
+        stamped = Lead.objects.get(title="stamped")
+        explicit = Lead.objects.get(title="explicit")
+        self.assertEqual(stamped.created_by, self.user)
+        self.assertEqual(stamped.updated_by, self.user)
+        self.assertEqual(explicit.created_by, self.other)
+
+    def test_updates_are_stamped(self):
+        lead = Lead.objects.create(title="lead", org=self.org)
+        self.assertIsNone(lead.created_by)
+        created = lead.updated_at
+
+        with acting_user(self.user):
+            Lead.objects.filter(id=lead.id).update(status="closed")
+        lead.refresh_from_db()
+        self.assertEqual(lead.updated_by, self.user)
+        self.assertGreater(lead.updated_at, created)
+
+        lead.title = "renamed"
+        with acting_user(self.other):
+            Lead.objects.bulk_update([lead], ["title"])
+        lead.refresh_from_db()
+        self.assertEqual(lead.title, "renamed")
+        self.assertEqual(lead.updated_by, self.other)
+        self.assertIsNone(lead.created_by)
+
+    def test_save_uses_the_acting_user(self):
+        with acting_user(self.user):
+            lead = Lead.objects.create(title="lead", org=self.org)
+        with acting_user(self.other):
+            lead.save()
+        lead.refresh_from_db()
+        self.assertEqual(lead.created_by, self.user)
+        self.assertEqual(lead.updated_by, self.other)
+
+        # outside of a request or an acting_user block nothing is overwritten
+        lead.save()
+        lead.refresh_from_db()
+        self.assertEqual(lead.updated_by, self.other)
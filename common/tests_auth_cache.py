@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common import auth_cache
+from common.auth_cache import resolve_request
+from common.models import Org
+from common.testing import OrgTestMixin
+
+
+class AuthCacheTest(OrgTestMixin, TestCase):
+    org_name = "auth"
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        auth_cache.local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(auth_cache.local_cache.clear)
+        self.org.api_key = "first-key"
+        self.org.save()
+        # minted up front, the tests deactivate users that still hold one
+        self.tokens = {
+            profile.user_id: str(AccessToken.for_user(profile.user))
+            for profile in (self.admin, self.user)
+        }
+
+    def resolve(self, profile=None, org=True, api_key=None):
+        headers = {}
+        if api_key:
+            headers["HTTP_TOKEN"] = api_key
+        else:
+            profile = profile or self.user
+            token = self.tokens[profile.user_id]
+            headers["HTTP_AUTHORIZATION"] = "Bearer {}".format(token)
+            if org:
+                headers["HTTP_ORG"] = str(profile.org_id)
+        return resolve_request(RequestFactory().get("/", **headers))
+
+    def test_resolutions_are_cached(self):
+        self.resolve()
+        self.resolve(org=False)
+        self.resolve(api_key="first-key")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolve().profile.id, self.user.id)
+            self.assertEqual(self.resolve(org=False).user.id, self.user.user_id)
+            profile = self.resolve(api_key="first-key").profile
+            self.assertEqual(profile.id, self.admin.id)
+
+    def test_profile_change_is_picked_up(self):
+        self.assertEqual(self.resolve().profile.role, "USER")
+        self.user.role = "ADMIN"
+        self.user.save()
+        self.assertEqual(self.resolve().profile.role, "ADMIN")
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(ValueError):
+            self.resolve()
+
+    def test_deleted_profile_is_rejected(self):
+        self.resolve()
+        self.user.delete()
+        with self.assertRaises(ValueError):
+            self.resolve()
+
+    def test_user_change_is_picked_up(self):
+        self.assertTrue(self.resolve(org=False).user.is_active)
+        self.assertTrue(self.resolve().profile.user.is_active)
+        self.resolve(api_key="first-key")
+
+        user = self.user.user
+        user.is_active = False
+        user.save()
+        self.assertFalse(self.resolve(org=False).user.is_active)
+        self.assertFalse(self.resolve().profile.user.is_active)
+
+        admin = self.admin.user
+        admin.email = "renamed@example.com"
+        admin.save()
+        self.assertEqual(
+            self.resolve(api_key="first-key").user.email, "renamed@example.com"
+        )
+
+    def test_last_login_does_not_invalidate(self):
+        self.resolve()
+        user = self.user.user
+        user.save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            self.resolve()
+
+    def test_rotated_api_key_is_rejected(self):
+        self.assertEqual(self.resolve(api_key="first-key").profile.id, self.admin.id)
+        self.org.api_key = "second-key"
+        self.org.save()
+        with self.assertRaises(ValueError):
+            self.resolve(api_key="first-key")
+        self.assertEqual(self.resolve(api_key="second-key").profile.id, self.admin.id)
+
+    def test_api_key_follows_the_admin_profile(self):
+        self.resolve(api_key="first-key")
+        self.admin.role = "USER"
+        self.admin.save()
+        with self.assertRaises(ValueError):
+            self.resolve(api_key="first-key")
+
+    def test_org_change_is_picked_up(self):
+        self.assertEqual(self.resolve().profile.org.name, "auth")
+        org = Org.objects.get(id=self.org.id)
+        org.name = "renamed"
+        org.save()
+        self.assertEqual(self.resolve().profile.org.name, "renamed")
+
+        self.resolve(api_key="first-key")
+        org.delete()
+        with self.assertRaises(ValueError):
+            self.resolve(api_key="first-key")
+
+    def test_deactivated_profile_is_denied_by_the_api(self):
+        client = self.client_for(self.user)
+        self.assertEqual(client.get("/api/lookups/lead_status/").status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get("/api/lookups/lead_status/").status_code, 403)
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from common.models import Org, Profile
+from leads.models import Lead
+from teams.models import Teams
+
+
+@override_settings(METRICS_ENABLED=False)
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def seed(self):
+        call_command(
+            "seed_org",
+            name="bench",
+            users=4,
+            teams=2,
+            team_size=3,
+            contacts=6,
+            accounts=3,
+            leads=12,
+            opportunities=2,
+            cases=2,
+            tasks=2,
+            events=2,
+            batch_size=5,
+            stdout=StringIO(),
+        )
+        return Org.objects.get(name="bench")
+
+    def benchmark(self, org, **options):
+        call_command(
+            "benchmark_api", str(org.id), repeat=2, warmup=0, import_rows=5,
+            stdout=StringIO(), **options
+        )
+
+    def test_seed_org(self):
+        org = self.seed()
+        self.assertEqual(Profile.objects.filter(org=org).count(), 4)
+        self.assertEqual(Profile.objects.filter(org=org, role="ADMIN").count(), 1)
+        self.assertEqual(Lead.objects.filter(org=org).count(), 12)
+        lead = Lead.objects.filter(org=org).first()
+        self.assertEqual(lead.assigned_to.count(), 2)
+        self.assertEqual(lead.teams.count(), 1)
+        self.assertEqual(lead.contacts.count(), 1)
+        self.assertIsNotNone(lead.created_by)
+        self.assertEqual(Teams.objects.get(org=org, name="team 0").users.count(), 3)
+
+    def test_benchmark_writes_results_and_compares_to_baseline(self):
+        org = self.seed()
+        output = os.path.join(self.dir, "results.json")
+        self.benchmark(org, output=output)
+        with open(output) as f:
+            report = json.load(f)
+        self.assertEqual(report["rows"]["leads.Lead"], 12)
+        results = report["results"]
+        self.assertIn("lead_detail", results)
+        self.assertIn("dashboard", results)
+        # no documents were seeded
+        self.assertNotIn("document_detail", results)
+        self.assertGreater(results["leads"]["queries"], 0)
+        self.assertGreaterEqual(results["leads"]["p95_ms"], results["leads"]["p50_ms"])
+        # the writes are rolled back
+        self.assertEqual(Lead.objects.filter(org=org).count(), 12)
+
+        report["results"]["leads"]["queries"] -= 1
+        baseline = os.path.join(self.dir, "baseline.json")
+        with open(baseline, "w") as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(CommandError, "1 regressions: leads"):
+            self.benchmark(org, baseline=baseline, only="leads,lead_detail", threshold=1e6)
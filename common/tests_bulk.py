@@ -0,0 +1,185 @@
+from django.core import mail
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.models import Tags
+from common import tasks
+from common.bulk import BULK_ENTITIES
+from common.outbox import relay_all
+from common.testing import OrgTestMixin, create_profile
+from contacts.models import Contact
+from leads.models import Lead
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    NOTIFICATION_RATE_LIMIT=0,
+    BULK_MAX_RECORDS=50,
+)
+class BulkTest(OrgTestMixin, TestCase):
+    org_name = "bulk"
+
+    def setUp(self):
+        super().setUp()
+        self.contact = Contact.objects.create(
+            first_name="first",
+            last_name="contact",
+            primary_email="contact@example.com",
+            org=self.org,
+        )
+        Tags.objects.create(name="hot")
+        tasks.app.conf.task_always_eager = True
+        self.addCleanup(setattr, tasks.app.conf, "task_always_eager", False)
+
+    def records(self, count, start=0):
+        return [
+            {
+                "title": "lead {}".format(i),
+                "probability": 10,
+                "tags": ["hot", "new {}".format(i % 2)],
+                "contacts": [str(self.contact.id)],
+                "assigned_to": [str(self.user.id)],
+            }
+            for i in range(start, start + count)
+        ]
+
+    def create(self, records, profile=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(profile or self.admin).post(
+                "/api/leads/bulk/", {"records": records}, format="json"
+            )
+        relay_all()
+        return response, len(queries)
+
+    def test_create_is_set_based(self):
+        response, _ = self.create(self.records(2))
+        self.assertEqual(response.status_code, 200, response.json())
+        response, small = self.create(self.records(2, start=2))
+        response, large = self.create(self.records(20, start=4))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(large, small)
+
+        leads = Lead.objects.filter(org=self.org)
+        self.assertEqual(leads.count(), 24)
+        self.assertEqual(
+            sorted(Tags.objects.values_list("slug", flat=True)),
+            ["hot", "new-0", "new-1"],
+        )
+        lead = leads.get(title="lead 3")
+        self.assertEqual(lead.created_by, self.admin.user)
+        self.assertEqual(list(lead.assigned_to.all()), [self.user])
+        self.assertEqual(list(lead.contacts.all()), [self.contact])
+        self.assertEqual(lead.tags.count(), 2)
+        # one notification per assigned lead, sent by one task per batch
+        self.assertEqual(len(mail.outbox), 24)
+
+    def test_invalid_batch_writes_nothing(self):
+        Lead.objects.create(title="Lead 1", org=self.org)
+        records = self.records(3)
+        records[2]["title"] = "LEAD 0"
+        response, _ = self.create(records)
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual(sorted(errors), ["1", "2"])
+        self.assertIn("title", errors["1"])
+        self.assertIn("title", errors["2"])
+        self.assertEqual(Lead.objects.filter(org=self.org).count(), 1)
+
+        response, _ = self.create(self.records(51))
+        self.assertEqual(response.status_code, 400)
+
+    def test_update_replaces_links_and_notifies_new_assignees(self):
+        response, _ = self.create(self.records(2))
+        ids = response.json()["ids"]
+        mail.outbox = []
+
+        response = self.client_for(self.user).patch(
+            "/api/leads/bulk/",
+            {
+                "records": [
+                    {
+                        "id": ids[0],
+                        "city": "Hyderabad",
+                        "assigned_to": [str(self.user.id), str(self.admin.id)],
+                    },
+                    {"id": ids[1], "tags": []},
+                ]
+            },
+            format="json",
+        )
+        relay_all()
+        self.assertEqual(response.status_code, 200, response.json())
+        first, second = Lead.objects.get(id=ids[0]), Lead.objects.get(id=ids[1])
+        self.assertEqual(first.city, "Hyderabad")
+        self.assertEqual(first.updated_by, self.user.user)
+        self.assertEqual(first.assigned_to.count(), 2)
+        self.assertEqual(first.tags.count(), 2)
+        self.assertEqual(second.tags.count(), 0)
+        self.assertEqual([msg.to for msg in mail.outbox], [["admin@example.com"]])
+
+        other = Lead.objects.create(title="not assigned", org=self.org)
+        response = self.client_for(self.user).patch(
+            "/api/leads/bulk/",
+            {"records": [{"id": str(other.id), "city": "Pune"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_is_limited_to_own_records(self):
+        response, _ = self.create(self.records(2))
+        admin_ids = response.json()["ids"]
+        response, _ = self.create(self.records(1, start=5), profile=self.user)
+        user_ids = response.json()["ids"]
+
+        response = self.client_for(self.user).delete(
+            "/api/leads/bulk/", {"ids": admin_ids + user_ids}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["ids"], user_ids)
+        self.assertEqual(Lead.objects.filter(org=self.org).count(), 2)
+
+    def test_admin_check_follows_the_entity_views(self):
+        Lead.objects.create(title="lead", org=self.org)
+        org_admin = create_profile(self.org, "org-admin@example.com")
+        org_admin.is_organization_admin = True
+        org_admin.save()
+        superuser = create_profile(self.org, "superuser@example.com")
+        superuser.user.is_superuser = True
+        superuser.user.save()
+
+        # the lead views check is_superuser, the contact views is_admin
+        leads, contacts = BULK_ENTITIES["leads"], BULK_ENTITIES["contacts"]
+        for profile, counts in ((org_admin, (0, 1)), (superuser, (1, 0))):
+            for entity, count in zip((leads, contacts), counts):
+                self.assertEqual(
+                    entity.get_queryset(profile, profile.user).count(), count
+                )
+                self.assertEqual(
+                    entity.get_deletable(profile, profile.user).count(), count
+                )
+
+    def test_replace_only_writes_the_changed_links(self):
+        lead = Lead.objects.create(title="lead", org=self.org)
+        lead.assigned_to.add(self.user, self.admin)
+        other = create_profile(self.org, "other@example.com")
+        through = Lead.assigned_to.through
+        kept = through.objects.get(lead=lead, profile=self.user).id
+
+        with CaptureQueriesContext(connection) as queries:
+            assigned = BULK_ENTITIES["leads"].link(
+                {lead.id: {"assigned_to": [self.user.id, other.id]}}, replace=True
+            )
+        self.assertEqual(assigned, {lead.id: [other.id]})
+        self.assertEqual(
+            set(lead.assigned_to.values_list("id", flat=True)), {self.user.id, other.id}
+        )
+        self.assertEqual(through.objects.get(lead=lead, profile=self.user).id, kept)
+        statements = [q["sql"].split()[0] for q in queries]
+        self.assertEqual([s for s in statements if s != "SELECT"], ["DELETE", "INSERT"])
+
+        with CaptureQueriesContext(connection) as queries:
+            BULK_ENTITIES["leads"].link(
+                {lead.id: {"assigned_to": [other.id, self.user.id]}}, replace=True
+            )
+        self.assertEqual([q["sql"].split()[0] for q in queries], ["SELECT"])
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from common import dashboard, tasks
+from common.dashboard import build_snapshot, get_snapshot, mark_stale, refresh_org
+from common.models import DashboardSnapshot
+from common.testing import OrgTestMixin
+from leads.models import Lead
+
+
+class DashboardSnapshotTest(OrgTestMixin, TestCase):
+    org_name = "dashboard"
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch.object(tasks.refresh_dashboards, "apply_async")
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def snapshot(self):
+        return DashboardSnapshot.objects.get(org=self.org, profile=None)
+
+    def test_changes_mark_the_snapshot_stale(self):
+        self.assertEqual(get_snapshot(self.org).leads_count, 0)
+        self.assertFalse(self.snapshot().is_stale)
+
+        Lead.objects.create(title="lead", org=self.org)
+        snapshot = self.snapshot()
+        self.assertTrue(snapshot.is_stale)
+        self.assertEqual(snapshot.leads_count, 0)
+
+        self.assertEqual(refresh_org(self.org.id), 1)
+        snapshot = self.snapshot()
+        self.assertFalse(snapshot.is_stale)
+        self.assertEqual(snapshot.leads_count, 1)
+        self.assertEqual(refresh_org(self.org.id), 0)
+
+    def test_refreshes_are_debounced(self):
+        build_snapshot(self.org)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Lead.objects.create(title="lead {}".format(i), org=self.org)
+        self.assertEqual(self.apply_async.call_count, 1)
+        self.assertEqual(self.apply_async.call_args.args[0], (str(self.org.id),))
+
+        # the refresh lifts the debounce for the changes after it
+        refresh_org(self.org.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Lead.objects.create(title="later", org=self.org)
+        self.assertEqual(self.apply_async.call_count, 2)
+
+    def test_change_during_a_rebuild_keeps_the_snapshot_stale(self):
+        build_snapshot(self.org)
+        mark_stale(self.org.id)
+        querysets = dashboard.dashboard_querysets
+
+        def change_while_counting(org, profile=None):
+            result = querysets(org, profile)
+            mark_stale(org.id)
+            return result
+
+        with mock.patch.object(
+            dashboard, "dashboard_querysets", side_effect=change_while_counting
+        ):
+            refresh_org(self.org.id)
+        self.assertTrue(self.snapshot().is_stale)
+
+        # the refresh the change scheduled picks it up
+        self.assertEqual(refresh_org(self.org.id), 1)
+        self.assertFalse(self.snapshot().is_stale)
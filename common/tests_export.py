@@ -0,0 +1,151 @@
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from accounts.models import Account
+from common import tasks
+from common.models import ExportJob, Org
+from common.outbox import relay_all
+from common.testing import OrgTestMixin, create_profile
+from leads.models import Lead
+
+
+class ExportTestCase(OrgTestMixin, TestCase):
+    org_name = "export"
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Lead.objects.create(title="lead {}".format(i), org=self.org)
+        Lead.objects.create(title="converted", status="converted", org=self.org)
+        Lead.objects.create(
+            title="elsewhere", org=Org.objects.create(name="other org")
+        )
+        self.assigned = Lead.objects.create(title="assigned", org=self.org)
+        self.assigned.assigned_to.add(self.user)
+
+    def export(self, profile, url):
+        response = self.client_for(profile).get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTest(ExportTestCase):
+    def test_csv_export(self):
+        content = self.export(self.admin, "/api/leads/export/")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(
+            [row["title"] for row in rows],
+            ["lead 0", "lead 1", "lead 2", "lead 3", "lead 4", "assigned"],
+        )
+        self.assertIn("company.name", rows[0])
+
+    def test_ndjson_export(self):
+        content = self.export(self.admin, "/api/leads/export/?output=ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]["id"], str(self.assigned.id))
+
+    def test_export_is_scoped_like_the_list_views(self):
+        content = self.export(self.user, "/api/leads/export/?output=ndjson")
+        self.assertEqual(
+            [json.loads(line)["title"] for line in content.splitlines()], ["assigned"]
+        )
+
+        account = Account.objects.create(
+            name="account", email="a@example.com", org=self.org
+        )
+        account.assigned_to.add(self.user)
+        account.assigned_to.add(self.admin)
+        content = self.export(self.user, "/api/accounts/export/?output=ndjson")
+        self.assertEqual(len(content.splitlines()), 1)
+
+    def test_export_uses_the_admin_check_of_the_list_view(self):
+        Account.objects.create(name="account", email="a@example.com", org=self.org)
+        org_admin = create_profile(self.org, "org-admin@example.com")
+        org_admin.is_organization_admin = True
+        org_admin.save()
+        superuser = create_profile(self.org, "superuser@example.com")
+        superuser.user.is_superuser = True
+        superuser.user.save()
+
+        # the lead views check is_superuser, the account views is_admin
+        for profile, leads, accounts in ((org_admin, 0, 1), (superuser, 6, 0)):
+            content = self.export(profile, "/api/leads/export/?output=ndjson")
+            self.assertEqual(len(content.splitlines()), leads)
+            content = self.export(profile, "/api/accounts/export/?output=ndjson")
+            self.assertEqual(len(content.splitlines()), accounts)
+
+    def test_unknown_output(self):
+        response = self.client_for(self.admin).get("/api/leads/export/?output=xml")
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2, EXPORT_FILE_ROWS=4)
+class ExportJobTest(ExportTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        tasks.app.conf.task_always_eager = True
+        self.addCleanup(setattr, tasks.app.conf, "task_always_eager", False)
+
+    def test_export_job_writes_gzipped_parts(self):
+        client = self.client_for(self.admin)
+        response = client.post("/api/exports/", {"entity": "leads"})
+        self.assertEqual(response.status_code, 202)
+        relay_all()
+
+        response = client.get("/api/exports/{}/".format(response.json()["job"]["id"]))
+        job = response.json()["job"]
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual(job["processed_rows"], 6)
+        self.assertEqual(job["total_rows"], 6)
+        self.assertEqual(job["progress"], 100)
+        self.assertEqual(len(job["files"]), 2)
+
+        titles = []
+        for url in job["files"]:
+            # the signed link is enough, no credentials needed
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            content = gzip.decompress(b"".join(response.streaming_content))
+            rows = csv.DictReader(io.StringIO(content.decode("utf-8")))
+            titles.extend(row["title"] for row in rows)
+        self.assertEqual(
+            titles, ["lead 0", "lead 1", "lead 2", "lead 3", "lead 4", "assigned"]
+        )
+
+        tampered = job["files"][0].replace("/download/", "/download/x")
+        self.assertEqual(self.client.get(tampered).status_code, 403)
+        with self.settings(EXPORT_URL_MAX_AGE=-1):
+            self.assertEqual(self.client.get(job["files"][0]).status_code, 403)
+
+    def test_export_job_is_scoped_and_private(self):
+        response = self.client_for(self.user).post(
+            "/api/exports/", {"entity": "leads", "output": "ndjson"}
+        )
+        relay_all()
+        job = ExportJob.objects.get(id=response.json()["job"]["id"])
+        self.assertEqual(job.processed_rows, 1)
+        self.assertEqual(len(job.files), 1)
+
+        other = create_profile(self.org, "other@example.com")
+        response = self.client_for(other).get("/api/exports/{}/".format(job.id))
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_entity(self):
+        response = self.client_for(self.admin).post("/api/exports/", {"entity": "x"})
+        self.assertEqual(response.status_code, 400)
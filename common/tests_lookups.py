@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from accounts.models import Tags
+from common.models import Org
+from common.testing import OrgTestMixin
+from contacts.models import Contact
+
+
+class LookupViewTest(OrgTestMixin, TestCase):
+    org_name = "lookups"
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = self.client_for(self.user)
+
+    def test_unchanged_lookup_is_not_modified(self):
+        Tags.objects.create(name="hot")
+        response = self.client.get("/api/lookups/tags/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([tag["name"] for tag in response.json()["tags"]], ["hot"])
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        etag = response["ETag"]
+
+        response = self.client.get("/api/lookups/tags/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+    def test_saving_a_tag_changes_the_etag(self):
+        tag = Tags.objects.create(name="hot")
+        etag = self.client.get("/api/lookups/tags/")["ETag"]
+
+        tag.name = "cold"
+        tag.save()
+        response = self.client.get("/api/lookups/tags/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual([tag["name"] for tag in response.json()["tags"]], ["cold"])
+
+    def test_org_lookups_only_change_with_their_org(self):
+        etag = self.client.get("/api/lookups/contacts/")["ETag"]
+        Contact.objects.create(
+            first_name="other",
+            primary_email="other@example.com",
+            org=Org.objects.create(name="other"),
+        )
+        response = self.client.get("/api/lookups/contacts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Contact.objects.create(
+            first_name="mine", primary_email="mine@example.com", org=self.org
+        )
+        response = self.client.get("/api/lookups/contacts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [contact["first_name"] for contact in response.json()["contacts"]],
+            ["mine"],
+        )
+
+    def test_choice_lookups_and_unknown_names(self):
+        etag = self.client.get("/api/lookups/lead_status/")["ETag"]
+        Tags.objects.create(name="hot")
+        response = self.client.get(
+            "/api/lookups/lead_status/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get("/api/lookups/nope/").status_code, 404)
@@ -0,0 +1,101 @@
+from django.db import connection
+from django.db.models.signals import m2m_changed
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from common.m2m import sync_m2m
+from common.models import Org, Profile
+from common.testing import api_client, create_profile
+from leads import tasks
+from leads.models import Lead
+from teams.models import Teams
+
+
+class SyncM2MTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="m2m")
+        self.profiles = [
+            create_profile(
+                self.org,
+                "user{}@example.com".format(i),
+                "ADMIN" if i == 0 else "USER",
+            )
+            for i in range(4)
+        ]
+        self.lead = Lead.objects.create(title="lead", org=self.org)
+        self.lead.assigned_to.add(*self.profiles[:2])
+        self.signals = []
+        m2m_changed.connect(self.receiver, sender=Lead.assigned_to.through)
+        self.addCleanup(
+            m2m_changed.disconnect, self.receiver, sender=Lead.assigned_to.through
+        )
+
+    def receiver(self, action, pk_set, **kwargs):
+        self.signals.append((action, pk_set))
+
+    def through_ids(self):
+        return set(
+            Lead.assigned_to.through.objects.filter(lead=self.lead).values_list(
+                "id", flat=True
+            )
+        )
+
+    def test_unchanged_links_are_left_alone(self):
+        before = self.through_ids()
+        with CaptureQueriesContext(connection) as queries:
+            added, removed = sync_m2m(
+                self.lead, "assigned_to", [str(p.id) for p in self.profiles[:2]]
+            )
+        self.assertEqual((added, removed), (set(), set()))
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.through_ids(), before)
+        self.assertEqual(self.signals, [])
+
+    def test_only_the_difference_is_written(self):
+        kept = Lead.assigned_to.through.objects.get(
+            lead=self.lead, profile=self.profiles[1]
+        ).id
+        with CaptureQueriesContext(connection) as queries:
+            added, removed = sync_m2m(
+                self.lead,
+                "assigned_to",
+                Profile.objects.filter(id__in=[p.id for p in self.profiles[1:]]),
+            )
+        writes = [
+            q["sql"] for q in queries if q["sql"].startswith(("INSERT", "DELETE"))
+        ]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(added, {self.profiles[2].id, self.profiles[3].id})
+        self.assertEqual(removed, {self.profiles[0].id})
+        self.assertIn(kept, self.through_ids())
+        self.assertEqual(
+            set(self.lead.assigned_to.values_list("id", flat=True)),
+            {p.id for p in self.profiles[1:]},
+        )
+        self.assertEqual(
+            [action for action, _ in self.signals],
+            ["pre_remove", "post_remove", "pre_add", "post_add"],
+        )
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_detail_put_keeps_unchanged_links(self):
+        tasks.app.conf.task_always_eager = True
+        self.addCleanup(setattr, tasks.app.conf, "task_always_eager", False)
+        team = Teams.objects.create(name="team", org=self.org)
+        self.lead.teams.add(team)
+        before = self.through_ids()
+        api = api_client(self.profiles[0])
+        response = api.put(
+            "/api/leads/{}/".format(self.lead.id),
+            {
+                "title": "lead",
+                "probability": 10,
+                "teams": [str(team.id)],
+                "assigned_to": [str(p.id) for p in self.profiles[:2]],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.through_ids(), before)
+        self.assertEqual(list(self.lead.teams.all()), [team])
+        self.assertEqual(self.signals, [])
@@ -0,0 +1,128 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from accounts.models import AccountEmail
+from accounts.scheduler import dispatch_due, schedule
+from common import metrics
+from common.testing import OrgTestMixin
+from leads.models import Lead
+
+
+@override_settings(
+    METRICS_ENABLED=True,
+    METRICS_TOKEN="secret",
+    METRICS_ALLOWED_IPS=[],
+    METRICS_SLOW_REQUEST=0,
+    METRICS_SLOW_QUERIES=0,
+    RESPONSE_CACHE_TIMEOUT=0,
+)
+class RequestMetricsTest(OrgTestMixin, TestCase):
+    org_name = "metrics"
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        registry = metrics.registry
+        metrics.registry = metrics.Registry()
+        self.addCleanup(setattr, metrics, "registry", registry)
+
+        for i in range(3):
+            Lead.objects.create(title="lead {}".format(i), org=self.org)
+        self.api = self.client_for(self.admin)
+
+    def scrape(self):
+        response = self.client.get("/metrics/", HTTP_X_METRICS_TOKEN="secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode("utf-8").splitlines()
+
+    def test_histograms_per_route(self):
+        lead = Lead.objects.first()
+        self.assertEqual(self.api.get("/api/leads/").status_code, 200)
+        self.assertEqual(self.api.get("/api/leads/{}/".format(lead.id)).status_code, 200)
+        self.assertEqual(self.api.get("/api/leads/{}/".format(lead.id)).status_code, 200)
+
+        lines = self.scrape()
+        self.assertIn(
+            'crm_http_requests_total{route="api/leads/<str:pk>/",method="GET",status="200"} 2',
+            lines,
+        )
+        self.assertIn(
+            'crm_http_request_duration_seconds_bucket{route="api/leads/",method="GET",le="+Inf"} 1',
+            lines,
+        )
+        self.assertIn(
+            'crm_http_request_queries_count{route="api/leads/<str:pk>/",method="GET"} 2',
+            lines,
+        )
+        sums = {
+            line.split("{")[0]: float(line.rsplit(" ", 1)[1])
+            for line in lines
+            if '_sum{route="api/leads/",' in line
+        }
+        self.assertGreater(sums["crm_http_request_queries_sum"], 0)
+        self.assertGreater(sums["crm_http_request_db_seconds_sum"], 0)
+        self.assertGreater(sums["crm_http_request_serializer_seconds_sum"], 0)
+
+    def test_processes_are_added_up(self):
+        self.api.get("/api/leads/")
+        other = metrics.Registry()
+        other.observe("api/leads/", "GET", 200, {"crm_http_request_queries": 3})
+        other.flush(force=True)
+        self.assertNotEqual(other.slot, metrics.registry.slot)
+
+        self.assertIn(
+            'crm_http_requests_total{route="api/leads/",method="GET",status="200"} 2',
+            self.scrape(),
+        )
+
+    def test_scheduled_email_queue_is_reported(self):
+        email = AccountEmail.objects.create(
+            message_subject="subject", from_email="from@example.com"
+        )
+        schedule(email, timezone.now() - datetime.timedelta(minutes=5))
+        lines = self.scrape()
+        self.assertIn("crm_scheduled_emails_overdue 1", lines)
+        self.assertIn("crm_scheduled_emails_queued 0", lines)
+        self.assertFalse([line for line in lines if "_last_run_" in line])
+
+        dispatch_due(lambda pk: None)
+        lines = self.scrape()
+        self.assertIn("crm_scheduled_emails_overdue 0", lines)
+        self.assertIn("crm_scheduled_emails_queued 1", lines)
+        self.assertIn("crm_scheduled_emails_last_run_dispatched 1", lines)
+        self.assertIn(
+            "# TYPE crm_scheduled_emails_last_run_max_lag_seconds gauge", lines
+        )
+
+    def test_slow_requests_are_logged_with_repeated_sql(self):
+        with self.settings(METRICS_SLOW_QUERIES=1):
+            with self.assertLogs("common.metrics", "WARNING") as logs:
+                self.api.get("/api/leads/")
+        self.assertIn("Slow request GET /api/leads/", logs.output[0])
+
+    def test_endpoint_is_internal(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 404)
+        self.assertEqual(
+            self.client.get("/metrics/", HTTP_X_METRICS_TOKEN="wrong").status_code, 404
+        )
+        with self.settings(METRICS_TOKEN=""):
+            self.assertEqual(
+                self.client.get("/metrics/", HTTP_X_METRICS_TOKEN="").status_code, 404
+            )
+        with self.settings(METRICS_ALLOWED_IPS=["10.1.2.3"]):
+            self.assertEqual(
+                self.client.get("/metrics/", HTTP_X_METRICS_TOKEN="secret").status_code,
+                404,
+            )
+            self.assertEqual(
+                self.client.get(
+                    "/metrics/", HTTP_X_METRICS_TOKEN="secret", REMOTE_ADDR="10.1.2.3"
+                ).status_code,
+                200,
+            )
@@ -0,0 +1,117 @@
+import datetime
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from cases.models import Case
+from cases.tasks import send_email_to_assigned_user
+from common.models import Org
+from common.notifications import Notification, send_messages
+from common.testing import create_profile
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+    failures = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if CountingBackend.failures:
+            CountingBackend.failures -= 1
+            raise ConnectionError("connection reset")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND="common.tests_notifications.CountingBackend",
+    NOTIFICATION_BATCH_SIZE=10,
+    NOTIFICATION_RATE_LIMIT=0,
+    NOTIFICATION_RETRY_DELAY=0,
+)
+class NotificationTest(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+        CountingBackend.failures = 0
+        self.org = Org.objects.create(name="notifications")
+        self.profiles = [
+            create_profile(self.org, "user{}@example.com".format(i))
+            for i in range(25)
+        ]
+
+    def test_assignment_email_is_batched(self):
+        case = Case.objects.create(
+            name="case",
+            status="New",
+            priority="Low",
+            closed_on=datetime.date.today(),
+            org=self.org,
+        )
+        self.profiles[0].is_active = False
+        self.profiles[0].save()
+
+        # the case, then every recipient at once
+        with self.assertNumQueries(2):
+            send_email_to_assigned_user(
+                [str(profile.id) for profile in self.profiles], case.id
+            )
+
+        self.assertEqual(len(mail.outbox), 24)
+        self.assertEqual(CountingBackend.opened, 3)
+        self.assertEqual(
+            sorted(msg.to[0] for msg in mail.outbox),
+            sorted(profile.user.email for profile in self.profiles[1:]),
+        )
+        self.assertIn(self.profiles[1].user.email, mail.outbox[0].body)
+
+    def test_failed_message_is_retried(self):
+        notification = Notification("subject", "assigned_to/cases_assigned.html")
+        for profile in self.profiles[:3]:
+            notification.add(profile.user.email, {"user": profile.user})
+        CountingBackend.failures = 2
+
+        with self.settings(NOTIFICATION_MAX_RETRIES=2):
+            self.assertEqual(notification.send(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+        CountingBackend.failures = 3
+        with self.settings(NOTIFICATION_MAX_RETRIES=2):
+            self.assertEqual(notification.send(), 2)
+
+    def test_identical_contexts_are_rendered_once(self):
+        notification = Notification(
+            "subject", "assigned_to/cases_assigned.html", {"url": "example.com"}
+        )
+        notification.add("a@example.com")
+        notification.add("b@example.com")
+        notification.add("")
+        self.assertEqual(len(notification.messages), 2)
+        self.assertEqual(len(notification._rendered), 1)
+
+    def test_rate_limit_is_shared_by_every_sender(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        clock = [1000.0]
+        sent_at = []
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with self.settings(NOTIFICATION_RATE_LIMIT=2), mock.patch(
+            "common.notifications.time"
+        ) as time:
+            time.time.side_effect = lambda: clock[0]
+            time.sleep.side_effect = sleep
+            # two chunks sending side by side draw on the same allowance
+            for chunk in range(2):
+                send_messages(
+                    [mail.EmailMessage("subject", "body", to=[email]) for email in "abc"],
+                    on_sent=lambda msg: sent_at.append(int(clock[0])),
+                )
+        self.assertEqual(sent_at, [1000, 1000, 1001, 1001, 1002, 1002])
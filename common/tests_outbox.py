@@ -0,0 +1,81 @@
+import datetime
+from unittest import mock
+
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from common import tasks
+from common.models import OutboxMessage
+from common.outbox import enqueue, relay, relay_all
+from common.testing import OrgTestMixin
+from leads import tasks as lead_tasks
+from leads.models import Lead
+
+
+@override_settings(OUTBOX_BATCH_SIZE=2, OUTBOX_MAX_ATTEMPTS=2, RESPONSE_CACHE_TIMEOUT=0)
+class OutboxTest(OrgTestMixin, TestCase):
+    org_name = "outbox"
+
+    def setUp(self):
+        super().setUp()
+        self.lead = Lead.objects.create(title="lead", org=self.org)
+        for app in (tasks.app, lead_tasks.app):
+            app.conf.task_always_eager = True
+            self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+    def test_views_write_to_the_outbox_instead_of_the_broker(self):
+        api = self.client_for(self.admin)
+        task = lead_tasks.send_email_to_assigned_user
+        with mock.patch.object(task, "apply_async") as apply_async:
+            response = api.put(
+                "/api/leads/{}/".format(self.lead.id),
+                {"title": "lead", "probability": 10, "assigned_to": [str(self.user.id)]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        apply_async.assert_not_called()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task, task.name)
+        self.assertEqual(message.args, [[str(self.user.id)], str(self.lead.id)])
+
+        self.assertEqual(relay_all(), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual([msg.to for msg in mail.outbox], [["user@example.com"]])
+
+    def test_rolled_back_writes_queue_nothing(self):
+        with transaction.atomic():
+            enqueue(lead_tasks.send_email_to_assigned_user, [], self.lead.id)
+            transaction.set_rollback(True)
+        self.assertEqual(relay_all(), 0)
+
+    def test_messages_are_published_in_batches(self):
+        for _ in range(5):
+            enqueue(lead_tasks.send_email_to_assigned_user, [], self.lead.id)
+        self.assertEqual(relay(), 2)
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+        self.assertEqual(relay_all(), 3)
+
+    def test_failed_messages_are_retried_later(self):
+        enqueue(lead_tasks.send_email_to_assigned_user, [], self.lead.id)
+        task = lead_tasks.send_email_to_assigned_user
+        with mock.patch.object(task, "apply_async", side_effect=OSError("broker down")):
+            with self.assertLogs("common.outbox", "WARNING"):
+                self.assertEqual(relay(), 0)
+            message = OutboxMessage.objects.get()
+            self.assertEqual(message.attempts, 1)
+            self.assertEqual(message.last_error, "broker down")
+            self.assertGreater(message.available_at, timezone.now())
+            self.assertEqual(relay(), 0)
+
+            OutboxMessage.objects.update(
+                available_at=timezone.now() - datetime.timedelta(seconds=1)
+            )
+            with self.assertLogs("common.outbox", "WARNING"):
+                relay()
+        # given up on after OUTBOX_MAX_ATTEMPTS, kept with its error
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.assertEqual(relay(), 0)
+        self.assertEqual(OutboxMessage.objects.get().attempts, 2)
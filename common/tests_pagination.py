@@ -0,0 +1,63 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from common.models import Org
+from common.pagination import KeysetPagination
+from leads.models import Lead
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        org = Org.objects.create(name="pagination")
+        now = timezone.now()
+        # pairs of leads share a created_at, so pages have to break ties on id
+        for i in range(7):
+            lead = Lead.objects.create(title="lead {}".format(i), org=org)
+            Lead.objects.filter(id=lead.id).update(
+                created_at=now - datetime.timedelta(minutes=i // 2)
+            )
+        self.queryset = Lead.objects.filter(org=org)
+        self.expected = list(
+            self.queryset.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+    def page(self, **params):
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get("/", params))
+        results = paginator.paginate_queryset(self.queryset, request)
+        return paginator, [lead.id for lead in results]
+
+    def test_pages_walk_forward_and_back(self):
+        pages = []
+        paginator, ids = self.page(limit=3)
+        self.assertIsNone(paginator.previous_cursor)
+        while True:
+            pages.append(ids)
+            if not paginator.next_cursor:
+                break
+            paginator, ids = self.page(limit=3, cursor=paginator.next_cursor)
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        paginator, ids = self.page(limit=3, cursor=paginator.previous_cursor)
+        self.assertEqual(ids, pages[1])
+        paginator, ids = self.page(limit=3, cursor=paginator.previous_cursor)
+        self.assertEqual(ids, pages[0])
+        self.assertIsNone(paginator.previous_cursor)
+
+    def test_total_is_only_counted_on_request(self):
+        with self.assertNumQueries(1):
+            paginator, _ = self.page(limit=3)
+        self.assertIsNone(paginator.count)
+        with self.assertNumQueries(2):
+            paginator, _ = self.page(limit=3, with_count=1)
+        self.assertEqual(paginator.count, 7)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(NotFound):
+            self.page(cursor="not-a-cursor")
@@ -0,0 +1,205 @@
+import datetime
+import uuid
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.models import Account, Tags
+from cases.models import Case
+from common.models import Address, Attachments, Document, Org
+from common.testing import api_client, create_profile
+from contacts.models import Contact
+from events.models import Event
+from invoices.models import Invoice
+from invoices.serializer import InvoiceSerailizer
+from leads.models import Lead
+from opportunity.models import Opportunity
+from tasks.models import Task
+from teams.models import Teams
+
+
+class QueryCountMixin:
+    """
+    ``assertConstantQueries`` renders the same view (or serializer) for
+    growing numbers of rows and fails if the number of queries grows with
+    them, i.e. if a nested serializer is missing from its prefetch plan.
+    """
+
+    page_sizes = (1, 4)
+
+    def count_queries(self, func):
+        func()  # warm up the auth and lookup caches
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries)
+
+    def assertConstantQueries(self, create_row, func, page_sizes=None):
+        counts = []
+        rows = 0
+        for size in page_sizes or self.page_sizes:
+            while rows < size:
+                create_row(rows)
+                rows += 1
+            counts.append(self.count_queries(func))
+        self.assertEqual(
+            len(set(counts)), 1, "query count grows with the page size: {}".format(counts)
+        )
+
+    def assertConstantListQueries(self, url, create_row, page_sizes=None):
+        self.assertConstantQueries(
+            create_row, lambda: self.assertEqual(self.client.get(url).status_code, 200),
+            page_sizes,
+        )
+
+
+# the cached responses would hide the queries of the views
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class ListViewQueryCountTest(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="query counts")
+        self.profiles = [
+            create_profile(
+                self.org, "user{}@example.com".format(i), "ADMIN" if i == 0 else "USER"
+            )
+            for i in range(3)
+        ]
+        self.team = Teams.objects.create(name="team", org=self.org)
+        self.team.users.set(self.profiles)
+        self.tag = Tags.objects.create(name="tag")
+
+        self.client = api_client(self.profiles[0])
+
+    def relate(self, obj, tags=False):
+        obj.teams.add(self.team)
+        obj.assigned_to.set(self.profiles)
+        if tags:
+            obj.tags.add(self.tag)
+
+    def create_contact(self, i):
+        contact = Contact.objects.create(
+            first_name="contact {} {}".format(i, uuid.uuid4().hex[:6]),
+            primary_email="contact{}@example.com".format(uuid.uuid4().hex[:6]),
+            address=Address.objects.create(city="city"),
+            org=self.org,
+        )
+        self.relate(contact)
+        Attachments.objects.create(file_name="file", contact=contact)
+        return contact
+
+    def create_lead(self, i):
+        lead = Lead.objects.create(title="lead {}".format(uuid.uuid4().hex), org=self.org)
+        lead.contacts.add(self.create_contact(i))
+        self.relate(lead, tags=True)
+        return lead
+
+    def create_account(self, i):
+        account = Account.objects.create(
+            name="account {}".format(uuid.uuid4().hex),
+            status="open",
+            lead=self.create_lead(i),
+            org=self.org,
+        )
+        account.contacts.add(self.create_contact(i))
+        self.relate(account, tags=True)
+        return account
+
+    def create_opportunity(self, i):
+        opportunity = Opportunity.objects.create(
+            name="opportunity {}".format(i),
+            account=self.create_account(i),
+            closed_by=self.profiles[1],
+            org=self.org,
+        )
+        opportunity.contacts.add(self.create_contact(i))
+        self.relate(opportunity, tags=True)
+
+    def create_case(self, i):
+        case = Case.objects.create(
+            name="case {}".format(i),
+            account=self.create_account(i),
+            status="New",
+            priority="Low",
+            case_type="Question",
+            closed_on=datetime.date.today(),
+            org=self.org,
+        )
+        case.contacts.add(self.create_contact(i))
+        self.relate(case)
+
+    def create_task(self, i):
+        task = Task.objects.create(
+            title="task {}".format(i),
+            account=self.create_account(i),
+            status="New",
+            priority="Low",
+            org=self.org,
+        )
+        task.contacts.add(self.create_contact(i))
+        self.relate(task)
+
+    def create_event(self, i):
+        event = Event.objects.create(
+            name="event {}".format(i),
+            event_type="Non-Recurring",
+            start_date=datetime.date.today(),
+            start_time=datetime.time(9),
+            end_date=datetime.date.today(),
+            end_time=datetime.time(10),
+            org=self.org,
+        )
+        event.contacts.add(self.create_contact(i))
+        self.relate(event)
+
+    def create_document(self, i):
+        document = Document.objects.create(
+            title="document {}".format(i), status="active", org=self.org
+        )
+        document.teams.add(self.team)
+        document.shared_to.set(self.profiles)
+
+    def create_invoice(self, i):
+        address = Address.objects.create(city="city")
+        invoice = Invoice.objects.create(
+            invoice_title="invoice {}".format(i),
+            from_address=address,
+            to_address=address,
+            quantity=1,
+            rate=1,
+            org=self.org,
+        )
+        invoice.teams.add(self.team)
+        invoice.assigned_to.set([profile.user for profile in self.profiles])
+
+    def test_accounts(self):
+        self.assertConstantListQueries("/api/accounts/", self.create_account)
+
+    def test_leads(self):
+        self.assertConstantListQueries("/api/leads/", self.create_lead)
+
+    def test_contacts(self):
+        self.assertConstantListQueries("/api/contacts/", self.create_contact)
+
+    def test_opportunities(self):
+        self.assertConstantListQueries("/api/opportunities/", self.create_opportunity)
+
+    def test_cases(self):
+        self.assertConstantListQueries("/api/cases/", self.create_case)
+
+    def test_tasks(self):
+        self.assertConstantListQueries("/api/tasks/", self.create_task)
+
+    def test_events(self):
+        self.assertConstantListQueries("/api/events/", self.create_event)
+
+    def test_documents(self):
+        self.assertConstantListQueries("/api/documents/", self.create_document)
+
+    def test_invoices(self):
+        # the invoice API is not routed, so the list serializer is checked directly
+        self.assertConstantQueries(
+            self.create_invoice,
+            lambda: InvoiceSerailizer(
+                Invoice.objects.filter(org=self.org), many=True
+            ).data,
+        )
@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from common.models import Attachments
+from common.testing import OrgTestMixin, create_profile
+from contacts.models import Contact
+from leads.models import Lead
+
+
+class ResponseCacheTest(OrgTestMixin, TestCase):
+    org_name = "response cache"
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.lead = Lead.objects.create(title="first lead", org=self.org)
+
+    def get(self, client, url="/api/leads/?with_count=1"):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_is_served_without_queries(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(self.get(client)["X-Cache"], "MISS")
+        self.get(client)  # warm the authentication cache
+        with self.assertNumQueries(0):
+            response = self.get(client)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["open_leads"]["leads_count"], 1)
+
+        # other query parameters are a different page
+        self.assertEqual(self.get(client, "/api/leads/?title=first")["X-Cache"], "MISS")
+        # the total is a COUNT of its own, only run on request
+        self.assertIsNone(
+            self.get(client, "/api/leads/").json()["open_leads"]["leads_count"]
+        )
+
+    def test_changes_retire_cached_responses(self):
+        client = self.client_for(self.admin)
+        self.get(client)
+
+        Lead.objects.create(title="second lead", org=self.org)
+        response = self.get(client)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["open_leads"]["leads_count"], 2)
+
+        self.lead.assigned_to.add(self.user)
+        self.assertEqual(self.get(client)["X-Cache"], "MISS")
+        self.assertEqual(self.get(client)["X-Cache"], "HIT")
+
+    def test_comments_and_attachments_retire_cached_lists(self):
+        client = self.client_for(self.admin)
+        self.get(client)
+        self.assertEqual(self.get(client)["X-Cache"], "HIT")
+
+        response = client.post("/api/leads/{}/".format(self.lead.id), {"comment": "call back"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(client)["X-Cache"], "MISS")
+        self.assertEqual(self.get(client)["X-Cache"], "HIT")
+
+        Attachments.objects.create(lead=self.lead, file_name="notes.txt")
+        response = self.get(client)
+        self.assertEqual(response["X-Cache"], "MISS")
+        lead = response.json()["open_leads"]["open_leads"][0]
+        self.assertEqual(
+            [a["file_name"] for a in lead["lead_attachment"]], ["notes.txt"]
+        )
+
+    def test_non_admins_only_share_with_themselves(self):
+        admin, user = self.client_for(self.admin), self.client_for(self.user)
+        self.get(admin)
+        response = self.get(user)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["open_leads"]["leads_count"], 0)
+
+        self.lead.assigned_to.add(self.user)
+        self.assertEqual(self.get(user).json()["open_leads"]["leads_count"], 1)
+
+    def test_superusers_do_not_share_with_admins(self):
+        Contact.objects.create(
+            first_name="contact", primary_email="contact@example.com", org=self.org
+        )
+        superuser = create_profile(self.org, "superuser@example.com")
+        superuser.user.is_superuser = True
+        superuser.user.save()
+
+        # the contact views only show superusers what is assigned to them
+        self.get(self.client_for(self.admin), "/api/contacts/")
+        response = self.get(self.client_for(superuser), "/api/contacts/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["contact_obj_list"], [])
+
+    def test_stats(self):
+        client = self.client_for(self.admin)
+        self.get(client)
+        self.get(client)
+        stats = self.get(client, "/api/cache-stats/").json()["views"]
+        self.assertEqual(stats["LeadListView"]["hit"], 1)
+        self.assertEqual(stats["LeadListView"]["miss"], 1)
+        self.assertEqual(self.client_for(self.user).get("/api/cache-stats/").status_code, 403)
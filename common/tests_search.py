@@ -0,0 +1,107 @@
+import unittest
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.test import TestCase
+
+from common.search import SEARCH_CONFIG, SEARCH_ENTITIES, parse_query, search
+from common.testing import OrgTestMixin, create_profile
+from contacts.models import Contact
+from leads.models import Lead
+
+
+def prefix_query(value):
+    return SearchQuery(value, search_type="raw", config=SEARCH_CONFIG)
+
+
+class SearchViewTest(OrgTestMixin, TestCase):
+    org_name = "search"
+
+    def test_query_parsing(self):
+        self.assertEqual(parse_query("Jo  SMI"), prefix_query("jo:* & smi:*"))
+        self.assertEqual(parse_query("o'neil"), prefix_query("o:* & neil:*"))
+        self.assertIsNone(parse_query("!?"))
+        with self.assertNumQueries(0):
+            self.assertEqual(search("!?", self.admin, self.admin.user), [])
+
+    def test_invalid_requests(self):
+        client = self.client_for(self.admin)
+        response = client.get("/api/search/", {"q": "  "})
+        self.assertEqual(response.status_code, 400)
+        response = client.get("/api/search/", {"q": "acme", "types": "leads,nope"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], "Unknown types: nope")
+
+    def test_admin_check_follows_the_entity_views(self):
+        Lead.objects.create(title="lead", org=self.org)
+        Contact.objects.create(
+            first_name="contact", primary_email="contact@example.com", org=self.org
+        )
+        org_admin = create_profile(self.org, "org-admin@example.com")
+        org_admin.is_organization_admin = True
+        org_admin.save()
+        superuser = create_profile(self.org, "superuser@example.com")
+        superuser.user.is_superuser = True
+        superuser.user.save()
+
+        # the lead views check is_superuser, the contact views is_admin
+        leads, contacts = SEARCH_ENTITIES["leads"], SEARCH_ENTITIES["contacts"]
+        for profile, counts in ((org_admin, (0, 1)), (superuser, (1, 0))):
+            for entity, count in zip((leads, contacts), counts):
+                self.assertEqual(
+                    entity.get_queryset(profile, profile.user).count(), count
+                )
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "the search vectors are kept by a trigger"
+)
+class PostgresSearchTest(OrgTestMixin, TestCase):
+    org_name = "search"
+
+    def get(self, profile, **params):
+        response = self.client_for(profile).get("/api/search/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(hit["type"], hit["label"]) for hit in response.json()["results"]]
+
+    def test_trigger_keeps_the_vector_in_sync(self):
+        lead = Lead.objects.create(title="Acme Widgets", org=self.org)
+        Lead.objects.bulk_create([Lead(title="Bulk Corp", org=self.org)])
+        matches = Lead.objects.filter(search_vector=parse_query("widg"))
+        self.assertEqual(list(matches), [lead])
+        self.assertTrue(Lead.objects.filter(search_vector=parse_query("bulk")).exists())
+
+        Lead.objects.filter(id=lead.id).update(title="Renamed")
+        self.assertFalse(matches.exists())
+        self.assertTrue(
+            Lead.objects.filter(search_vector=parse_query("renamed")).exists()
+        )
+
+    def test_hits_are_ranked_across_types(self):
+        Lead.objects.create(title="Smith Holdings", first_name="John", org=self.org)
+        Lead.objects.create(title="Other", last_name="Smithers", org=self.org)
+        Lead.objects.create(title="John Smith", status="converted", org=self.org)
+        Contact.objects.create(
+            first_name="Johnny",
+            last_name="Smith",
+            primary_email="johnny@example.com",
+            org=self.org,
+        )
+
+        self.assertEqual(
+            sorted(self.get(self.admin, q="jo smi")),
+            [("contacts", "Johnny Smith"), ("leads", "Smith Holdings John")],
+        )
+        # the substring match finds what is not at the start of a word
+        self.assertEqual(
+            self.get(self.admin, q="ithers", types="leads"),
+            [("leads", "Other Smithers")],
+        )
+        self.assertEqual(len(self.get(self.admin, q="smith", limit=1)), 1)
+
+    def test_users_only_find_their_records(self):
+        mine = Lead.objects.create(title="Acme mine", org=self.org)
+        mine.assigned_to.add(self.user)
+        Lead.objects.create(title="Acme other", org=self.org)
+        self.assertEqual(self.get(self.user, q="acme"), [("leads", "Acme mine")])
+        self.assertEqual(len(self.get(self.admin, q="acme")), 2)
@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Tags
+from common import tags
+from common.cache_utils import get_generation
+from common.models import Org
+from leads.models import Lead
+
+
+class TagServiceTest(TestCase):
+    def setUp(self):
+        tags.local_cache.clear()
+        self.addCleanup(tags.local_cache.clear)
+        self.hot = Tags.objects.create(name="Hot Lead")
+
+    def test_names_are_matched_by_slug(self):
+        ids = tags.get_tag_ids(["hot lead", "Hot Lead", "  HOT LEAD "])
+        self.assertEqual(set(ids.values()), {self.hot.id})
+        self.assertEqual(Tags.objects.count(), 1)
+
+    def test_missing_tags_are_created_once(self):
+        ids = tags.get_tag_ids(["new", "New", "other", ""])
+        self.assertEqual(sorted(ids), ["New", "new", "other"])
+        self.assertEqual(ids["new"], ids["New"])
+        self.assertEqual(
+            sorted(Tags.objects.values_list("slug", flat=True)),
+            ["hot-lead", "new", "other"],
+        )
+
+    def test_known_tags_need_no_query(self):
+        tags.get_tag_ids(["Hot Lead", "new"])
+        with CaptureQueriesContext(connection) as queries:
+            ids = tags.get_tag_ids(["hot lead", "new"])
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(ids["hot lead"], self.hot.id)
+
+    def test_deleted_tag_is_not_served_from_cache(self):
+        tags.get_tag_ids(["Hot Lead"])
+        generation = get_generation("lookup:tags")
+        self.hot.delete()
+        self.assertNotEqual(get_generation("lookup:tags"), generation)
+        ids = tags.get_tag_ids(["Hot Lead"])
+        self.assertNotEqual(ids["Hot Lead"], self.hot.id)
+        self.assertTrue(Tags.objects.filter(id=ids["Hot Lead"]).exists())
+
+    def test_set_tags(self):
+        lead = Lead.objects.create(title="lead", org=Org.objects.create(name="tags"))
+        tags.set_tags(lead, ["hot lead", "cold"])
+        self.assertEqual(lead.tags.count(), 2)
+        tags.set_tags(lead, ["Cold"], clear=True)
+        self.assertEqual(list(lead.tags.values_list("slug", flat=True)), ["cold"])
+        tags.set_tags(lead, None, clear=True)
+        self.assertEqual(lead.tags.count(), 0)
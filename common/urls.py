@@ -8,6 +8,16 @@ app_name = "api_common"
 
 urlpatterns = [
     path("dashboard/", views.ApiHomeView.as_view()),
+    path("lookups/<str:name>/", views.LookupView.as_view()),
+    path("search/", views.SearchView.as_view()),
+    path("cache-stats/", views.ResponseCacheStatsView.as_view()),
+    path("exports/", views.ExportJobListView.as_view()),
+    path(
+        "exports/download/<str:token>/",
+        views.ExportDownloadView.as_view(),
+        name="export_download",
+    ),
+    path("exports/<str:pk>/", views.ExportJobView.as_view()),
     path(
         "auth/refresh-token/",
         jwt_views.TokenRefreshView.as_view(),
@@ -144,6 +144,35 @@ EVENT_STATUS = (
     ("Deferred", "Deferred"),
 )
 
+EMAIL_STATE = (
+    ("scheduled", "Scheduled"),
+    ("queued", "Queued"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+)
+
+EXPORT_ENTITY = (
+    ("leads", "Leads"),
+    ("contacts", "Contacts"),
+    ("accounts", "Accounts"),
+    ("opportunities", "Opportunities"),
+    ("cases", "Cases"),
+    ("tasks", "Tasks"),
+    ("events", "Events"),
+)
+
+EXPORT_OUTPUT = (
+    ("csv", "CSV"),
+    ("ndjson", "NDJSON"),
+)
+
+JOB_STATUS = (
+    ("pending", "Pending"),
+    ("processing", "Processing"),
+    ("completed", "Completed"),
+    ("failed", "Failed"),
+)
+
 
 COUNTRIES = (
     ("GB", _("United Kingdom")),
@@ -1,4 +1,5 @@
 import json
+import os
 import secrets
 from multiprocessing import context
 # from re import template
@@ -6,6 +7,7 @@ from multiprocessing import context
 import requests
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.utils import json
 from django.conf import settings
@@ -13,11 +15,13 @@ from django.contrib.auth import authenticate, login
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
 from django.db.models import Q
-from django.http.response import JsonResponse
+from django.http import Http404, HttpResponse
+from django.http.response import FileResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.utils.encoding import force_str
-from django.utils.http import urlsafe_base64_decode
+from django.utils.http import parse_etags, urlsafe_base64_decode
 from django.utils.translation import gettext as _
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
@@ -27,27 +31,36 @@ from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schem
 #from common.external_auth import CustomDualAuthentication
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from accounts.models import Account, Contact, Tags
-from accounts.serializer import AccountSerializer
+from accounts.models import Contact
 from cases.models import Case
 from cases.serializer import CaseSerializer
 
 ##from common.custom_auth import JSONWebTokenAuthentication
-from common import serializer, swagger_params1
-from common.models import APISettings, Document, Org, Profile, User
+from common import metrics, serializer, swagger_params1
+from common.bulk import BULK_ENTITIES
+from common.dashboard import get_snapshot, snapshot_profile
+from common.export import FORMATS, export, read_download_token
+from common.lookups import LOOKUPS
+from common.m2m import sync_m2m
+from common.models import APISettings, Document, ExportJob, Org, Profile, User
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
+from common.response_cache import ALL, cache_response, get_stats
+from common.search import SEARCH_ENTITIES, search
 from common.serializer import *
 # from common.serializer import (
 #     CreateUserSerializer,
 #     PasswordChangeSerializer,
 #     RegisterOrganizationSerializer,
 # )
+from common.tags import set_tags
 from common.tasks import (
     resend_activation_link_to_user,
+    run_export,
     send_email_to_new_user,
     send_email_to_reset_password,
     send_email_user_delete,
@@ -57,8 +70,6 @@ from common.token_generator import account_activation_token
 # from rest_framework_jwt.serializers import jwt_encode_handler
 from common.utils import COUNTRIES, ROLES, jwt_payload_handler
 from contacts.serializer import ContactSerializer
-from leads.models import Lead
-from leads.serializer import LeadSerializer
 from opportunity.models import Opportunity
 from opportunity.serializer import OpportunitySerializer
 from teams.models import Teams
@@ -83,12 +94,11 @@ class GetTeamsAndUsersView(APIView):
         return Response(data)
 
 
-class UsersListView(APIView, LimitOffsetPagination):
+class UsersListView(APIView, KeysetPagination):
 
     permission_classes = (IsAuthenticated,)
     @extend_schema(parameters=swagger_params1.organization_params,request=UserCreateSwaggerSerializer)
     def post(self, request, format=None):
-        print(request.profile.role, request.user.is_superuser)
         if self.request.profile.role != "ADMIN" and not self.request.user.is_superuser:
             return Response(
                 {"error": True, "errors": "Permission Denied"},
@@ -147,7 +157,7 @@ class UsersListView(APIView, LimitOffsetPagination):
                 {"error": True, "errors": "Permission Denied"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        queryset = Profile.objects.filter(org=request.profile.org).order_by("-id")
+        queryset = Profile.objects.filter(org=request.profile.org)
         params = request.query_params
         if params:
             if params.get("email"):
@@ -160,40 +170,26 @@ class UsersListView(APIView, LimitOffsetPagination):
         context = {}
         queryset_active_users = queryset.filter(is_active=True)
         results_active_users = self.paginate_queryset(
-            queryset_active_users.distinct(), self.request, view=self
+            queryset_active_users.distinct(), self.request, view=self, cursor_query_param="active_cursor"
         )
         active_users = ProfileSerializer(results_active_users, many=True).data
-        if results_active_users:
-            offset = queryset_active_users.filter(
-                id__gte=results_active_users[-1].id
-            ).count()
-            if offset == queryset_active_users.count():
-                offset = None
-        else:
-            offset = 0
         context["active_users"] = {
             "active_users_count": self.count,
             "active_users": active_users,
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
         }
 
         queryset_inactive_users = queryset.filter(is_active=False)
         results_inactive_users = self.paginate_queryset(
-            queryset_inactive_users.distinct(), self.request, view=self
+            queryset_inactive_users.distinct(), self.request, view=self, cursor_query_param="inactive_cursor"
         )
         inactive_users = ProfileSerializer(results_inactive_users, many=True).data
-        if results_inactive_users:
-            offset = queryset_inactive_users.filter(
-                id__gte=results_inactive_users[-1].id
-            ).count()
-            if offset == queryset_inactive_users.count():
-                offset = None
-        else:
-            offset = 0
         context["inactive_users"] = {
             "inactive_users_count": self.count,
             "inactive_users": inactive_users,
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
         }
 
         context["admin_email"] = settings.ADMIN_EMAIL
@@ -305,6 +301,7 @@ class UserDetailView(APIView):
     @extend_schema(
         tags=["users"],parameters=swagger_params1.organization_params
     )
+    @transaction.atomic
     def delete(self, request, pk, format=None):
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             return Response(
@@ -318,7 +315,8 @@ class UserDetailView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
         deleted_by = self.request.profile.user.email
-        send_email_user_delete.delay(
+        enqueue(
+            send_email_user_delete,
             self.object.user.email,
             deleted_by=deleted_by,
         )
@@ -333,39 +331,326 @@ class ApiHomeView(APIView):
 
     @extend_schema(parameters=swagger_params1.organization_params)
     def get(self, request, format=None):
-        accounts = Account.objects.filter(status="open", org=request.profile.org)
-        contacts = Contact.objects.filter(org=request.profile.org)
-        leads = Lead.objects.filter(org=request.profile.org).exclude(
-            Q(status="converted") | Q(status="closed")
+        snapshot = get_snapshot(
+            request.profile.org, snapshot_profile(request.profile, request.user)
         )
-        opportunities = Opportunity.objects.filter(org=request.profile.org)
+        context = {}
+        context["accounts_count"] = snapshot.accounts_count
+        context["contacts_count"] = snapshot.contacts_count
+        context["leads_count"] = snapshot.leads_count
+        context["opportunities_count"] = snapshot.opportunities_count
+        for name in ("accounts", "contacts", "leads", "opportunities"):
+            context[name] = snapshot.recent.get(name, [])
+        context["refreshed_at"] = snapshot.refreshed_at
+        return Response(context, status=status.HTTP_200_OK)
 
-        if self.request.profile.role != "ADMIN" and not self.request.user.is_superuser:
-            accounts = accounts.filter(
-                Q(assigned_to=self.request.profile) | Q(created_by=self.request.profile.user)
+
+class LookupView(APIView):
+    """Cacheable reference data (contacts, companies, tags, users, choices)."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=["lookups"], parameters=swagger_params1.organization_params
+    )
+    def get(self, request, name, format=None):
+        lookup = LOOKUPS.get(name)
+        if lookup is None:
+            return Response(
+                {"error": True, "errors": "Unknown lookup"},
+                status=status.HTTP_404_NOT_FOUND,
             )
-            contacts = contacts.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
+        org = request.profile.org
+        etag = lookup.get_etag(org.id)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({name: lookup.get_data(org)}, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class SearchView(APIView):
+    """Ranked full-text search across leads, contacts, accounts and opportunities."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["search"], parameters=swagger_params1.search_params)
+    def get(self, request, format=None):
+        params = request.query_params
+        text = params.get("q", "").strip()
+        if not text:
+            return Response(
+                {"error": True, "errors": "q is required"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            leads = leads.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
-            ).exclude(status="closed")
-            opportunities = opportunities.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
+        types = [t for t in params.get("types", "").split(",") if t]
+        unknown = set(types) - set(SEARCH_ENTITIES)
+        if unknown:
+            return Response(
+                {"error": True, "errors": "Unknown types: " + ", ".join(sorted(unknown))},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        context = {}
-        context["accounts_count"] = accounts.count()
-        context["contacts_count"] = contacts.count()
-        context["leads_count"] = leads.count()
-        context["opportunities_count"] = opportunities.count()
-        context["accounts"] = AccountSerializer(accounts, many=True).data
-        context["contacts"] = ContactSerializer(contacts, many=True).data
-        context["leads"] = LeadSerializer(leads, many=True).data
-        context["opportunities"] = OpportunitySerializer(opportunities, many=True).data
-        return Response(context, status=status.HTTP_200_OK)
+        try:
+            limit = max(1, min(int(params.get("limit", 20)), 100))
+        except ValueError:
+            limit = 20
+        results = search(text, request.profile, request.user, types=types, limit=limit)
+        return Response(
+            {"error": False, "count": len(results), "results": results},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ExportView(APIView):
+    """
+    Streamed export of every record of ``entity`` the profile can see, as
+    CSV or NDJSON (``?output=ndjson``), see common/export.py.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    entity = None
+
+    @extend_schema(tags=["export"], parameters=swagger_params1.export_params)
+    def get(self, request, format=None):
+        output = request.query_params.get("output", "csv")
+        if output not in FORMATS:
+            return Response(
+                {"error": True, "errors": "output must be csv or ndjson"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response = StreamingHttpResponse(
+            export(self.entity, request.profile, request.user, output),
+            content_type=FORMATS[output],
+        )
+        response["Content-Disposition"] = 'attachment; filename="{}-{}.{}"'.format(
+            self.entity, timezone.now().strftime("%Y%m%d-%H%M%S"), output
+        )
+        # let a buffering proxy pass the chunks on as they come
+        response["X-Accel-Buffering"] = "no"
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class BulkView(APIView):
+    """
+    Create (POST), update (PATCH) or delete (DELETE) up to BULK_MAX_RECORDS
+    records of ``entity`` at once, see common/bulk.py.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    entity = None
+
+    def write(self, request, partial):
+        entity = BULK_ENTITIES[self.entity]
+        # {"records": [...]}, or the bare list
+        records = request.data
+        if not isinstance(records, list):
+            records = records.get("records")
+        serializer = entity.get_serializer(records, request.profile.org, partial)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        records = serializer.validated_data
+        entity.resolve(records, request.profile.org)
+        if not partial:
+            ids = entity.create(records, request.profile)
+            return Response(
+                {"error": False, "message": "Records Created Successfully", "ids": ids},
+                status=status.HTTP_200_OK,
+            )
+        ids = {record["id"] for record in records}
+        instances = {
+            instance.id: instance
+            for instance in entity.get_queryset(request.profile, request.user).filter(
+                id__in=ids
+            )
+        }
+        missing = ids - set(instances)
+        if missing:
+            return Response(
+                {
+                    "error": True,
+                    "errors": "Not found or not permitted",
+                    "ids": sorted(str(pk) for pk in missing),
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        ids = entity.update(records, instances, request.profile)
+        return Response(
+            {"error": False, "message": "Records Updated Successfully", "ids": ids},
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        tags=["bulk"],
+        parameters=swagger_params1.organization_params,
+        request=BulkWriteSwaggerSerializer,
+    )
+    def post(self, request, format=None):
+        return self.write(request, partial=False)
+
+    @extend_schema(
+        tags=["bulk"],
+        parameters=swagger_params1.organization_params,
+        request=BulkWriteSwaggerSerializer,
+    )
+    def patch(self, request, format=None):
+        return self.write(request, partial=True)
+
+    @extend_schema(
+        tags=["bulk"],
+        parameters=swagger_params1.organization_params,
+        request=BulkDeleteSerializer,
+    )
+    def delete(self, request, format=None):
+        entity = BULK_ENTITIES[self.entity]
+        serializer = BulkDeleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = entity.get_deletable(request.profile, request.user).filter(
+            id__in=serializer.validated_data["ids"]
+        )
+        ids = entity.delete(queryset, request.profile)
+        return Response(
+            {"error": False, "message": "Records Deleted Successfully", "ids": ids},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ExportJobListView(APIView):
+    """Start a background export, for exports too big to stream."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=["export"],
+        parameters=swagger_params1.organization_params,
+        request=ExportJobCreateSerializer,
+    )
+    @transaction.atomic
+    def post(self, request, format=None):
+        serializer = ExportJobCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        job = serializer.save(org=request.profile.org, profile=request.profile)
+        enqueue(run_export, job.id)
+        return Response(
+            {
+                "error": False,
+                "message": "Export started",
+                "job": ExportJobSerializer(job, context={"request": request}).data,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ExportJobView(APIView):
+    """Progress of an export job, with signed links to its files once done."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["export"], parameters=swagger_params1.organization_params)
+    def get(self, request, pk, format=None):
+        job = get_object_or_404(ExportJob, id=pk, org=request.profile.org)
+        if (
+            request.profile.role != "ADMIN"
+            and not request.user.is_superuser
+            and job.profile_id != request.profile.id
+        ):
+            return Response(
+                {
+                    "error": True,
+                    "errors": "You do not have Permission to perform this action",
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        return Response(
+            {
+                "error": False,
+                "job": ExportJobSerializer(job, context={"request": request}).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ExportDownloadView(APIView):
+    """One file of a finished export; the signed link is the credential."""
+
+    authentication_classes = ()
+    permission_classes = ()
+
+    @extend_schema(tags=["export"])
+    def get(self, request, token, format=None):
+        signed = read_download_token(token)
+        if signed is None:
+            return Response(
+                {"error": True, "errors": "The link is invalid or has expired"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        job_id, part = signed
+        job = get_object_or_404(ExportJob, id=job_id, status="completed")
+        if part >= len(job.files):
+            return Response(
+                {"error": True, "errors": "File not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        name = job.files[part]
+        return FileResponse(
+            default_storage.open(name, "rb"),
+            as_attachment=True,
+            filename=os.path.basename(name),
+            content_type="application/gzip",
+        )
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Request metrics in the Prometheus text format, for internal scrapers
+    sending METRICS_TOKEN in the X-Metrics-Token header.
+    """
+    # REMOTE_ADDR is the proxy's own address behind a local reverse proxy,
+    # so the address check alone would let anyone in
+    if (
+        not settings.METRICS_ENABLED
+        or not settings.METRICS_TOKEN
+        or not constant_time_compare(
+            request.headers.get("X-Metrics-Token", ""), settings.METRICS_TOKEN
+        )
+        or (
+            settings.METRICS_ALLOWED_IPS
+            and request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS
+        )
+    ):
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+class ResponseCacheStatsView(APIView):
+    """Hit/miss counters of the cached list and detail endpoints."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["cache"], parameters=swagger_params1.organization_params)
+    def get(self, request, format=None):
+        if self.request.profile.role != "ADMIN" and not self.request.user.is_superuser:
+            return Response(
+                {"error": True, "errors": "Permission Denied"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        return Response({"error": False, "views": get_stats()}, status=status.HTTP_200_OK)
 
 
 class OrgProfileCreateView(APIView):
@@ -440,14 +725,14 @@ class ProfileView(APIView):
         context["user_obj"] = ProfileSerializer(self.request.profile).data
         return Response(context, status=status.HTTP_200_OK)
 
-class DocumentListView(APIView, LimitOffsetPagination):
+class DocumentListView(APIView, KeysetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Document
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if self.request.user.is_superuser or self.request.profile.role == "ADMIN":
             queryset = queryset
         else:
@@ -491,42 +776,28 @@ class DocumentListView(APIView, LimitOffsetPagination):
 
         queryset_documents_active = queryset.filter(status="active")
         results_documents_active = self.paginate_queryset(
-            queryset_documents_active.distinct(), self.request, view=self
+            queryset_documents_active.distinct(), self.request, view=self, cursor_query_param="active_cursor"
         )
         documents_active = DocumentSerializer(results_documents_active, many=True).data
-        if results_documents_active:
-            offset = queryset_documents_active.filter(
-                id__gte=results_documents_active[-1].id
-            ).count()
-            if offset == queryset_documents_active.count():
-                offset = None
-        else:
-            offset = 0
         context["documents_active"] = {
             "documents_active_count": self.count,
             "documents_active": documents_active,
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
         }
 
         queryset_documents_inactive = queryset.filter(status="inactive")
         results_documents_inactive = self.paginate_queryset(
-            queryset_documents_inactive.distinct(), self.request, view=self
+            queryset_documents_inactive.distinct(), self.request, view=self, cursor_query_param="inactive_cursor"
         )
         documents_inactive = DocumentSerializer(
             results_documents_inactive, many=True
         ).data
-        if results_documents_inactive:
-            offset = queryset_documents_inactive.filter(
-                id__gte=results_documents_active[-1].id
-            ).count()
-            if offset == queryset_documents_inactive.count():
-                offset = None
-        else:
-            offset = 0
         context["documents_inactive"] = {
             "documents_inactive_count": self.count,
             "documents_inactive": documents_inactive,
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
         }
 
         context["users"] = ProfileSerializer(profiles, many=True).data
@@ -536,6 +807,7 @@ class DocumentListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["documents"], parameters=swagger_params1.document_get_params
     )
+    @cache_response("documents", "teams", "profiles")
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -585,6 +857,7 @@ class DocumentDetailView(APIView):
     @extend_schema(
         tags=["documents"], parameters=swagger_params1.organization_params
     )
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, format=None):
         self.object = self.get_object(pk)
         if not self.object:
@@ -695,21 +968,22 @@ class DocumentDetailView(APIView):
                 status=params.get("status"),
                 org=request.profile.org,
             )
-            doc.shared_to.clear()
-            if params.get("shared_to"):
-                assinged_to_list = params.get("shared_to")
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org, is_active=True
-                )
-                if profiles:
-                    doc.shared_to.add(*profiles)
-
-            doc.teams.clear()
-            if params.get("teams"):
-                teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                if teams:
-                    doc.teams.add(*teams)
+            sync_m2m(
+                doc,
+                "shared_to",
+                Profile.objects.filter(
+                    id__in=params.get("shared_to") or [],
+                    org=request.profile.org,
+                    is_active=True,
+                ),
+            )
+            sync_m2m(
+                doc,
+                "teams",
+                Teams.objects.filter(
+                    id__in=params.get("teams") or [], org=request.profile.org
+                ),
+            )
             return Response(
                 {"error": False, "message": "Document Updated Successfully"},
                 status=status.HTTP_200_OK,
@@ -795,12 +1069,7 @@ class DomainList(APIView):
         if serializer.is_valid():
             settings_obj = serializer.save(created_by=request.profile.user, org=request.profile.org)
             if params.get("tags"):
-                tags = params.get("tags")
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(name=tag).first()
-                    if not tag_obj:
-                        tag_obj = Tags.objects.create(name=tag)
-                    settings_obj.tags.add(tag_obj)
+                set_tags(settings_obj, params.get("tags"))
             if assign_to_list:
                 settings_obj.lead_assigned_to.add(*assign_to_list)
             return Response(
@@ -840,17 +1109,8 @@ class DomainDetailView(APIView):
         serializer = APISettingsSerializer(data=params, instance=api_setting)
         if serializer.is_valid():
             api_setting = serializer.save()
-            api_setting.tags.clear()
-            api_setting.lead_assigned_to.clear()
-            if params.get("tags"):
-                tags = params.get("tags")
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(name=tag).first()
-                    if not tag_obj:
-                        tag_obj = Tags.objects.create(name=tag)
-                    api_setting.tags.add(tag_obj)
-            if assign_to_list:
-                api_setting.lead_assigned_to.add(*assign_to_list)
+            set_tags(api_setting, params.get("tags"), clear=True)
+            sync_m2m(api_setting, "lead_assigned_to", assign_to_list)
             return Response(
                 {"error": False, "message": "API setting Updated sucessfully"},
                 status=status.HTTP_200_OK,
@@ -887,7 +1147,6 @@ class GoogleLoginView(APIView):
         payload = {'access_token': request.data.get("token")}  # validate the token
         r = requests.get('https://www.googleapis.com/oauth2/v2/userinfo', params=payload)
         data = json.loads(r.text)
-        print(data)
         if 'error' in data:
             content = {'message': 'wrong google token / this google token is already expired.'}
             return Response(content)
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations
+
+import common.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0011_trigram_extension'),
+        ('contacts', '0005_alter_contact_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='contacts_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), name='contacts_first_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='contacts_last_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('primary_email'), name='gin_trgm_ops'), name='contacts_primary_email_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('mobile_number'), name='gin_trgm_ops'), name='contacts_mobile_number_trgm'),
+        ),
+        common.search.CreateSearchTrigger(
+            table="contacts",
+            weights={
+                "A": ["first_name", "last_name"],
+                "B": ["primary_email", "secondary_email", "organization"],
+                "C": ["title", "department", "mobile_number"],
+                "D": ["description"],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0006_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['org', '-created_at', '-id'], name='contact_org_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "contacts_assigned_to_rev_idx" ON "contacts_assigned_to" ("profile_id", "contact_id")',
+            'DROP INDEX IF EXISTS "contacts_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "contacts_teams_rev_idx" ON "contacts_teams" ("teams_id", "contact_id")',
+            'DROP INDEX IF EXISTS "contacts_teams_rev_idx"',
+        ),
+    ]
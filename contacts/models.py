@@ -1,10 +1,12 @@
 import arrow
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 
 from common.models import Address, Org, Profile
 from common.base import BaseModel
+from common.search import search_vector_index, trigram_index
 from common.utils import COUNTRIES
 from teams.models import Teams
 
@@ -44,12 +46,25 @@ class Contact(BaseModel):
     teams = models.ManyToManyField(Teams, related_name="contact_teams")
     org = models.ForeignKey(Org, on_delete=models.SET_NULL, null=True, blank=True)
     country = models.CharField(max_length=3, choices=COUNTRIES, blank=True, null=True)
+    # maintained by a database trigger, see common/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Contact"
         verbose_name_plural = "Contacts"
         db_table = "contacts"
         ordering = ("-created_at",)
+        indexes = [
+            search_vector_index("contacts"),
+            trigram_index("contacts", "first_name"),
+            trigram_index("contacts", "last_name"),
+            trigram_index("contacts", "primary_email"),
+            trigram_index("contacts", "mobile_number"),
+            models.Index(
+                fields=["org", "-created_at", "-id"],
+                name="contact_org_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.first_name
@@ -1,5 +1,8 @@
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from common.bulk import BulkRecordSerializer
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import (
     AttachmentsSerializer,
     BillingAddressSerializer,
@@ -14,9 +17,9 @@ class ContactSerializer(serializers.ModelSerializer):
     teams = TeamsSerializer(read_only=True, many=True)
     assigned_to = ProfileSerializer(read_only=True, many=True)
     address = BillingAddressSerializer(read_only=True)
-    get_team_users = ProfileSerializer(read_only=True, many=True)
-    get_team_and_assigned_users = ProfileSerializer(read_only=True, many=True)
-    get_assigned_users_not_in_teams = ProfileSerializer(read_only=True, many=True)
+    get_team_users = serializers.SerializerMethodField()
+    get_team_and_assigned_users = serializers.SerializerMethodField()
+    get_assigned_users_not_in_teams = serializers.SerializerMethodField()
     contact_attachment = AttachmentsSerializer(read_only=True, many=True)
     date_of_birth = serializers.DateField()
     org = OrganizationSerializer()
@@ -25,8 +28,35 @@ class ContactSerializer(serializers.ModelSerializer):
     def get_country(self, obj):
         return obj.get_country_display()
 
+    # the Contact properties of the same name query per row; these read the
+    # prefetched teams and assignees instead
+    def _profiles(self, profiles):
+        unique = {profile.id: profile for profile in profiles}
+        ordered = sorted(unique.values(), key=lambda p: p.created_at, reverse=True)
+        return ProfileSerializer(ordered, many=True).data
+
+    def _team_profiles(self, obj):
+        return [profile for team in obj.teams.all() for profile in team.users.all()]
+
+    @extend_schema_field(ProfileSerializer(many=True))
+    def get_get_team_users(self, obj):
+        return self._profiles(self._team_profiles(obj))
+
+    @extend_schema_field(ProfileSerializer(many=True))
+    def get_get_team_and_assigned_users(self, obj):
+        return self._profiles(self._team_profiles(obj) + list(obj.assigned_to.all()))
+
+    @extend_schema_field(ProfileSerializer(many=True))
+    def get_get_assigned_users_not_in_teams(self, obj):
+        team_ids = {profile.id for profile in self._team_profiles(obj)}
+        return self._profiles(
+            profile for profile in obj.assigned_to.all() if profile.id not in team_ids
+        )
+
     class Meta:
         model = Contact
+        list_serializer_class = EagerLoadingListSerializer
+        prefetch_related = ("teams__users__user", "assigned_to__user")
         fields = (
             "id",
             "salutation",
@@ -113,6 +143,16 @@ class CreateContactSerializer(serializers.ModelSerializer):
         )
 
 
+class ContactBulkSerializer(BulkRecordSerializer):
+    unique_in_org = ("first_name",)
+    unique = ("primary_email", "mobile_number")
+
+    class Meta(BulkRecordSerializer.Meta):
+        model = Contact
+        fields = tuple(
+            field for field in CreateContactSerializer.Meta.fields if field != "address"
+        ) + ("id", "assigned_to", "teams")
+
 class ContactDetailEditSwaggerSerializer(serializers.Serializer):
     comment = serializers.CharField()
     contact_attachment = serializers.FileField()
@@ -14,6 +14,9 @@ contact_list_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("assigned_to", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
 
 contact_create_post_params = [
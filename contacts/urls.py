@@ -1,11 +1,14 @@
 from django.urls import path
 
+from common.views import BulkView, ExportView
 from contacts import views
 
 app_name = "api_contacts"
 
 urlpatterns = [
     path("", views.ContactsListView.as_view()),
+    path("bulk/", BulkView.as_view(entity="contacts")),
+    path("export/", ExportView.as_view(entity="contacts")),
     path("<str:pk>/", views.ContactDetailView.as_view()),
     path("comment/<str:pk>/", views.ContactCommentView.as_view()),
     path("attachment/<str:pk>/", views.ContactAttachmentView.as_view()),
@@ -1,15 +1,19 @@
 import json
 
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
+from common.response_cache import ALL, cache_response
 from common.serializer import (
     AttachmentsSerializer,
     BillingAddressSerializer,
@@ -26,14 +30,14 @@ from tasks.serializer import TaskSerializer
 from teams.models import Teams
 
 
-class ContactsListView(APIView, LimitOffsetPagination):
+class ContactsListView(APIView, KeysetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Contact
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             queryset = queryset.filter(
                 Q(assigned_to__in=[self.request.profile])
@@ -59,16 +63,14 @@ class ContactsListView(APIView, LimitOffsetPagination):
             queryset.distinct(), self.request, view=self
         )
         contacts = ContactSerializer(results_contact, many=True).data
-        if results_contact:
-            offset = queryset.filter(id__gte=results_contact[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context.update({"contacts_count": self.count, "offset": offset})
+        context["per_page"] = self.limit
+        context.update(
+            {
+                "contacts_count": self.count,
+                "next_cursor": self.next_cursor,
+                "previous_cursor": self.previous_cursor,
+            }
+        )
         context["contact_obj_list"] = contacts
         context["countries"] = COUNTRIES
         users = Profile.objects.filter(is_active=True, org=self.request.profile.org).values(
@@ -81,6 +83,7 @@ class ContactsListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["contacts"], parameters=swagger_params1.contact_list_get_params
     )
+    @cache_response("contacts", "attachments", "profiles", "teams")
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -88,6 +91,7 @@ class ContactsListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["contacts"], parameters=swagger_params1.organization_params,request=CreateContactSerializer
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         params = request.data
         contact_serializer = CreateContactSerializer(data=params, request_obj=request)
@@ -121,7 +125,8 @@ class ContactsListView(APIView, LimitOffsetPagination):
             contact_obj.assigned_to.add(*profiles)
 
         recipients = list(contact_obj.assigned_to.all().values_list("id", flat=True))
-        send_email_to_assigned_user.delay(
+        enqueue(
+            send_email_to_assigned_user,
             recipients,
             contact_obj.id,
         )
@@ -150,6 +155,7 @@ class ContactDetailView(APIView):
     @extend_schema(
         tags=["contacts"], parameters=swagger_params1.contact_create_post_params,request=CreateContactSerializer
     )
+    @transaction.atomic
     def put(self, request, pk, format=None):
         data = request.data
         contact_obj = self.get_object(pk=pk)
@@ -199,30 +205,24 @@ class ContactDetailView(APIView):
             contact_obj.address = address_obj
             contact_obj.save()
             contact_obj = contact_serializer.save()
-            contact_obj.teams.clear()
-            if data.get("teams"):
-                teams_list = json.loads(data.get("teams"))
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                contact_obj.teams.add(*teams)
-
-            contact_obj.assigned_to.clear()
-            if data.get("assigned_to"):
-                assinged_to_list = json.loads(data.get("assigned_to"))
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org
-                )
-                contact_obj.assigned_to.add(*profiles)
-
-            previous_assigned_to_users = list(
-                contact_obj.assigned_to.all().values_list("id", flat=True)
+            teams_list = json.loads(data.get("teams")) if data.get("teams") else []
+            sync_m2m(
+                contact_obj,
+                "teams",
+                Teams.objects.filter(id__in=teams_list, org=request.profile.org),
             )
 
-            assigned_to_list = list(
-                contact_obj.assigned_to.all().values_list("id", flat=True)
+            assigned_to_list = (
+                json.loads(data.get("assigned_to")) if data.get("assigned_to") else []
+            )
+            recipients, _ = sync_m2m(
+                contact_obj,
+                "assigned_to",
+                Profile.objects.filter(id__in=assigned_to_list, org=request.profile.org),
             )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email_to_assigned_user.delay(
-                recipients,
+            enqueue(
+                send_email_to_assigned_user,
+                list(recipients),
                 contact_obj.id,
             )
             if request.FILES.get("contact_attachment"):
@@ -240,6 +240,7 @@ class ContactDetailView(APIView):
     @extend_schema(
         tags=["contacts"], parameters=swagger_params1.organization_params
     )
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, format=None):
         context = {}
         contact_obj = self.get_object(pk)
@@ -2,6 +2,7 @@ import os
 from datetime import timedelta
 
 from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # JWT_AUTH = {
@@ -58,6 +59,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.sessions",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "phonenumber_field",
     "rest_framework",
     "rest_framework_simplejwt",
@@ -79,6 +81,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "common.middleware.metrics.RequestMetrics",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -132,6 +135,114 @@ DATABASES = {
     }
 }
 
+# the lookup, response, auth and dashboard caches are invalidated through
+# this cache (generation counters, deleted keys), so every web and worker
+# process must share it: with a per-process LocMemCache one process keeps
+# serving what another one changed. It is only allowed for a dev setup.
+if os.environ.get("REDIS_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_CACHE_URL"],
+        }
+    }
+elif os.environ["ENV_TYPE"] != "dev":
+    raise ImproperlyConfigured("REDIS_CACHE_URL is required when ENV_TYPE is not dev")
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# reference data served by /api/lookups/ is versioned, this only bounds memory
+LOOKUP_CACHE_TIMEOUT = int(os.environ.get("LOOKUP_CACHE_TIMEOUT", 60 * 60))
+
+# rows read, de-duplicated and inserted per round trip by the lead importer
+LEAD_IMPORT_CHUNK_SIZE = int(os.environ.get("LEAD_IMPORT_CHUNK_SIZE", 2000))
+
+# rows fetched per server-side cursor round trip and encoded per streamed
+# chunk by the /export/ endpoints, see common/export.py
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+# background export jobs: rows per gzipped part, lifetime of the signed
+# download links and how long jobs and their files are kept (seconds)
+EXPORT_FILE_ROWS = int(os.environ.get("EXPORT_FILE_ROWS", 500000))
+EXPORT_URL_MAX_AGE = int(os.environ.get("EXPORT_URL_MAX_AGE", 60 * 60))
+EXPORT_RETENTION = int(os.environ.get("EXPORT_RETENTION", 60 * 60 * 24 * 7))
+
+# records accepted per request by the /bulk/ endpoints, see common/bulk.py
+BULK_MAX_RECORDS = int(os.environ.get("BULK_MAX_RECORDS", 1000))
+
+# resolved users/profiles of authenticated requests, see common/auth_cache.py
+AUTH_CACHE_TIMEOUT = int(os.environ.get("AUTH_CACHE_TIMEOUT", 60))
+AUTH_LOCAL_CACHE_TTL = int(os.environ.get("AUTH_LOCAL_CACHE_TTL", 5))
+AUTH_LOCAL_CACHE_SIZE = int(os.environ.get("AUTH_LOCAL_CACHE_SIZE", 1024))
+
+# per-process slug -> id cache of common/tags.py, retired by generation
+TAG_CACHE_SIZE = int(os.environ.get("TAG_CACHE_SIZE", 4096))
+TAG_CACHE_TTL = int(os.environ.get("TAG_CACHE_TTL", 60 * 60))
+
+# cached GET responses, see common/response_cache.py; entries are retired by
+# generation stamps, the timeout only bounds memory (0 turns the cache off)
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 60 * 10))
+
+# dashboard snapshots served by ApiHomeView, see common/dashboard.py
+DASHBOARD_RECENT_LIMIT = int(os.environ.get("DASHBOARD_RECENT_LIMIT", 10))
+DASHBOARD_REFRESH_DELAY = int(os.environ.get("DASHBOARD_REFRESH_DELAY", 30))
+DASHBOARD_MAX_AGE = int(os.environ.get("DASHBOARD_MAX_AGE", 60 * 60))
+
+# assignment notifications, see common/notifications.py; the rate limit is in
+# messages per second for all workers together, counted in the shared cache
+# (14 is the default SES sending rate, 0 disables it)
+NOTIFICATION_BATCH_SIZE = int(os.environ.get("NOTIFICATION_BATCH_SIZE", 100))
+NOTIFICATION_RATE_LIMIT = float(os.environ.get("NOTIFICATION_RATE_LIMIT", 14))
+NOTIFICATION_MAX_RETRIES = int(os.environ.get("NOTIFICATION_MAX_RETRIES", 3))
+NOTIFICATION_RETRY_DELAY = float(os.environ.get("NOTIFICATION_RETRY_DELAY", 1))
+
+# scheduled account emails, see accounts/scheduler.py; each email is sent
+# by parallel tasks of ACCOUNT_EMAIL_CHUNK_SIZE recipients
+ACCOUNT_EMAIL_CHUNK_SIZE = int(os.environ.get("ACCOUNT_EMAIL_CHUNK_SIZE", 500))
+SCHEDULED_EMAIL_BATCH_SIZE = int(os.environ.get("SCHEDULED_EMAIL_BATCH_SIZE", 100))
+SCHEDULED_EMAIL_REQUEUE_AFTER = int(
+    os.environ.get("SCHEDULED_EMAIL_REQUEUE_AFTER", 60 * 60)
+)
+
+# invoice numbers, see invoices/numbering.py: the format gets ``date`` and
+# ``number``, the counter restarts whenever the strftime of the period changes
+INVOICE_NUMBER_FORMAT = os.environ.get("INVOICE_NUMBER_FORMAT", "{date:%d%m%Y}{number:04d}")
+INVOICE_NUMBER_PERIOD = os.environ.get("INVOICE_NUMBER_PERIOD", "%Y%m%d")
+# invoice history stores diffs, with the full state every N versions, see
+# invoices/history.py
+INVOICE_HISTORY_SNAPSHOT_EVERY = int(os.environ.get("INVOICE_HISTORY_SNAPSHOT_EVERY", 20))
+# invoice PDFs, see invoices/pdf.py: bump the version after changing their
+# styling to render them again, point the queue at a worker pool of its own
+# (celery worker -Q pdf) to keep the renders from holding up other tasks
+INVOICE_PDF_TEMPLATE_VERSION = os.environ.get("INVOICE_PDF_TEMPLATE_VERSION", "1")
+INVOICE_PDF_QUEUE = os.environ.get("INVOICE_PDF_QUEUE", "celery")
+INVOICE_PDF_RENDER_TIMEOUT = int(os.environ.get("INVOICE_PDF_RENDER_TIMEOUT", 60 * 5))
+
+# tasks queued by the API go through the outbox table, see common/outbox.py
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 500))
+OUTBOX_RELAY_INTERVAL = int(os.environ.get("OUTBOX_RELAY_INTERVAL", 5))
+OUTBOX_RETRY_DELAY = int(os.environ.get("OUTBOX_RETRY_DELAY", 30))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 10))
+
+# per-endpoint request metrics served to Prometheus at /metrics/, see
+# common/metrics.py; the scraper has to send METRICS_TOKEN in the
+# X-Metrics-Token header (no token, no endpoint) and, if any are listed,
+# connect from one of METRICS_ALLOWED_IPS, which behind a reverse proxy is
+# the proxy's address and so no protection on its own. Requests slower than
+# METRICS_SLOW_REQUEST seconds or running METRICS_SLOW_QUERIES queries are
+# logged with their most repeated SQL (0 turns either check off)
+METRICS_ENABLED = bool(int(os.environ.get("METRICS_ENABLED", 1)))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get("METRICS_ALLOWED_IPS", "").split(",") if ip
+]
+METRICS_FLUSH_INTERVAL = int(os.environ.get("METRICS_FLUSH_INTERVAL", 15))
+METRICS_SLOW_REQUEST = float(os.environ.get("METRICS_SLOW_REQUEST", 1))
+METRICS_SLOW_QUERIES = int(os.environ.get("METRICS_SLOW_QUERIES", 100))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.10/ref/settings/#auth-password-validators
@@ -184,6 +295,24 @@ ADMIN_EMAIL = os.environ["ADMIN_EMAIL"]
 # celery Tasks
 CELERY_BROKER_URL = os.environ["CELERY_BROKER_URL"]
 CELERY_RESULT_BACKEND = os.environ["CELERY_RESULT_BACKEND"]
+CELERY_BEAT_SCHEDULE = {
+    "refresh-stale-dashboards": {
+        "task": "common.tasks.refresh_stale_dashboards",
+        "schedule": 60 * 5,
+    },
+    "send-scheduled-emails": {
+        "task": "accounts.tasks.send_scheduled_emails",
+        "schedule": 60,
+    },
+    "delete-expired-exports": {
+        "task": "common.tasks.delete_expired_exports",
+        "schedule": 60 * 60,
+    },
+    "relay-outbox": {
+        "task": "common.tasks.relay_outbox",
+        "schedule": OUTBOX_RELAY_INTERVAL,
+    },
+}
 
 
 LOGGING = {
@@ -257,12 +386,12 @@ SETTINGS_EXPORT = ["APPLICATION_NAME"]
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
     "DEFAULT_AUTHENTICATION_CLASSES": (
+        "common.external_auth.CustomDualAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "common.external_auth.CustomDualAuthentication"
         # "rest_framework.authentication.SessionAuthentication",
         # "rest_framework.authentication.BasicAuthentication",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "common.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -294,7 +423,8 @@ SWAGGER_SETTINGS = {
     },
 }
 
-CORS_ALLOW_HEADERS = default_headers + ("org",)
+CORS_ALLOW_HEADERS = default_headers + ("org", "if-none-match")
+CORS_EXPOSE_HEADERS = ["ETag"]
 CORS_ORIGIN_ALLOW_ALL = True
 CSRF_TRUSTED_ORIGINS = ["https://*.runcode.io", "http://*"]
 
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['org', '-created_at', '-id'], name='event_org_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "event_assigned_to_rev_idx" ON "event_assigned_to" ("profile_id", "event_id")',
+            'DROP INDEX IF EXISTS "event_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "event_teams_rev_idx" ON "event_teams" ("teams_id", "event_id")',
+            'DROP INDEX IF EXISTS "event_teams_rev_idx"',
+        ),
+    ]
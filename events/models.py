@@ -62,6 +62,12 @@ class Event(BaseModel):
         verbose_name_plural = "Events"
         db_table = "event"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"],
+                name="event_org_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 from rest_framework import serializers
 
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
@@ -25,6 +26,7 @@ class EventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "name",
@@ -19,6 +19,9 @@ event_list_get_params = [
         OpenApiParameter.QUERY,
         OpenApiTypes.DATE
     ),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
 
 event_detail_post_params = [
@@ -1,11 +1,13 @@
 from django.urls import path
 
+from common.views import ExportView
 from events import views
 
 app_name = "api_events"
 
 urlpatterns = [
     path("", views.EventListView.as_view()),
+    path("export/", ExportView.as_view(entity="events")),
     path("<str:pk>/", views.EventDetailView.as_view()),
     path("comment/<str:pk>/", views.EventCommentView.as_view()),
     path("attachment/<str:pk>/", views.EventAttachmentView.as_view()),
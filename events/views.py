@@ -1,18 +1,22 @@
 import json
 from datetime import datetime, timedelta
 
+from django.db import transaction
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile, User
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
 
 #from common.external_auth import CustomDualAuthentication
+from common.response_cache import ALL, cache_response
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
@@ -38,14 +42,14 @@ WEEKDAYS = (
 )
 
 
-class EventListView(APIView, LimitOffsetPagination):
+class EventListView(APIView, KeysetPagination):
     model = Event
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         contacts = Contact.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             queryset = queryset.filter(
@@ -72,13 +76,13 @@ class EventListView(APIView, LimitOffsetPagination):
         context = {}
         results_events = self.paginate_queryset(queryset, self.request, view=self)
         events = EventSerializer(results_events, many=True).data
-        if results_events:
-            offset = queryset.filter(id__gte=results_events[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
-        context.update({"events_count": self.count, "offset": offset})
+        context.update(
+            {
+                "events_count": self.count,
+                "next_cursor": self.next_cursor,
+                "previous_cursor": self.previous_cursor,
+            }
+        )
         context["events"] = events
         context["recurring_days"] = WEEKDAYS
         context["contacts_list"] = ContactSerializer(contacts, many=True).data
@@ -87,6 +91,7 @@ class EventListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["Events"], parameters=swagger_params1.event_list_get_params
     )
+    @cache_response("events", "contacts", "profiles", "teams")
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -94,6 +99,7 @@ class EventListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["Events"], parameters=swagger_params1.organization_params,request=EventCreateSwaggerSerializer
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         params = request.data
         data = {}
@@ -132,7 +138,8 @@ class EventListView(APIView, LimitOffsetPagination):
                 assigned_to_list = list(
                     event_obj.assigned_to.all().values_list("id", flat=True)
                 )
-                send_email.delay(
+                enqueue(
+                    send_email,
                     event_obj.id,
                     assigned_to_list,
                 )
@@ -192,7 +199,8 @@ class EventListView(APIView, LimitOffsetPagination):
                     assigned_to_list = list(
                         event.assigned_to.all().values_list("id", flat=True)
                     )
-                    send_email.delay(
+                    enqueue(
+                        send_email,
                         event.id,
                         assigned_to_list,
                     )
@@ -295,6 +303,7 @@ class EventDetailView(APIView):
     @extend_schema(
         tags=["Events"], parameters=swagger_params1.organization_params
     )
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, **kwargs):
         self.event_obj = self.get_object(pk)
         if self.event_obj.org != request.profile.org:
@@ -365,6 +374,7 @@ class EventDetailView(APIView):
     @extend_schema(
         tags=["Events"], parameters=swagger_params1.organization_params,request=EventCreateSwaggerSerializer
     )
+    @transaction.atomic
     def put(self, request, pk, **kwargs):
         params = request.data
         data = {}
@@ -381,40 +391,34 @@ class EventDetailView(APIView):
         )
         if serializer.is_valid():
             event_obj = serializer.save()
-            previous_assigned_to_users = list(
-                event_obj.assigned_to.all().values_list("id", flat=True)
-            )
             if params.get("event_type") == "Non-Recurring":
                 event_obj.date_of_meeting = event_obj.start_date
 
-            event_obj.contacts.clear()
-            if params.get("contacts"):
-                obj_contact = Contact.objects.filter(
-                    id=params.get("contacts"), org=request.profile.org
-                )
-                event_obj.contacts.add(obj_contact)
-
-            event_obj.teams.clear()
-            if params.get("teams"):
-                teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                event_obj.teams.add(*teams)
-
-            event_obj.assigned_to.clear()
-            if params.get("assigned_to"):
-                assinged_to_list = params.get("assigned_to")
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org
-                )
-                event_obj.assigned_to.add(*profiles)
-
-            assigned_to_list = list(
-                event_obj.assigned_to.all().values_list("id", flat=True)
+            sync_m2m(
+                event_obj,
+                "contacts",
+                Contact.objects.filter(
+                    id__in=params.get("contacts") or [], org=request.profile.org
+                ),
+            )
+            sync_m2m(
+                event_obj,
+                "teams",
+                Teams.objects.filter(
+                    id__in=params.get("teams") or [], org=request.profile.org
+                ),
+            )
+            recipients, _ = sync_m2m(
+                event_obj,
+                "assigned_to",
+                Profile.objects.filter(
+                    id__in=params.get("assigned_to") or [], org=request.profile.org
+                ),
             )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email.delay(
+            enqueue(
+                send_email,
                 event_obj.id,
-                recipients,
+                list(recipients),
             )
             return Response(
                 {"error": False, "message": "Event updated Successfully"},
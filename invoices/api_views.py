@@ -3,6 +3,7 @@ import json
 import pytz
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
+from django.db import transaction
 from django.db.models import Q
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
@@ -13,9 +14,11 @@ from rest_framework.views import APIView
 
 from accounts.models import Account
 from accounts.serializer import AccountSerializer
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, User
 
 #from common.external_auth import CustomDualAuthentication
+from common.outbox import enqueue
 from common.serializer import (
     AttachmentsSerializer,
     BillingAddressSerializer,
@@ -24,6 +27,7 @@ from common.serializer import (
 )
 from common.utils import COUNTRIES, CURRENCY_CODES
 from invoices import swagger_params1
+from invoices.history import get_versions
 from invoices.models import Invoice
 from invoices.serializer import (
     InvoiceCreateSerializer,
@@ -137,6 +141,7 @@ class InvoiceListView(APIView, LimitOffsetPagination):
         return Response(context)
 
     @extend_schema(tags=["Invoices"], parameters=swagger_params1.organization_params,request=InvoiceSwaggerSerailizer)
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         params = request.data
         data = {}
@@ -226,7 +231,8 @@ class InvoiceListView(APIView, LimitOffsetPagination):
             )
 
             recipients = assigned_to_list
-            send_email.delay(
+            enqueue(
+                send_email,
                 recipients,
                 invoice_obj.id,
                 domain=settings.DOMAIN_NAME,
@@ -250,6 +256,7 @@ class InvoiceDetailView(APIView):
     @swagger_auto_schema(
         tags=["Invoices"], manual_parameters=swagger_params1.invoice_create_post_params
     )
+    @transaction.atomic
     def put(self, request, pk, format=None):
         params = request.data
         invoice_obj = self.get_object(pk=pk)
@@ -294,9 +301,6 @@ class InvoiceDetailView(APIView):
             return Response({"error": True}, data)
         if serializer.is_valid():
             invoice_obj = serializer.save()
-            previous_assigned_to_users = list(
-                invoice_obj.assigned_to.all().values_list("id", flat=True)
-            )
             from_address_obj = from_address_serializer.save(
                 address_line=params.get("from_address_line"),
                 street=params.get("from_street"),
@@ -323,50 +327,32 @@ class InvoiceDetailView(APIView):
             invoice_obj.total_amount = quantity + tax
             invoice_obj.save()
 
-            invoice_obj.accounts.clear()
-            if params.get("accounts"):
-                accounts = params.get("accounts")
-                for account in accounts:
-                    obj_account = Account.objects.filter(
-                        id=account, company=request.company
-                    )
-                    if obj_account.exists():
-                        invoice_obj.accounts.add(account)
-                    else:
-                        data["accounts"] = "Please enter valid account"
-                        return Response({"error": True}, data)
+            accounts = set(params.get("accounts") or [])
+            valid = Account.objects.filter(id__in=accounts, company=request.company)
+            if valid.count() != len(accounts):
+                data["accounts"] = "Please enter valid account"
+                return Response({"error": True}, data)
+            sync_m2m(invoice_obj, "accounts", accounts)
 
+            recipients = set()
             if self.request.user.role == "ADMIN":
-                invoice_obj.teams.clear()
-                if params.get("teams"):
-                    teams = params.get("teams")
-                    for team in teams:
-                        obj_team = Teams.objects.filter(
-                            id=team, company=request.company
-                        )
-                        if obj_team.exists():
-                            invoice_obj.teams.add(team)
-                        else:
-                            data["team"] = "Please enter valid Team"
-                            return Response({"error": True}, data)
-
-                invoice_obj.assigned_to.clear()
-                if params.get("assigned_to"):
-                    assinged_to_users_ids = params.get("assigned_to")
-                    for user_id in assinged_to_users_ids:
-                        user = User.objects.filter(id=user_id, company=request.company)
-                        if user.exists():
-                            invoice_obj.assigned_to.add(user_id)
-                        else:
-                            data["assigned_to"] = "Please enter valid User"
-                            return Response({"error": True}, data)
-
-            assigned_to_list = list(
-                invoice_obj.assigned_to.all().values_list("id", flat=True)
-            )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email.delay(
-                recipients,
+                teams = set(params.get("teams") or [])
+                valid = Teams.objects.filter(id__in=teams, company=request.company)
+                if valid.count() != len(teams):
+                    data["team"] = "Please enter valid Team"
+                    return Response({"error": True}, data)
+                sync_m2m(invoice_obj, "teams", teams)
+
+                users = set(params.get("assigned_to") or [])
+                valid = User.objects.filter(id__in=users, company=request.company)
+                if valid.count() != len(users):
+                    data["assigned_to"] = "Please enter valid User"
+                    return Response({"error": True}, data)
+                recipients, _ = sync_m2m(invoice_obj, "assigned_to", users)
+
+            enqueue(
+                send_email,
+                list(recipients),
                 invoice_obj.id,
                 domain=settings.DOMAIN_NAME,
                 protocol=self.request.scheme,
@@ -463,7 +449,7 @@ class InvoiceDetailView(APIView):
                 "attachments": AttachmentsSerializer(attachments, many=True).data,
                 "comments": CommentSerializer(comments, many=True).data,
                 "invoice_history": InvoiceHistorySerializer(
-                    self.invoice.invoice_history.all(), many=True
+                    get_versions(self.invoice), many=True
                 ).data,
                 "accounts": AccountSerializer(
                     self.invoice.accounts.all(), many=True
@@ -0,0 +1,174 @@
+"""
+Compact, diff-based invoice history.
+
+Every version of an invoice is one ``InvoiceHistory`` row numbered by
+``version``. Its ``changes`` hold only the fields that differ from the
+previous version, except for the first version and every
+``INVOICE_HISTORY_SNAPSHOT_EVERY``-th after it, which hold the whole state.
+Any version is therefore rebuilt from the rows since the snapshot before it,
+read with one query on the (invoice, version) index: ``get_state`` and
+``get_versions``.
+
+``record_changes`` versions any number of invoices at once: one query
+locking the invoices, one for the rows since their last snapshots, one for
+their assignees and a single ``bulk_create``, so mass updates cost the same
+four queries as one edit. Invoices that did not change get no new version.
+The lock (``SELECT ... FOR UPDATE`` in id order) makes concurrent tasks on
+the same invoice take turns, so the second one numbers its version after
+the first instead of failing on ``invoice_history_version_uniq``.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, Max, OuterRef, QuerySet, Subquery
+
+from invoices.models import Invoice, InvoiceHistory
+
+TRACKED_FIELDS = (
+    "invoice_title",
+    "invoice_number",
+    "from_address",
+    "to_address",
+    "name",
+    "email",
+    "quantity",
+    "rate",
+    "tax",
+    "total_amount",
+    "currency",
+    "phone",
+    "amount_due",
+    "amount_paid",
+    "is_email_sent",
+    "status",
+    "details",
+    "due_date",
+)
+
+
+def _value(field, value):
+    # the same value must give the same JSON whether it was just assigned
+    # ("10") or read back from the database (Decimal("10.00"))
+    value = field.to_python(value) if not field.is_relation else value
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(field, DecimalField):
+        return "{:.{}f}".format(value, field.decimal_places)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def invoice_state(invoice, assigned_to=()):
+    """The tracked fields of ``invoice`` as JSON values."""
+    state = {}
+    for name in TRACKED_FIELDS:
+        field = Invoice._meta.get_field(name)
+        state[name] = _value(field, getattr(invoice, field.attname))
+    state["assigned_to"] = sorted(str(pk) for pk in assigned_to)
+    return state
+
+
+def _describe(changed):
+    names = [" ".join(field.split("_")).title() for field in changed]
+    if len(names) > 1:
+        return ", ".join(names[:-1]) + " and " + names[-1] + " have changed."
+    return names[0] + " has changed."
+
+
+def _since_snapshot(invoice_ids, version=None):
+    """The rows of ``invoice_ids`` from their last snapshot on, oldest first."""
+    rows = InvoiceHistory.objects.filter(invoice_id__in=invoice_ids)
+    snapshots = InvoiceHistory.objects.filter(
+        invoice_id=OuterRef("invoice_id"), is_snapshot=True
+    )
+    if version is not None:
+        rows = rows.filter(version__lte=version)
+        snapshots = snapshots.filter(version__lte=version)
+    last_snapshot = Subquery(
+        snapshots.values("invoice_id").annotate(last=Max("version")).values("last")
+    )
+    return rows.filter(version__gte=last_snapshot).order_by("invoice_id", "version")
+
+
+def _fold(rows):
+    """Apply ``rows`` (oldest first), yielding each row with its state."""
+    state = {}
+    for row in rows:
+        state = dict(row.changes) if row.is_snapshot else {**state, **row.changes}
+        yield row, state
+
+
+def get_state(invoice_id, version=None):
+    """The state of ``invoice_id`` as of ``version`` (the latest by default)."""
+    state = {}
+    for _, state in _fold(_since_snapshot([invoice_id], version)):
+        pass
+    return state
+
+
+def get_versions(invoice):
+    """Every version of ``invoice``, newest first, with its ``state`` set."""
+    rows = list(_fold(invoice.invoice_history.order_by("version")))
+    for row, state in rows:
+        row.state = state
+    return [row for row, _ in reversed(rows)]
+
+
+def _lock(invoices):
+    # a queryset is read under the lock, so its state is the committed one
+    if isinstance(invoices, QuerySet):
+        return list(invoices.select_for_update().order_by("id"))
+    invoices = list(invoices)
+    list(
+        Invoice.objects.select_for_update()
+        .filter(id__in=[invoice.id for invoice in invoices])
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    return invoices
+
+
+@transaction.atomic
+def record_changes(invoices, user=None):
+    """Write a version of every invoice of ``invoices`` that changed."""
+    invoices = _lock(invoices)
+    ids = [invoice.id for invoice in invoices]
+    latest = {}
+    for row, state in _fold(_since_snapshot(ids)):
+        latest[row.invoice_id] = (row.version, state)
+    assigned = {}
+    through = Invoice.assigned_to.through
+    for invoice_id, user_id in through.objects.filter(invoice_id__in=ids).values_list(
+        "invoice_id", "user_id"
+    ):
+        assigned.setdefault(invoice_id, []).append(user_id)
+
+    every = settings.INVOICE_HISTORY_SNAPSHOT_EVERY
+    versions = []
+    for invoice in invoices:
+        state = invoice_state(invoice, assigned.get(invoice.id, ()))
+        version, previous = latest.get(invoice.id, (0, None))
+        if previous is None:
+            changes, details = state, "Invoice Created."
+        else:
+            changes = {
+                field: value
+                for field, value in state.items()
+                if previous.get(field) != value
+            }
+            if not changes:
+                continue
+            details = _describe(changes)
+        version += 1
+        is_snapshot = previous is None or (version - 1) % every == 0
+        versions.append(
+            InvoiceHistory(
+                invoice=invoice,
+                version=version,
+                is_snapshot=is_snapshot,
+                changes=state if is_snapshot else changes,
+                details=details,
+                updated_by=user,
+            )
+        )
+    return InvoiceHistory.objects.bulk_create(versions)
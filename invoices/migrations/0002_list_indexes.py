@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['org', 'status', '-created_at', '-id'], name='invoice_org_status_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "invoice_assigned_to_rev_idx" ON "invoice_assigned_to" ("user_id", "invoice_id")',
+            'DROP INDEX IF EXISTS "invoice_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "invoice_teams_rev_idx" ON "invoice_teams" ("teams_id", "invoice_id")',
+            'DROP INDEX IF EXISTS "invoice_teams_rev_idx"',
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_counters(apps, schema_editor):
+    # carry on from the numbers the old generator handed out today
+    Invoice = apps.get_model("invoices", "Invoice")
+    InvoiceCounter = apps.get_model("invoices", "InvoiceCounter")
+    today = timezone.localdate()
+    prefix = today.strftime("%d%m%Y")
+    latest = {}
+    numbers = Invoice.objects.filter(
+        org__isnull=False, invoice_number__startswith=prefix
+    ).values_list("org_id", "invoice_number")
+    for org_id, number in numbers:
+        suffix = number[len(prefix):]
+        if suffix.isdigit():
+            latest[org_id] = max(latest.get(org_id, 0), int(suffix))
+    InvoiceCounter.objects.bulk_create(
+        [
+            InvoiceCounter(org_id=org_id, period=today.strftime("%Y%m%d"), value=value)
+            for org_id, value in latest.items()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0013_export_job'),
+        ('invoices', '0002_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(blank=True, max_length=20)),
+                ('value', models.PositiveIntegerField(default=0)),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_counters', to='common.org')),
+            ],
+            options={
+                'db_table': 'invoice_counter',
+                'constraints': [models.UniqueConstraint(fields=('org', 'period'), name='invoice_counter_org_period_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
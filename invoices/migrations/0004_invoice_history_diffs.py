@@ -0,0 +1,178 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+import django.core.serializers.json
+from django.conf import settings
+from django.db import migrations, models
+
+
+LEGACY_FIELDS = (
+    "invoice_title",
+    "invoice_number",
+    "from_address",
+    "to_address",
+    "name",
+    "email",
+    "quantity",
+    "rate",
+    "total_amount",
+    "currency",
+    "phone",
+    "amount_due",
+    "amount_paid",
+    "is_email_sent",
+    "status",
+    "due_date",
+)
+
+# tracked now but never copied to the legacy rows: taken from the invoice,
+# or the first edit after the migration would report them as changed
+INVOICE_FIELDS = ("tax", "details")
+
+
+def _json(value):
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def convert_history(apps, schema_editor):
+    # every legacy row held the whole invoice, so it becomes a snapshot
+    InvoiceHistory = apps.get_model("invoices", "InvoiceHistory")
+    Invoice = apps.get_model("invoices", "Invoice")
+    invoices = {
+        values.pop("id"): values
+        for values in Invoice.objects.filter(
+            id__in=InvoiceHistory.objects.values("invoice_id")
+        )
+        .values("id", *INVOICE_FIELDS)
+        .iterator()
+    }
+    assigned = {}
+    through = InvoiceHistory.assigned_to.through
+    for history_id, user_id in through.objects.values_list(
+        "invoicehistory_id", "user_id"
+    ):
+        assigned.setdefault(history_id, []).append(str(user_id))
+    versions = {}
+    rows = []
+    for row in InvoiceHistory.objects.order_by("invoice_id", "created_at").iterator():
+        versions[row.invoice_id] = versions.get(row.invoice_id, 0) + 1
+        row.version = versions[row.invoice_id]
+        row.is_snapshot = True
+        row.changes = {
+            name: _json(getattr(row, InvoiceHistory._meta.get_field(name).attname))
+            for name in LEGACY_FIELDS
+        }
+        for name, value in invoices.get(row.invoice_id, {}).items():
+            row.changes[name] = _json(value)
+        row.changes["assigned_to"] = sorted(assigned.get(row.id, ()))
+        rows.append(row)
+        if len(rows) == 1000:
+            InvoiceHistory.objects.bulk_update(rows, ["version", "is_snapshot", "changes"])
+            rows = []
+    InvoiceHistory.objects.bulk_update(rows, ["version", "is_snapshot", "changes"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0003_invoice_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='changes',
+            field=models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='is_snapshot',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(convert_history, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='amount_due',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='amount_paid',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='assigned_to',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='currency',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='due_date',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='email',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='from_address',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='invoice_number',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='invoice_title',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='is_email_sent',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='phone',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='quantity',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='rate',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='to_address',
+        ),
+        migrations.RemoveField(
+            model_name='invoicehistory',
+            name='total_amount',
+        ),
+        migrations.AlterModelOptions(
+            name='invoicehistory',
+            options={'ordering': ('-version',), 'verbose_name': 'InvoiceHistory', 'verbose_name_plural': 'InvoiceHistories'},
+        ),
+        migrations.AddConstraint(
+            model_name='invoicehistory',
+            constraint=models.UniqueConstraint(fields=('invoice', 'version'), name='invoice_history_version_uniq'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:50
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # built without locking writes to the table
+    atomic = False
+
+    dependencies = [
+        ('invoices', '0004_invoice_history_diffs'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='invoice',
+            index=models.Index(fields=['org', '-created_at', '-id'], name='invoice_org_created_idx'),
+        ),
+    ]
@@ -1,7 +1,7 @@
-import datetime
-
 import arrow
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 
@@ -75,6 +75,17 @@ class Invoice(BaseModel):
         verbose_name_plural = "Invoices"
         db_table = "invoice"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "status", "-created_at", "-id"],
+                name="invoice_org_status_created_idx",
+            ),
+            # the default list order, without a status filter
+            models.Index(
+                fields=["org", "-created_at", "-id"],
+                name="invoice_org_created_idx",
+            ),
+        ]
 
     def __str__(self):
         """Unicode representation of Invoice."""
@@ -82,19 +93,10 @@ class Invoice(BaseModel):
 
     def save(self, *args, **kwargs):
         if not self.invoice_number:
-            self.invoice_number = self.invoice_id_generator()
-            while Invoice.objects.filter(invoice_number=self.invoice_number).exists():
-                self.invoice_number = self.invoice_id_generator(
-                    prev_invoice_number=self.invoice_number
-                )
-        super(Invoice, self).save(*args, **kwargs)
+            from invoices.numbering import next_invoice_number
 
-    def invoice_id_generator(self, prev_invoice_number=None):
-        if prev_invoice_number:
-            prev_invoice_number += 1
-            return prev_invoice_number
-        date = datetime.datetime.now().strftime("%d%m%Y")
-        return int(date + "0001")
+            self.invoice_number = next_invoice_number(self.org_id)
+        super(Invoice, self).save(*args, **kwargs)
 
     def formatted_total_amount(self):
         return self.currency + " " + str(self.total_amount)
@@ -153,91 +155,78 @@ class Invoice(BaseModel):
         return User.objects.filter(id__in=list(user_ids))
 
 
-class InvoiceHistory(BaseModel):
-    """Model definition for InvoiceHistory.
-    This model is used to track/keep a record of the updates made to original invoice object."""
+class InvoiceCounter(models.Model):
+    """The last invoice number handed out to an org in a period, see invoices/numbering.py."""
 
-    INVOICE_STATUS = (
-        ("Draft", "Draft"),
-        ("Sent", "Sent"),
-        ("Paid", "Paid"),
-        ("Pending", "Pending"),
-        ("Cancelled", "Cancel"),
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="invoice_counters"
     )
+    period = models.CharField(max_length=20, blank=True)
+    value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "invoice_counter"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "period"], name="invoice_counter_org_period_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.org_id} {self.period}: {self.value}"
+
+
+class InvoiceHistory(BaseModel):
+    """
+    One version of an invoice, see invoices/history.py: ``changes`` holds
+    the fields that changed since the previous version, or the whole state
+    when ``is_snapshot``. ``details`` describes the change.
+    """
+
     invoice = models.ForeignKey(
         Invoice, on_delete=models.CASCADE, related_name="invoice_history"
     )
-    invoice_title = models.CharField(_("Invoice Title"), max_length=50)
-    invoice_number = models.CharField(_("Invoice Number"), max_length=50)
-    from_address = models.ForeignKey(
-        Address,
-        related_name="invoice_history_from_address",
-        on_delete=models.SET_NULL,
-        null=True,
-    )
-    to_address = models.ForeignKey(
-        Address,
-        related_name="invoice_history_to_address",
-        on_delete=models.SET_NULL,
-        null=True,
-    )
-    name = models.CharField(_("Name"), max_length=100)
-    email = models.EmailField(_("Email"))
-    assigned_to = models.ManyToManyField(
-        User, related_name="invoice_history_assigned_to"
-    )
-    # quantity is the number of hours worked
-    quantity = models.PositiveIntegerField(default=0)
-    # rate is the rate charged
-    rate = models.DecimalField(default=0, max_digits=12, decimal_places=2)
-    # total amount is product of rate and quantity
-    total_amount = models.DecimalField(
-        blank=True, null=True, max_digits=12, decimal_places=2
-    )
-    currency = models.CharField(
-        max_length=3, choices=CURRENCY_CODES, blank=True, null=True
-    )
-    phone = PhoneNumberField(null=True, blank=True)
-    # created_by = models.ForeignKey(
-    #     User, related_name='invoice_history_created_by',
-    #     on_delete=models.SET_NULL, null=True)
+    version = models.PositiveIntegerField(default=1)
+    is_snapshot = models.BooleanField(default=False)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
     updated_by = models.ForeignKey(
         User,
         related_name="invoice_history_created_by",
         on_delete=models.SET_NULL,
         null=True,
     )
-
-    amount_due = models.DecimalField(
-        blank=True, null=True, max_digits=12, decimal_places=2
-    )
-    amount_paid = models.DecimalField(
-        blank=True, null=True, max_digits=12, decimal_places=2
-    )
-    is_email_sent = models.BooleanField(default=False)
-    status = models.CharField(choices=INVOICE_STATUS, max_length=15, default="Draft")
-    # details or description here stores the fields changed in the original invoice object
     details = models.TextField(_("Details"), null=True, blank=True)
-    due_date = models.DateField(blank=True, null=True)
 
     class Meta:
         verbose_name = "InvoiceHistory"
         verbose_name_plural = "InvoiceHistories"
         db_table = "invoice_history"
-        ordering = ("-created_at",)
+        ordering = ("-version",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice", "version"], name="invoice_history_version_uniq"
+            ),
+        ]
 
     def __str__(self):
         """Unicode representation of Invoice."""
-        return self.invoice_number
+        return self.state["invoice_number"]
+
+    @cached_property
+    def state(self):
+        """The whole invoice as of this version."""
+        from invoices.history import get_state
+
+        return get_state(self.invoice_id, self.version)
 
     def formatted_total_amount(self):
-        return self.currency + " " + str(self.total_amount)
+        return self.state["currency"] + " " + str(self.state["total_amount"])
 
     def formatted_rate(self):
-        return str(self.rate) + " " + self.currency
+        return str(self.state["rate"]) + " " + self.state["currency"]
 
     def formatted_total_quantity(self):
-        return str(self.quantity) + " " + "Hours"
+        return str(self.state["quantity"]) + " " + "Hours"
 
     @property
     def created_on_arrow(self):
@@ -0,0 +1,51 @@
+"""
+Invoice numbers handed out from a counter row per org and period.
+
+``next_invoice_number`` bumps the counter of the org with a single upsert
+(``INSERT ... ON CONFLICT DO UPDATE ... RETURNING``): one round trip however
+many invoices the org already has, where the old generator probed
+``exists()`` once per invoice numbered that day. The row lock the upsert
+takes is held until the surrounding transaction ends, so concurrent invoices
+of an org are numbered one after the other and never collide, and the
+number of an invoice whose transaction rolls back is handed out again.
+
+Numbers are ``INVOICE_NUMBER_FORMAT`` formatted with ``date`` (today in
+``TIME_ZONE``) and ``number`` (the counter), and the counter starts over at
+1 whenever the ``INVOICE_NUMBER_PERIOD`` strftime of the date changes. The
+defaults keep the ddmmyyyyNNNN numbers of the old generator, now per org.
+"""
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from common.models import Org
+from invoices.models import InvoiceCounter
+
+
+def next_invoice_number(org_id, date=None):
+    if org_id is None:
+        raise ValueError("Invoices are numbered per org, the invoice has none")
+    date = date or timezone.localdate()
+    qn = connection.ops.quote_name
+    opts = InvoiceCounter._meta
+    sql = (
+        "INSERT INTO {table} ({org}, {period}, {value}) VALUES (%s, %s, 1) "
+        "ON CONFLICT ({org}, {period}) "
+        "DO UPDATE SET {value} = {table}.{value} + 1 "
+        "RETURNING {value}"
+    ).format(
+        table=qn(opts.db_table),
+        org=qn(opts.get_field("org").column),
+        period=qn(opts.get_field("period").column),
+        value=qn(opts.get_field("value").column),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            [
+                Org._meta.pk.get_db_prep_value(org_id, connection),
+                date.strftime(settings.INVOICE_NUMBER_PERIOD),
+            ],
+        )
+        (number,) = cursor.fetchone()
+    return settings.INVOICE_NUMBER_FORMAT.format(date=date, number=number)
@@ -0,0 +1,86 @@
+"""
+Invoice PDFs rendered off the request path and cached by content.
+
+A PDF is ``invoice_download_pdf.html`` rendered by wkhtmltopdf (pdfkit),
+which takes seconds, so it only ever runs in the ``render_invoice_pdf``
+task, routed to the ``INVOICE_PDF_QUEUE`` workers. The file is saved
+through the default storage (S3 in production, the filesystem locally)
+under the sha256 of the rendered HTML and ``INVOICE_PDF_TEMPLATE_VERSION``:
+an invoice that did not change keeps its name, so downloads and emails are
+served from storage, and any edit (or a version bump after changing the
+styling or the pdfkit options) gives a new name that is rendered once.
+Older PDFs of the invoice are deleted when a new one is saved.
+
+Rendering the HTML and hashing it is cheap; ``get_pdf`` does that and
+checks the storage, ``request_pdf`` also queues the render when the PDF
+is missing, once per content hash however often it is asked for.
+"""
+import hashlib
+import posixpath
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+
+TEMPLATE = "invoice_download_pdf.html"
+PDFKIT_OPTIONS = {"encoding": "UTF-8", "quiet": ""}
+
+
+def render_html(invoice):
+    return render_to_string(TEMPLATE, context={"invoice": invoice})
+
+
+def pdf_name(invoice, html):
+    """The storage name of the PDF of ``invoice`` rendered from ``html``."""
+    digest = hashlib.sha256(
+        "{}\n{}".format(settings.INVOICE_PDF_TEMPLATE_VERSION, html).encode("utf-8")
+    ).hexdigest()
+    return "invoices/pdf/{}/{}/{}.pdf".format(invoice.org_id, invoice.id, digest)
+
+
+def get_pdf(invoice):
+    """The storage name of the current PDF of ``invoice``, None if not rendered."""
+    name = pdf_name(invoice, render_html(invoice))
+    return name if default_storage.exists(name) else None
+
+
+def request_pdf(invoice):
+    """
+    The storage name of the current PDF of ``invoice``, or None after
+    queueing its render.
+    """
+    from invoices.tasks import render_invoice_pdf
+
+    name = pdf_name(invoice, render_html(invoice))
+    if default_storage.exists(name):
+        return name
+    # one render per content, however many downloads wait for it
+    if cache.add("invoice-pdf:" + name, True, settings.INVOICE_PDF_RENDER_TIMEOUT):
+        render_invoice_pdf.apply_async(
+            args=[str(invoice.id)], queue=settings.INVOICE_PDF_QUEUE
+        )
+    return None
+
+
+def html_to_pdf(html):
+    import pdfkit
+
+    return pdfkit.from_string(html, False, options=PDFKIT_OPTIONS)
+
+
+def render_pdf(invoice):
+    """Render and save the PDF of ``invoice`` unless cached, return its name."""
+    html = render_html(invoice)
+    name = pdf_name(invoice, html)
+    if default_storage.exists(name):
+        return name
+    content = html_to_pdf(html)
+    name = default_storage.save(name, ContentFile(content))
+    folder = posixpath.dirname(name)
+    for stale in default_storage.listdir(folder)[1]:
+        if posixpath.join(folder, stale) != name:
+            default_storage.delete(posixpath.join(folder, stale))
+    cache.delete("invoice-pdf:" + name)
+    return name
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import (
     BillingAddressSerializer,
     OrganizationSerializer,
@@ -19,6 +20,7 @@ class InvoiceSerailizer(serializers.ModelSerializer):
 
     class Meta:
         model = Invoice
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "invoice_title",
@@ -49,26 +51,17 @@ class InvoiceSerailizer(serializers.ModelSerializer):
 
 class InvoiceHistorySerializer(serializers.ModelSerializer):
     updated_by = UserSerializer()
+    state = serializers.JSONField(read_only=True)
 
     class Meta:
         model = InvoiceHistory
         fields = (
             "id",
-            "invoice_title",
-            "invoice_number",
-            "status",
-            "due_date",
-            "name",
-            "email",
-            "phone",
+            "version",
+            "is_snapshot",
+            "changes",
+            "state",
             "created_at",
-            "currency",
-            "quantity",
-            "rate",
-            "total_amount",
-            "amount_due",
-            "amount_paid",
-            "is_email_sent",
             "details",
             "updated_by",
         )
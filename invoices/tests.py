@@ -6,7 +6,8 @@ from django.urls import reverse
 
 from accounts.models import Account
 from common.models import Address, Attachments, Comment, Company, User
-from invoices.models import Invoice, InvoiceHistory
+from invoices.history import record_changes
+from invoices.models import Invoice
 from teams.models import Teams
 
 
@@ -101,17 +102,7 @@ class InvoiceCreateTest(object):
         self.invoice.assigned_to.add(self.user1.id)
         self.invoice.accounts.add(self.account.id)
 
-        self.invoice_history = InvoiceHistory.objects.create(
-            invoice_title="invoice title",
-            invoice_number="invoice number",
-            currency="USD",
-            email="invoiceTitle@email.com",
-            due_date=(datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d"),
-            total_amount="1000",
-            from_address=self.from_address,
-            to_address=self.to_address,
-            invoice=self.invoice,
-        )
+        self.invoice_history = record_changes([self.invoice], self.user)[0]
 
         self.invoice_1 = Invoice.objects.create(
             invoice_title="invoice title",
@@ -0,0 +1,90 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from common.models import Org, User
+from invoices.history import get_state, get_versions, record_changes
+from invoices.models import Invoice, InvoiceHistory
+
+
+class InvoiceHistoryTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="history")
+        self.user = User.objects.create(email="history@example.com")
+        self.invoice = Invoice.objects.create(
+            invoice_title="title",
+            name="name",
+            email="a@example.com",
+            rate="10",
+            quantity=2,
+            org=self.org,
+        )
+
+    def update(self, **values):
+        for field, value in values.items():
+            setattr(self.invoice, field, value)
+        self.invoice.save()
+        return record_changes([self.invoice], self.user)
+
+    def test_versions_store_only_the_changes(self):
+        (first,) = record_changes([self.invoice], self.user)
+        self.assertTrue(first.is_snapshot)
+        self.assertEqual(first.details, "Invoice Created.")
+        self.assertEqual(first.changes["rate"], "10.00")
+
+        (second,) = self.update(status="Sent", rate="12.5")
+        self.assertEqual(second.version, 2)
+        self.assertFalse(second.is_snapshot)
+        self.assertEqual(second.changes, {"status": "Sent", "rate": "12.50"})
+        self.assertEqual(second.details, "Rate and Status have changed.")
+
+        self.invoice.assigned_to.add(self.user)
+        (third,) = record_changes([self.invoice], self.user)
+        self.assertEqual(third.changes, {"assigned_to": [str(self.user.id)]})
+
+    def test_unchanged_invoices_get_no_version(self):
+        record_changes([self.invoice], self.user)
+        self.invoice.refresh_from_db()
+        self.assertEqual(record_changes([self.invoice], self.user), [])
+        self.assertEqual(self.invoice.invoice_history.count(), 1)
+
+    @override_settings(INVOICE_HISTORY_SNAPSHOT_EVERY=3)
+    def test_any_version_is_rebuilt(self):
+        record_changes([self.invoice], self.user)
+        for quantity in range(3, 10):
+            self.update(quantity=quantity)
+        snapshots = InvoiceHistory.objects.filter(
+            invoice=self.invoice, is_snapshot=True
+        ).values_list("version", flat=True)
+        self.assertEqual(sorted(snapshots), [1, 4, 7])
+
+        self.assertEqual(get_state(self.invoice.id)["quantity"], 9)
+        self.assertEqual(get_state(self.invoice.id, 5)["quantity"], 6)
+        self.assertEqual(get_state(self.invoice.id, 1)["quantity"], 2)
+        with self.assertNumQueries(1):
+            state = get_state(self.invoice.id, 6)
+        self.assertEqual(state["invoice_title"], "title")
+
+        with self.assertNumQueries(1):
+            versions = get_versions(self.invoice)
+        self.assertEqual([row.version for row in versions], list(range(8, 0, -1)))
+        self.assertEqual([row.state["quantity"] for row in versions][-3:], [4, 3, 2])
+        self.assertEqual(str(versions[0]), self.invoice.invoice_number)
+
+    def test_bulk_record_runs_a_constant_number_of_queries(self):
+        invoices = [self.invoice] + [
+            Invoice.objects.create(
+                invoice_title="title {}".format(i),
+                name="name",
+                email="a@example.com",
+                org=self.org,
+            )
+            for i in range(20)
+        ]
+        record_changes(invoices, self.user)
+        for invoice in invoices[::2]:
+            invoice.status = "Paid"
+        # lock, history, assignees and insert, in a savepoint
+        with self.assertNumQueries(6):
+            created = record_changes(invoices, self.user)
+        self.assertEqual(len(created), 11)
+        self.assertTrue(all(row.changes == {"status": "Paid"} for row in created))
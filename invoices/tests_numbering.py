@@ -0,0 +1,84 @@
+import datetime
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+
+from common.models import Org
+from invoices.models import Invoice, InvoiceCounter
+from invoices.numbering import next_invoice_number
+
+DAY = datetime.date(2026, 10, 18)
+
+
+class InvoiceNumberingTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="numbering")
+
+    def test_numbers_count_up_per_org_and_day(self):
+        self.assertEqual(next_invoice_number(self.org.id, DAY), "181020260001")
+        self.assertEqual(next_invoice_number(self.org.id, DAY), "181020260002")
+        other = Org.objects.create(name="other")
+        self.assertEqual(next_invoice_number(other.id, DAY), "181020260001")
+        next_day = DAY + datetime.timedelta(days=1)
+        self.assertEqual(next_invoice_number(self.org.id, next_day), "191020260001")
+        self.assertEqual(InvoiceCounter.objects.filter(org=self.org).count(), 2)
+
+    def test_one_query_per_number(self):
+        next_invoice_number(self.org.id, DAY)
+        with self.assertNumQueries(1):
+            next_invoice_number(self.org.id, DAY)
+
+    @override_settings(
+        INVOICE_NUMBER_FORMAT="INV-{date:%Y}-{number:06d}", INVOICE_NUMBER_PERIOD="%Y"
+    )
+    def test_configurable_format_and_period(self):
+        self.assertEqual(next_invoice_number(self.org.id, DAY), "INV-2026-000001")
+        later = DAY + datetime.timedelta(days=30)
+        self.assertEqual(next_invoice_number(self.org.id, later), "INV-2026-000002")
+
+    def test_save_numbers_new_invoices(self):
+        invoice = Invoice.objects.create(
+            invoice_title="title", name="name", email="a@example.com", org=self.org
+        )
+        self.assertTrue(invoice.invoice_number.endswith("0001"))
+        invoice.save()
+        self.assertTrue(invoice.invoice_number.endswith("0001"))
+        with self.assertRaises(ValueError):
+            Invoice.objects.create(invoice_title="title", name="name", email="a@example.com")
+
+
+class InvoiceNumberingConcurrencyTest(TransactionTestCase):
+    threads = 8
+    per_thread = 25
+
+    def test_concurrent_numbers_are_unique(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("threads cannot share an in-memory SQLite database")
+        org = Org.objects.create(name="busy")
+        numbers = []
+        errors = []
+        start = threading.Barrier(self.threads)
+
+        def work():
+            try:
+                start.wait()
+                for _ in range(self.per_thread):
+                    numbers.append(next_invoice_number(org.id, DAY))
+            except Exception as e:  # reported below, a thread cannot fail the test
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=work) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        total = self.threads * self.per_thread
+        self.assertEqual(
+            sorted(numbers), ["18102026{:04d}".format(n) for n in range(1, total + 1)]
+        )
@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from common.models import Org
+from common.testing import api_client, create_profile
+from invoices import tasks
+from invoices.models import Invoice
+from invoices.pdf import get_pdf, request_pdf, render_pdf
+
+
+class InvoicePdfTest(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        storage = override_settings(MEDIA_ROOT=media)
+        storage.enable()
+        self.addCleanup(storage.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch("invoices.pdf.html_to_pdf", return_value=b"%PDF-1.4")
+        self.html_to_pdf = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.org = Org.objects.create(name="pdf")
+        self.invoice = Invoice.objects.create(
+            invoice_title="title",
+            name="name",
+            email="a@example.com",
+            currency="USD",
+            rate="10",
+            quantity=2,
+            org=self.org,
+        )
+
+    def test_pdf_is_rendered_once_per_content(self):
+        self.assertIsNone(get_pdf(self.invoice))
+        name = render_pdf(self.invoice)
+        self.assertEqual(get_pdf(self.invoice), name)
+        self.assertEqual(render_pdf(self.invoice), name)
+        self.assertEqual(self.html_to_pdf.call_count, 1)
+        with default_storage.open(name, "rb") as pdf:
+            self.assertEqual(pdf.read(), b"%PDF-1.4")
+
+        with self.settings(INVOICE_PDF_TEMPLATE_VERSION="2"):
+            self.assertIsNone(get_pdf(self.invoice))
+
+    def test_edits_replace_the_pdf(self):
+        first = render_pdf(self.invoice)
+        self.invoice.invoice_title = "new title"
+        self.invoice.save()
+        second = render_pdf(self.invoice)
+        self.assertNotEqual(first, second)
+        self.assertFalse(default_storage.exists(first))
+        self.assertTrue(default_storage.exists(second))
+
+    def test_downloads_queue_a_single_render(self):
+        with mock.patch.object(tasks.render_invoice_pdf, "apply_async") as apply_async:
+            self.assertIsNone(request_pdf(self.invoice))
+            self.assertIsNone(request_pdf(self.invoice))
+        self.assertEqual(apply_async.call_count, 1)
+        self.assertEqual(apply_async.call_args.kwargs["args"], [str(self.invoice.id)])
+
+        tasks.app.conf.task_always_eager = True
+        self.addCleanup(setattr, tasks.app.conf, "task_always_eager", False)
+        cache.clear()
+        self.assertIsNone(request_pdf(self.invoice))
+        self.assertEqual(request_pdf(self.invoice), get_pdf(self.invoice))
+
+    def client_for(self, role, org=None):
+        org = org or self.org
+        return api_client(
+            create_profile(org, "{}-{}@example.com".format(role, org.id), role)
+        )
+
+    def test_download(self):
+        tasks.app.conf.task_always_eager = True
+        self.addCleanup(setattr, tasks.app.conf, "task_always_eager", False)
+        url = "/api/invoices/{}/pdf/".format(self.invoice.id)
+        api = self.client_for("ADMIN")
+
+        self.assertEqual(api.get(url).status_code, 202)
+        response = api.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4")
+
+        self.assertEqual(self.client_for("USER").get(url).status_code, 403)
+        other_org = Org.objects.create(name="other")
+        self.assertEqual(self.client_for("ADMIN", other_org).get(url).status_code, 404)
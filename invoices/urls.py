@@ -1,3 +1,15 @@
+from django.urls import path
+
+from invoices import views
+
+app_name = "api_invoices"
+
+# the rest of the invoice API (invoices/api_urls.py) is not routed yet
+urlpatterns = [
+    path("<str:pk>/pdf/", views.InvoicePdfView.as_view()),
+]
+
+
 # from django.urls import path
 # from invoices.views import *
 
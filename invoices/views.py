@@ -1,3 +1,62 @@
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common import swagger_params1
+from invoices.models import Invoice
+from invoices.pdf import request_pdf
+
+
+class InvoicePdfView(APIView):
+    """
+    The PDF of an invoice: the cached file, or 202 while it is rendered in
+    the background (see invoices/pdf.py); poll again to download it.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Invoices"], parameters=swagger_params1.organization_params)
+    def get(self, request, pk, format=None):
+        invoice = (
+            Invoice.objects.select_related("from_address", "to_address")
+            .filter(id=pk, org=request.profile.org)
+            .first()
+        )
+        if invoice is None:
+            return Response(
+                {"error": True, "errors": "Invoice not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
+            if not (
+                (self.request.profile.user == invoice.created_by)
+                or invoice.assigned_to.filter(id=self.request.profile.user_id).exists()
+            ):
+                return Response(
+                    {
+                        "error": True,
+                        "errors": "You do not have Permission to perform this action",
+                    },
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+        name = request_pdf(invoice)
+        if name is None:
+            return Response(
+                {"error": False, "message": "The PDF is being rendered."},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        return FileResponse(
+            default_storage.open(name, "rb"),
+            as_attachment=True,
+            filename="Invoice-{}.pdf".format(invoice.invoice_number),
+            content_type="application/pdf",
+        )
+
+
 # import io
 # import os
 
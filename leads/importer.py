@@ -0,0 +1,175 @@
+"""
+Streaming lead import engine.
+
+Rows are read lazily from the uploaded CSV and written in chunks: every
+chunk costs one query to find titles that already exist in the org and one
+``bulk_create``, instead of an ``exists()`` and a ``save()`` per row.
+"""
+import codecs
+import csv
+import re
+from itertools import islice
+
+from django.db import DataError, IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from common import response_cache
+from common.audit import acting_user
+from common.dashboard import mark_stale
+from leads.models import Lead
+
+email_regex = r"^[_a-zA-Z0-9-]+(\.[_a-zA-Z0-9-]+)*@[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)*(\.[a-zA-Z]{2,4})$"
+
+REQUIRED_HEADERS = ["title"]
+CSV_ENCODING = "iso-8859-1"
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.duplicates = 0
+        self.failed = 0
+
+
+def csv_reader(document):
+    """
+    Read an uploaded (binary) file lazily; Django ``File`` objects iterate
+    line by line in chunks, so the whole file is never held in memory.
+    """
+    document.seek(0)
+    return csv.reader(codecs.iterdecode(document, CSV_ENCODING))
+
+
+def read_headers(document):
+    """Return the lower-cased header row."""
+    row = next(csv_reader(document), [])
+    return [header.strip().lower() for header in row]
+
+
+def iter_rows(document):
+    """Yield ``(line_number, row)`` dicts keyed on lower-cased headers."""
+    reader = csv_reader(document)
+    headers = [header.strip().lower() for header in next(reader, [])]
+    for line_number, values in enumerate(reader, start=2):
+        if not "".join(values).strip():
+            continue
+        yield line_number, dict(zip(headers, values))
+
+
+def validate_row(row):
+    errors = {}
+    for header in REQUIRED_HEADERS:
+        if not row.get(header):
+            errors[header] = "This field is required."
+    email = row.get("email")
+    if email and re.match(email_regex, email) is None:
+        errors["email"] = "Enter a valid email address."
+    return errors
+
+
+def build_lead(row, org):
+    return Lead(
+        title=row.get("title", "")[:64],
+        first_name=row.get("first name", "")[:255],
+        last_name=row.get("last name", "")[:255],
+        website=row.get("website", "")[:255],
+        email=row.get("email", ""),
+        phone=row.get("phone", ""),
+        address_line=row.get("address", "")[:255],
+        city=row.get("city", "")[:255],
+        state=row.get("state", "")[:255],
+        postcode=row.get("postcode", "")[:64],
+        country=row.get("country", "")[:3],
+        description=row.get("description", ""),
+        status=row.get("status", ""),
+        account_name=row.get("account_name", "")[:255],
+        created_from_site=False,
+        org=org,
+    )
+
+
+def existing_titles(org, titles):
+    """
+    Titles (lower-cased) that already exist in the org, in one query served
+    by the ``(org, lower(title))`` index.
+    """
+    return set(
+        Lead.objects.filter(org=org)
+        .annotate(lower_title=Lower("title"))
+        .filter(lower_title__in=titles)
+        .values_list("lower_title", flat=True)
+    )
+
+
+def import_rows(rows, org, created_by, chunk_size=2000, on_chunk=None, on_failure=None):
+    """
+    Import ``(line_number, row)`` pairs into ``org``.
+
+    Titles are de-duplicated case-insensitively against the org and within
+    the file itself; the leads are stamped as created by ``created_by``.
+    ``on_failure(line_number, row, errors)`` is called for every rejected row
+    and ``on_chunk(result)`` after every chunk.
+    """
+    result = ImportResult()
+    seen_titles = set()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        failures = []
+        candidates = []
+        for line_number, row in chunk:
+            errors = validate_row(row)
+            if errors:
+                failures.append((line_number, row, errors))
+                continue
+            candidates.append((line_number, row))
+
+        titles = {row["title"][:64].lower() for _, row in candidates}
+        taken = existing_titles(org, titles) if titles else set()
+        leads = []
+        for line_number, row in candidates:
+            title = row["title"][:64].lower()
+            if title in taken or title in seen_titles:
+                result.duplicates += 1
+                continue
+            seen_titles.add(title)
+            leads.append((line_number, build_lead(row, org)))
+
+        if leads:
+            with acting_user(created_by):
+                try:
+                    with transaction.atomic():
+                        Lead.objects.bulk_create([lead for _, lead in leads])
+                    result.created += len(leads)
+                except (IntegrityError, DataError):
+                    result.created += _insert_one_by_one(leads, failures)
+
+        result.processed += len(chunk)
+        result.failed += len(failures)
+        if on_failure:
+            for failure in failures:
+                on_failure(*failure)
+        if on_chunk:
+            on_chunk(result)
+    # bulk_create sends no post_save, so the dashboard and the cached lead
+    # responses are invalidated here
+    if result.created:
+        mark_stale(org.id)
+        response_cache.invalidate(org.id, "leads")
+    return result
+
+
+def _insert_one_by_one(leads, failures):
+    """Isolate the rows the database rejected instead of losing the chunk."""
+    created = 0
+    for line_number, lead in leads:
+        try:
+            with transaction.atomic():
+                Lead.objects.bulk_create([lead])
+            created += 1
+        except (IntegrityError, DataError) as e:
+            failures.append((line_number, {"title": lead.title}, {"row": str(e)}))
+    return created
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0004_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['org', 'status', '-created_at', '-id'], name='lead_org_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(condition=models.Q(('status__in', ['converted', 'closed']), _negated=True), fields=['org', '-created_at', '-id'], name='lead_org_open_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "lead_assigned_to_rev_idx" ON "lead_assigned_to" ("profile_id", "lead_id")',
+            'DROP INDEX IF EXISTS "lead_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "lead_teams_rev_idx" ON "lead_teams" ("teams_id", "lead_id")',
+            'DROP INDEX IF EXISTS "lead_teams_rev_idx"',
+        ),
+    ]
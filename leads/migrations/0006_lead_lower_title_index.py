@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(models.F('org'), django.db.models.functions.text.Lower('title'), name='lead_org_lower_title_idx'),
+        ),
+    ]
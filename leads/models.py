@@ -1,5 +1,7 @@
 import arrow
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
 from phonenumber_field.modelfields import PhoneNumberField
@@ -7,6 +9,7 @@ from phonenumber_field.modelfields import PhoneNumberField
 from accounts.models import Tags
 from common.models import Org, Profile
 from common.base import BaseModel
+from common.search import search_vector_index, trigram_index
 from common.utils import (
     COUNTRIES,
     INDCHOICES,
@@ -83,12 +86,33 @@ class Lead(BaseModel):
     organization = models.CharField(_("Organization"), max_length=255, null=True)
     probability = models.IntegerField(default=0, blank=True, null=True)
     close_date = models.DateField(default=None, null=True)
+    # maintained by a database trigger, see common/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Lead"
         verbose_name_plural = "Leads"
         db_table = "lead"
         ordering = ("-created_at",)
+        indexes = [
+            search_vector_index("lead"),
+            trigram_index("lead", "title"),
+            trigram_index("lead", "first_name"),
+            trigram_index("lead", "last_name"),
+            trigram_index("lead", "email"),
+            trigram_index("lead", "city"),
+            models.Index(
+                fields=["org", "status", "-created_at", "-id"],
+                name="lead_org_status_created_idx",
+            ),
+            models.Index(
+                fields=["org", "-created_at", "-id"],
+                name="lead_org_open_created_idx",
+                condition=~models.Q(status__in=["converted", "closed"]),
+            ),
+            # title de-duplication of the importer, see leads/importer.py
+            models.Index("org", Lower("title"), name="lead_org_lower_title_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -133,3 +157,40 @@ class Lead(BaseModel):
     #     close_leads = queryset.filter(status='closed')
     #     cache.set('admin_leads_open_queryset', open_leads, 60*60)
     #     cache.set('admin_leads_close_queryset', close_leads, 60*60)
+
+
+class LeadImportJob(BaseModel):
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    )
+
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="lead_import_jobs"
+    )
+    profile = models.ForeignKey(
+        Profile, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    leads_file = models.FileField(max_length=1001, upload_to="lead_imports/%Y/%m/")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    failed_rows_file = models.FileField(
+        max_length=1001, upload_to="lead_imports/failed/%Y/%m/", null=True, blank=True
+    )
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Lead Import Job"
+        verbose_name_plural = "Lead Import Jobs"
+        db_table = "lead_import_job"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.leads_file.name} ({self.status})"
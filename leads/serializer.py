@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
 from accounts.models import Account, Tags
+from common.bulk import BulkRecordSerializer
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import (
     AttachmentsSerializer,
     LeadCommentSerializer,
@@ -9,7 +11,7 @@ from common.serializer import (
     UserSerializer,
 )
 from contacts.serializer import ContactSerializer
-from leads.models import Company, Lead
+from leads.models import Company, Lead, LeadImportJob
 from teams.serializer import TeamsSerializer
 
 
@@ -45,6 +47,7 @@ class LeadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Lead
+        list_serializer_class = EagerLoadingListSerializer
         # fields = ‘__all__’
         fields = (
             "id",
@@ -166,6 +169,34 @@ class LeadCreateSerializer(serializers.ModelSerializer):
             # "lead_attachment",
         )
 
+class LeadBulkSerializer(BulkRecordSerializer):
+    probability = serializers.IntegerField(max_value=100)
+    company = serializers.UUIDField(required=False, allow_null=True)
+    contacts = serializers.ListField(child=serializers.UUIDField(), required=False)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=20), required=False
+    )
+
+    unique_in_org = ("title",)
+
+    def validate_status(self, status):
+        if status == "converted":
+            raise serializers.ValidationError(
+                "Leads are converted one at a time, not in bulk"
+            )
+        return status
+
+    class Meta(BulkRecordSerializer.Meta):
+        model = Lead
+        fields = tuple(
+            field for field in LeadCreateSerializer.Meta.fields if field != "org"
+        ) + ("id", "assigned_to", "teams", "contacts", "tags")
+        extra_kwargs = {
+            "title": {"required": True},
+            "first_name": {"required": False},
+            "last_name": {"required": False},
+        }
+
 class LeadCreateSwaggerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lead
@@ -195,3 +226,27 @@ class LeadCommentEditSwaggerSerializer(serializers.Serializer):
 class LeadUploadSwaggerSerializer(serializers.Serializer):
     leads_file = serializers.FileField()
 
+
+class LeadImportJobSerializer(serializers.ModelSerializer):
+    failed_rows_file = serializers.SerializerMethodField()
+
+    def get_failed_rows_file(self, obj):
+        if obj.failed_rows_file:
+            return obj.failed_rows_file.url
+        return None
+
+    class Meta:
+        model = LeadImportJob
+        fields = (
+            "id",
+            "status",
+            "processed_rows",
+            "created_count",
+            "duplicate_count",
+            "failed_count",
+            "failed_rows_file",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
@@ -21,4 +21,8 @@ lead_list_get_params = [
         enum=["assigned", "in process", "converted", "recycled", "closed"],
     ),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("open_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("close_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
@@ -1,14 +1,20 @@
-import re
+import csv
+import io
+import json
+import tempfile
 
 from celery import Celery
 from django.conf import settings
-from django.core.cache import cache
-from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.files import File
+from django.core.mail import EmailMultiAlternatives
 from django.db.models import Q
 from django.template.loader import render_to_string
+from django.utils import timezone
 
 from common.models import Org, Profile
-from leads.models import Lead
+from common.notifications import Notification, active_profiles
+from leads.importer import import_rows, iter_rows
+from leads.models import Lead, LeadImportJob
 
 app = Celery("redis://")
 
@@ -52,51 +58,39 @@ def send_lead_assigned_emails(lead_id, new_assigned_to_list, site_address):
     if not (lead_instance and new_assigned_to_list):
         return False
 
-    users = Profile.objects.filter(id__in=new_assigned_to_list).distinct()
-    subject = "Lead '%s' has been assigned to you" % lead_instance
-    from_email = settings.DEFAULT_FROM_EMAIL
-    template_name = "lead_assigned.html"
-
     url = site_address
     url += "/leads/" + str(lead_instance.id) + "/view/"
 
-    context = {
-        "lead_instance": lead_instance,
-        "lead_detail_url": url,
-    }
-    mail_kwargs = {"subject": subject, "from_email": from_email}
-    for profile in users:
-        if profile.user.email:
-            context["user"] = profile.user
-            html_content = get_rendered_html(template_name, context)
-            mail_kwargs["html_content"] = html_content
-            mail_kwargs["recipients"] = [profile.user.email]
-            send_email.delay(**mail_kwargs)
+    notification = Notification(
+        "Lead '%s' has been assigned to you" % lead_instance,
+        "lead_assigned.html",
+        {
+            "lead_instance": lead_instance,
+            "lead_detail_url": url,
+        },
+    )
+    for profile in active_profiles(new_assigned_to_list):
+        notification.add(profile.user.email, {"user": profile.user})
+    notification.send()
 
 
 @app.task
 def send_email_to_assigned_user(recipients, lead_id, source=""):
     """Send Mail To Users When they are assigned to a lead"""
     lead = Lead.objects.get(id=lead_id)
-    created_by = lead.created_by
-    for user in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=user, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            context = {}
-            context["url"] = settings.DOMAIN_NAME
-            context["user"] = profile.user
-            context["lead"] = lead
-            context["created_by"] = created_by
-            context["source"] = source
-            subject = "Assigned a lead for you. "
-            html_content = render_to_string(
-                "assigned_to/leads_assigned.html", context=context
-            )
-            msg = EmailMessage(subject, html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    notification = Notification(
+        "Assigned a lead for you. ",
+        "assigned_to/leads_assigned.html",
+        {
+            "url": settings.DOMAIN_NAME,
+            "lead": lead,
+            "created_by": lead.created_by,
+            "source": source,
+        },
+    )
+    for profile in active_profiles(recipients):
+        notification.add(profile.user.email, {"user": profile.user})
+    notification.send()
 
 
 @app.task
@@ -104,48 +98,64 @@ def create_lead_from_file(validated_rows, invalid_rows, user_id, source, company
     """Parameters : validated_rows, invalid_rows, user_id.
     This function is used to create leads from a given file.
     """
-    email_regex = "^[_a-zA-Z0-9-]+(\.[_a-zA-Z0-9-]+)*@[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)*(\.[a-zA-Z]{2,4})$"
-    profile = Profile.objects.get(id=user_id)
+    profile = Profile.objects.select_related("user").get(id=user_id)
     org = Org.objects.filter(id=company_id).first()
-    for row in validated_rows:
-        if not Lead.objects.filter(title=row.get("title")).exists():
-            if re.match(email_regex, row.get("email")) is not None:
-                try:
-                    lead = Lead()
-                    lead.title = row.get("title", "")[:64]
-                    lead.first_name = row.get("first name", "")[:255]
-                    lead.last_name = row.get("last name", "")[:255]
-                    lead.website = row.get("website", "")[:255]
-                    lead.email = row.get("email", "")
-                    lead.phone = row.get("phone", "")
-                    lead.address_line = row.get("address", "")[:255]
-                    lead.city = row.get("city", "")[:255]
-                    lead.state = row.get("state", "")[:255]
-                    lead.postcode = row.get("postcode", "")[:64]
-                    lead.country = row.get("country", "")[:3]
-                    lead.description = row.get("description", "")
-                    lead.status = row.get("status", "")
-                    lead.account_name = row.get("account_name", "")[:255]
-                    lead.created_from_site = False
-                    lead.created_by = profile
-                    lead.org = org
-                    lead.save()
-                except Exception as e:
-                    print(e)
+    import_rows(
+        enumerate(validated_rows, start=2),
+        org,
+        profile.user,
+        chunk_size=settings.LEAD_IMPORT_CHUNK_SIZE,
+    )
 
 
 @app.task
-def update_leads_cache():
-    queryset = (
-        Lead.objects.all()
-        .exclude(status="converted")
-        .select_related("created_by")
-        .prefetch_related(
-            "tags",
-            "assigned_to",
+def import_leads(job_id):
+    """Stream the CSV attached to a LeadImportJob into the job's org."""
+    job = LeadImportJob.objects.select_related("org", "profile__user").get(id=job_id)
+    jobs = LeadImportJob.objects.filter(id=job.id)
+    jobs.update(status="processing", started_at=timezone.now())
+
+    failed_file = tempfile.TemporaryFile()
+    failed_csv = io.TextIOWrapper(failed_file, encoding="utf-8", newline="")
+    writer = csv.writer(failed_csv)
+    writer.writerow(["line", "title", "email", "errors"])
+
+    def on_failure(line_number, row, errors):
+        writer.writerow(
+            [line_number, row.get("title", ""), row.get("email", ""), json.dumps(errors)]
         )
-    )
-    open_leads = queryset.exclude(status="closed")
-    close_leads = queryset.filter(status="closed")
-    cache.set("admin_leads_open_queryset", open_leads, 60 * 60)
-    cache.set("admin_leads_close_queryset", close_leads, 60 * 60)
+
+    def on_chunk(result):
+        jobs.update(
+            processed_rows=result.processed,
+            created_count=result.created,
+            duplicate_count=result.duplicates,
+            failed_count=result.failed,
+        )
+
+    try:
+        with job.leads_file.open("rb") as document:
+            result = import_rows(
+                iter_rows(document),
+                job.org,
+                job.profile.user if job.profile else None,
+                chunk_size=settings.LEAD_IMPORT_CHUNK_SIZE,
+                on_chunk=on_chunk,
+                on_failure=on_failure,
+            )
+    except Exception as e:
+        failed_csv.close()
+        jobs.update(status="failed", error=str(e), finished_at=timezone.now())
+        raise
+
+    if result.failed:
+        failed_csv.flush()
+        failed_csv.detach()
+        failed_file.seek(0)
+        job.failed_rows_file.save(
+            "failed-{}.csv".format(job.id), File(failed_file), save=False
+        )
+        jobs.update(failed_rows_file=job.failed_rows_file.name)
+    failed_file.close()
+    jobs.update(status="completed", finished_at=timezone.now())
+
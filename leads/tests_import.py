@@ -0,0 +1,153 @@
+import csv
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from common.models import Org
+from common.outbox import relay_all
+from common.testing import OrgTestMixin
+from leads import tasks
+from leads.importer import import_rows
+from leads.models import Lead, LeadImportJob
+
+
+def rows(*titles):
+    return [(line, {"title": title}) for line, title in enumerate(titles, start=2)]
+
+
+def csv_file(*rows):
+    content = io.StringIO()
+    writer = csv.writer(content)
+    writer.writerow(["title", "email", "city"])
+    writer.writerows(rows)
+    return SimpleUploadedFile("leads.csv", content.getvalue().encode("iso-8859-1"))
+
+
+class ImportRowsTest(OrgTestMixin, TestCase):
+    org_name = "import"
+
+    def test_rows_are_inserted_in_chunks(self):
+        chunks = []
+        with CaptureQueriesContext(connection) as queries:
+            result = import_rows(
+                rows(*("lead {}".format(i) for i in range(5))),
+                self.org,
+                self.admin.user,
+                chunk_size=2,
+                on_chunk=lambda result: chunks.append(result.processed),
+            )
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "lead"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(chunks, [2, 4, 5])
+        self.assertEqual((result.processed, result.created), (5, 5))
+        lead = Lead.objects.get(title="lead 0")
+        self.assertEqual(lead.org, self.org)
+        self.assertEqual(lead.created_by, self.admin.user)
+
+    def test_titles_are_deduplicated_in_the_file_and_the_org(self):
+        Lead.objects.create(title="Acme", org=self.org)
+        Lead.objects.create(title="Beta", org=Org.objects.create(name="other"))
+
+        result = import_rows(
+            rows("ACME", "beta", "Beta", "Gamma", "gamma"),
+            self.org,
+            self.admin.user,
+            chunk_size=2,
+        )
+        self.assertEqual((result.created, result.duplicates), (2, 3))
+        self.assertEqual(
+            sorted(Lead.objects.filter(org=self.org).values_list("title", flat=True)),
+            ["Acme", "Gamma", "beta"],
+        )
+
+    def test_rejected_rows_are_reported(self):
+        failures = []
+        result = import_rows(
+            [
+                (2, {"title": "good", "email": "good@example.com"}),
+                (3, {"title": "", "email": "missing@example.com"}),
+                (4, {"title": "bad email", "email": "not an email"}),
+            ],
+            self.org,
+            self.admin.user,
+            on_failure=lambda line, row, errors: failures.append((line, errors)),
+        )
+        self.assertEqual((result.processed, result.created, result.failed), (3, 1, 2))
+        self.assertEqual(
+            failures,
+            [
+                (3, {"title": "This field is required."}),
+                (4, {"email": "Enter a valid email address."}),
+            ],
+        )
+
+
+@override_settings(LEAD_IMPORT_CHUNK_SIZE=2, RESPONSE_CACHE_TIMEOUT=0)
+class LeadImportJobTest(OrgTestMixin, TestCase):
+    org_name = "import job"
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        tasks.app.conf.task_always_eager = True
+        self.addCleanup(setattr, tasks.app.conf, "task_always_eager", False)
+
+    def test_upload_runs_a_job_and_reports_its_progress(self):
+        Lead.objects.create(title="existing", org=self.org)
+        client = self.client_for(self.admin)
+        response = client.post(
+            "/api/leads/upload/",
+            {
+                "leads_file": csv_file(
+                    ["first", "first@example.com", "Paris"],
+                    ["Existing", "", ""],
+                    ["", "nameless@example.com", ""],
+                    ["second", "", "Oslo"],
+                    ["FIRST", "", ""],
+                )
+            },
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        job_id = response.json()["job"]["id"]
+        self.assertEqual(response.json()["job"]["status"], "pending")
+
+        relay_all()
+        job = LeadImportJob.objects.get(id=job_id)
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(
+            (
+                job.processed_rows,
+                job.created_count,
+                job.duplicate_count,
+                job.failed_count,
+            ),
+            (5, 2, 2, 1),
+        )
+        self.assertIsNotNone(job.finished_at)
+        with job.failed_rows_file.open("r") as failed:
+            failed_rows = list(csv.reader(failed))
+        self.assertEqual(failed_rows[0], ["line", "title", "email", "errors"])
+        self.assertEqual(failed_rows[1][:3], ["4", "", "nameless@example.com"])
+
+        response = client.get("/api/leads/upload/{}/".format(job_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["job"]["created_count"], 2)
+
+    def test_job_that_cannot_read_its_file_is_failed(self):
+        job = LeadImportJob.objects.create(
+            org=self.org, profile=self.admin, leads_file="lead_imports/missing.csv"
+        )
+        with self.assertRaises(FileNotFoundError):
+            tasks.import_leads(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(job.error)
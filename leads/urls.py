@@ -1,5 +1,6 @@
 from django.urls import path
 
+from common.views import BulkView, ExportView
 from leads import views
 from .import views
 
@@ -12,8 +13,11 @@ urlpatterns = [
         name="create_lead_from_site",
     ),
     path("", views.LeadListView.as_view()),
-    path("<str:pk>/", views.LeadDetailView.as_view()),
+    path("bulk/", BulkView.as_view(entity="leads")),
+    path("export/", ExportView.as_view(entity="leads")),
     path("upload/", views.LeadUploadView.as_view()),
+    path("upload/<str:pk>/", views.LeadImportJobView.as_view()),
+    path("<str:pk>/", views.LeadDetailView.as_view()),
     path("comment/<str:pk>/", views.LeadCommentView.as_view()),
     path("attachment/<str:pk>/", views.LeadAttachmentView.as_view()),
     path("companies",views.CompaniesView.as_view()),
@@ -1,44 +1,49 @@
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from accounts.models import Account, Tags
+from accounts.models import Account
+from common.m2m import sync_m2m
 from common.models import APISettings, Attachments, Comment, Profile
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
 
 #from common.external_auth import CustomDualAuthentication
+from common.response_cache import ALL, cache_response
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
     LeadCommentSerializer,
     ProfileSerializer,
 )
+from common.tags import set_tags
 from .forms import LeadListForm
 from .models import Company,Lead
-from common.utils import COUNTRIES, INDCHOICES, LEAD_SOURCE, LEAD_STATUS
+from common.utils import COUNTRIES, LEAD_SOURCE, LEAD_STATUS
 from contacts.models import Contact
 from leads import swagger_params1
 from leads.forms import LeadListForm
-from leads.models import Company, Lead
+from leads.models import Company, Lead, LeadImportJob
 from leads.serializer import (
     CompanySerializer,
     CompanySwaggerSerializer,
     LeadCreateSerializer,
     LeadSerializer,
-    TagsSerializer,
     LeadCreateSwaggerSerializer,
     LeadDetailEditSwaggerSerializer,
     LeadCommentEditSwaggerSerializer,
     CreateLeadFromSiteSwaggerSerializer,
-    LeadUploadSwaggerSerializer
+    LeadUploadSwaggerSerializer,
+    LeadImportJobSerializer,
 )
 from common.models import User
 from leads.tasks import (
-    create_lead_from_file,
+    import_leads,
     send_email_to_assigned_user,
     send_lead_assigned_emails,
 )
@@ -46,7 +51,7 @@ from teams.models import Teams
 from teams.serializer import TeamsSerializer
 
 
-class LeadListView(APIView, LimitOffsetPagination):
+class LeadListView(APIView, KeysetPagination):
     model = Lead
     permission_classes = (IsAuthenticated,)
 
@@ -60,7 +65,7 @@ class LeadListView(APIView, LimitOffsetPagination):
                 "tags",
                 "assigned_to",
             )
-        ).order_by("-id")
+        )
         if self.request.profile.role != "ADMIN" and not self.request.user.is_superuser:
             queryset = queryset.filter(
                 Q(assigned_to__in=[self.request.profile])
@@ -71,7 +76,7 @@ class LeadListView(APIView, LimitOffsetPagination):
             if params.get("name"):
                 queryset = queryset.filter(
                     Q(first_name__icontains=params.get("name"))
-                    & Q(last_name__icontains=params.get("name"))
+                    | Q(last_name__icontains=params.get("name"))
                 )
             if params.get("title"):
                 queryset = queryset.filter(title__icontains=params.get("title"))
@@ -92,62 +97,41 @@ class LeadListView(APIView, LimitOffsetPagination):
         context = {}
         queryset_open = queryset.exclude(status="closed")
         results_leads_open = self.paginate_queryset(
-            queryset_open.distinct(), self.request, view=self
+            queryset_open.distinct(), self.request, view=self, cursor_query_param="open_cursor"
         )
         open_leads = LeadSerializer(results_leads_open, many=True).data
-        if results_leads_open:
-            offset = queryset_open.filter(id__gte=results_leads_open[-1].id).count()
-            if offset == queryset_open.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
+        context["per_page"] = self.limit
         context["open_leads"] = {
             "leads_count": self.count,
             "open_leads": open_leads,
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
         }
 
         queryset_close = queryset.filter(status="closed")
         results_leads_close = self.paginate_queryset(
-            queryset_close.distinct(), self.request, view=self
+            queryset_close.distinct(), self.request, view=self, cursor_query_param="close_cursor"
         )
         close_leads = LeadSerializer(results_leads_close, many=True).data
-        if results_leads_close:
-            offset = queryset_close.filter(id__gte=results_leads_close[-1].id).count()
-            if offset == queryset_close.count():
-                offset = None
-        else:
-            offset = 0
-
         context["close_leads"] = {
             "leads_count": self.count,
             "close_leads": close_leads,
-            "offset": offset,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
         }
-        contacts = Contact.objects.filter(org=self.request.profile.org).values(
-            "id", "first_name"
-        )
-
-        context["contacts"] = contacts
-        context["status"] = LEAD_STATUS
-        context["source"] = LEAD_SOURCE
-        context["companies"] = CompanySerializer(
-            Company.objects.filter(org=self.request.profile.org), many=True
-        ).data
-        context["tags"] = TagsSerializer(Tags.objects.all(), many=True).data
-
-        users = Profile.objects.filter(is_active=True, org=self.request.profile.org).values(
-            "id", "user__email"
-        )
-        context["users"] = users
-        context["countries"] = COUNTRIES
-        context["industries"] = INDCHOICES
         return context
 
     @extend_schema(tags=["Leads"], parameters=swagger_params1.lead_list_get_params)
+    @cache_response(
+        "leads",
+        "contacts",
+        "companies",
+        "profiles",
+        "teams",
+        "tags",
+        "attachments",
+        "comments",
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -155,23 +139,15 @@ class LeadListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["Leads"],description="Leads Create", parameters=swagger_params1.organization_params,request=LeadCreateSwaggerSerializer
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
-
-        print('test')
         data = request.data
         serializer = LeadCreateSerializer(data=data, request_obj=request)
         if serializer.is_valid():
             lead_obj = serializer.save(created_by=request.profile.user
             , org=request.profile.org)
             if data.get("tags",None):
-                tags = data.get("tags")
-                for t in tags:
-                    tag = Tags.objects.filter(slug=t.lower())
-                    if tag.exists():
-                        tag = tag[0]
-                    else:
-                        tag = Tags.objects.create(name=t)
-                    lead_obj.tags.add(tag)
+                set_tags(lead_obj, data.get("tags"))
 
             if data.get("contacts",None):
                 obj_contact = Contact.objects.filter(
@@ -180,7 +156,8 @@ class LeadListView(APIView, LimitOffsetPagination):
                 lead_obj.contacts.add(*obj_contact)
 
             recipients = list(lead_obj.assigned_to.all().values_list("id", flat=True))
-            send_email_to_assigned_user.delay(
+            enqueue(
+                send_email_to_assigned_user,
                 recipients,
                 lead_obj.id,
             )
@@ -236,7 +213,8 @@ class LeadListView(APIView, LimitOffsetPagination):
                 if data.get("assigned_to",None):
                     assigned_to_list = data.getlist("assigned_to")
                     recipients = assigned_to_list
-                    send_email_to_assigned_user.delay(
+                    enqueue(
+                        send_email_to_assigned_user,
                         recipients,
                         lead_obj.id,
                     )
@@ -355,6 +333,7 @@ class LeadDetailView(APIView):
         return context
 
     @extend_schema(tags=["Leads"],parameters=swagger_params1.organization_params,description="Lead Detail")
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, **kwargs):
         self.lead_obj = self.get_object(pk)
         context = self.get_context_data(**kwargs)
@@ -414,6 +393,7 @@ class LeadDetailView(APIView):
         return Response(context)
 
     @extend_schema(tags=["Leads"], parameters=swagger_params1.organization_params,request=LeadCreateSwaggerSerializer)
+    @transaction.atomic
     def put(self, request, pk, **kwargs):
         params = request.data
         self.lead_obj = self.get_object(pk)
@@ -432,31 +412,8 @@ class LeadDetailView(APIView):
         )
         if serializer.is_valid():
             lead_obj = serializer.save()
-            previous_assigned_to_users = list(
-                lead_obj.assigned_to.all().values_list("id", flat=True)
-            )
-            lead_obj.tags.clear()
-            if params.get("tags"):
-                tags = params.get("tags")
-                # for t in tags:
-                #     tag,_ = Tags.objects.get_or_create(name=t)
-                #     lead_obj.tags.add(tag)
-                for t in tags:
-                    tag = Tags.objects.filter(slug=t.lower())
-                    if tag.exists():
-                        tag = tag[0]
-                    else:
-                        tag = Tags.objects.create(name=t)
-                    lead_obj.tags.add(tag)
-
-            assigned_to_list = list(
-                lead_obj.assigned_to.all().values_list("id", flat=True)
-            )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email_to_assigned_user.delay(
-                recipients,
-                lead_obj.id,
-            )
+            set_tags(lead_obj, params.get("tags"), clear=True)
+
             if request.FILES.get("lead_attachment"):
                 attachment = Attachments()
                 attachment.created_by = request.profile.user
@@ -465,26 +422,32 @@ class LeadDetailView(APIView):
                 attachment.attachment = request.FILES.get("lead_attachment")
                 attachment.save()
 
-            lead_obj.contacts.clear()
-            if params.get("contacts"):
-                obj_contact = Contact.objects.filter(
-                    id=params.get("contacts"), org=request.profile.org
-                )
-                lead_obj.contacts.add(obj_contact)
-
-            lead_obj.teams.clear()
-            if params.get("teams"):
-                teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                lead_obj.teams.add(*teams)
-
-            lead_obj.assigned_to.clear()
-            if params.get("assigned_to"):
-                assinged_to_list = params.get("assigned_to")
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org
-                )
-                lead_obj.assigned_to.add(*profiles)
+            sync_m2m(
+                lead_obj,
+                "contacts",
+                Contact.objects.filter(
+                    id__in=params.get("contacts") or [], org=request.profile.org
+                ),
+            )
+            sync_m2m(
+                lead_obj,
+                "teams",
+                Teams.objects.filter(
+                    id__in=params.get("teams") or [], org=request.profile.org
+                ),
+            )
+            recipients, _ = sync_m2m(
+                lead_obj,
+                "assigned_to",
+                Profile.objects.filter(
+                    id__in=params.get("assigned_to") or [], org=request.profile.org
+                ),
+            )
+            enqueue(
+                send_email_to_assigned_user,
+                list(recipients),
+                lead_obj.id,
+            )
 
             if params.get("status") == "converted":
                 account_object = Account.objects.create(
@@ -517,7 +480,8 @@ class LeadDetailView(APIView):
                     # account_object.assigned_to.add(*params.getlist('assigned_to'))
                     assigned_to_list = params.get("assigned_to")
                     recipients = assigned_to_list
-                    send_email_to_assigned_user.delay(
+                    enqueue(
+                        send_email_to_assigned_user,
                         recipients,
                         lead_obj.id,
                     )
@@ -568,19 +532,23 @@ class LeadUploadView(APIView):
     permission_classes = (IsAuthenticated,)
 
     @extend_schema(tags=["Leads"], parameters=swagger_params1.organization_params,request=LeadUploadSwaggerSerializer)
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         lead_form = LeadListForm(request.POST, request.FILES)
         if lead_form.is_valid():
-            create_lead_from_file.delay(
-                lead_form.validated_rows,
-                lead_form.invalid_rows,
-                request.profile.id,
-                request.get_host(),
-                request.profile.org.id,
+            job = LeadImportJob.objects.create(
+                org=request.profile.org,
+                profile=request.profile,
+                leads_file=lead_form.cleaned_data["leads_file"],
             )
+            enqueue(import_leads, job.id)
             return Response(
-                {"error": False, "message": "Leads created Successfully"},
-                status=status.HTTP_200_OK,
+                {
+                    "error": False,
+                    "message": "Leads import started",
+                    "job": LeadImportJobSerializer(job).data,
+                },
+                status=status.HTTP_202_ACCEPTED,
             )
         return Response(
             {"error": True, "errors": lead_form.errors},
@@ -588,6 +556,30 @@ class LeadUploadView(APIView):
         )
 
 
+class LeadImportJobView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Leads"], parameters=swagger_params1.organization_params)
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(LeadImportJob, id=pk, org=request.profile.org)
+        if (
+            request.profile.role != "ADMIN"
+            and not request.user.is_superuser
+            and job.profile_id != request.profile.id
+        ):
+            return Response(
+                {
+                    "error": True,
+                    "errors": "You do not have Permission to perform this action",
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        return Response(
+            {"error": False, "job": LeadImportJobSerializer(job).data},
+            status=status.HTTP_200_OK,
+        )
+
+
 class LeadCommentView(APIView):
     model = Comment
     #authentication_classes = (CustomDualAuthentication,)
@@ -679,6 +671,7 @@ class CreateLeadFromSite(APIView):
         tags=["Leads"],
         parameters=swagger_params1.organization_params,request=CreateLeadFromSiteSwaggerSerializer
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         params = request.data
         api_key = params.get("apikey")
@@ -713,21 +706,22 @@ class CreateLeadFromSite(APIView):
             lead.assigned_to.add(user)
             # Send Email to Assigned Users
             site_address = request.scheme + "://" + request.META["HTTP_HOST"]
-            send_lead_assigned_emails.delay(lead.id, [user.id], site_address)
+            enqueue(send_lead_assigned_emails, lead.id, [user.id], site_address)
             # Create Contact
             try:
-                contact = Contact.objects.create(
-                    first_name=params.get("title"),
-                    email=params.get("email"),
-                    phone=params.get("phone"),
-                    description=params.get("message"),
-                    created_by=user,
-                    is_active=True,
-                    org=api_setting.org,
-                )
-                contact.assigned_to.add(user)
+                with transaction.atomic():
+                    contact = Contact.objects.create(
+                        first_name=params.get("title"),
+                        email=params.get("email"),
+                        phone=params.get("phone"),
+                        description=params.get("message"),
+                        created_by=user,
+                        is_active=True,
+                        org=api_setting.org,
+                    )
+                    contact.assigned_to.add(user)
 
-                lead.contacts.add(contact)
+                    lead.contacts.add(contact)
             except Exception:
                 pass
 
@@ -766,7 +760,6 @@ class CompaniesView(APIView):
     )
     def post(self, request, *args, **kwargs):
         request.data['org'] = request.profile.org.id
-        print(request.data)
         company=CompanySerializer(data=request.data)
         if Company.objects.filter(**request.data).exists():
             return Response(
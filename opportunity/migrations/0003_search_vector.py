@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations
+
+import common.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0011_trigram_extension'),
+        ('opportunity', '0002_alter_opportunity_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='opportunity',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='opportunity_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='opportunity_name_trgm'),
+        ),
+        common.search.CreateSearchTrigger(
+            table="opportunity",
+            weights={
+                "A": ["name"],
+                "C": ["lead_source", "stage"],
+                "D": ["description"],
+            },
+        ),
+    ]
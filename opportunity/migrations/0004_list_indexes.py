@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opportunity', '0003_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=models.Index(fields=['org', '-created_at', '-id'], name='opportunity_org_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "opportunity_assigned_to_rev_idx" ON "opportunity_assigned_to" ("profile_id", "opportunity_id")',
+            'DROP INDEX IF EXISTS "opportunity_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "opportunity_teams_rev_idx" ON "opportunity_teams" ("teams_id", "opportunity_id")',
+            'DROP INDEX IF EXISTS "opportunity_teams_rev_idx"',
+        ),
+    ]
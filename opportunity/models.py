@@ -1,4 +1,5 @@
 import arrow
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
@@ -6,6 +7,7 @@ from django.utils.translation import pgettext_lazy
 from accounts.models import Account, Tags
 from common.models import Org, Profile
 from common.base import BaseModel
+from common.search import search_vector_index, trigram_index
 from common.utils import CURRENCY_CODES, SOURCES, STAGES
 from contacts.models import Contact
 from teams.models import Teams
@@ -57,12 +59,22 @@ class Opportunity(BaseModel):
         blank=True,
         related_name="oppurtunity_org",
     )
+    # maintained by a database trigger, see common/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Opportunity"
         verbose_name_plural = "Opportunities"
         db_table = "opportunity"
         ordering = ("-created_at",)
+        indexes = [
+            search_vector_index("opportunity"),
+            trigram_index("opportunity", "name"),
+            models.Index(
+                fields=["org", "-created_at", "-id"],
+                name="opportunity_org_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
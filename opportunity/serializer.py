@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from accounts.models import Tags
 from accounts.serializer import AccountSerializer
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import AttachmentsSerializer, ProfileSerializer,UserSerializer
 from contacts.serializer import ContactSerializer
 from opportunity.models import Opportunity
@@ -26,6 +27,7 @@ class OpportunitySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Opportunity
+        list_serializer_class = EagerLoadingListSerializer
         # fields = ‘__all__’
         fields = (
             "id",
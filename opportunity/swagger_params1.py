@@ -17,6 +17,9 @@ opportunity_list_get_params = [
     OpenApiParameter("stage", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("lead_source", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("tags", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
 
 opportunity_detail_get_params = [
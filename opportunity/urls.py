@@ -1,11 +1,13 @@
 from django.urls import path
 
+from common.views import ExportView
 from opportunity import views
 
 app_name = "api_opportunities"
 
 urlpatterns = [
     path("", views.OpportunityListView.as_view()),
+    path("export/", ExportView.as_view(entity="opportunities")),
     path("<str:pk>/", views.OpportunityDetailView.as_view()),
     path("comment/<str:pk>/", views.OpportunityCommentView.as_view()),
     path("attachment/<str:pk>/", views.OpportunityAttachmentView.as_view()),
@@ -1,23 +1,28 @@
 import json
 
+from django.db import transaction
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import Account, Tags
 from accounts.serializer import AccountSerializer, TagsSerailizer
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
 
 #from common.external_auth import CustomDualAuthentication
+from common.response_cache import ALL, cache_response
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
     ProfileSerializer,
 )
+from common.tags import set_tags
 from common.utils import CURRENCY_CODES, SOURCES, STAGES
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
@@ -28,7 +33,7 @@ from opportunity.tasks import send_email_to_assigned_user
 from teams.models import Teams
 
 
-class OpportunityListView(APIView, LimitOffsetPagination):
+class OpportunityListView(APIView, KeysetPagination):
 
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
@@ -36,7 +41,7 @@ class OpportunityListView(APIView, LimitOffsetPagination):
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         accounts = Account.objects.filter(org=self.request.profile.org)
         contacts = Contact.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.user.is_superuser:
@@ -71,19 +76,12 @@ class OpportunityListView(APIView, LimitOffsetPagination):
             queryset.distinct(), self.request, view=self
         )
         opportunities = OpportunitySerializer(results_opportunities, many=True).data
-        if results_opportunities:
-            offset = queryset.filter(id__gte=results_opportunities[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
+        context["per_page"] = self.limit
         context.update(
             {
                 "opportunities_count": self.count,
-                "offset": offset,
+                "next_cursor": self.next_cursor,
+                "previous_cursor": self.previous_cursor,
             }
         )
         context["opportunities"] = opportunities
@@ -100,6 +98,17 @@ class OpportunityListView(APIView, LimitOffsetPagination):
         tags=["Opportunities"],
         parameters=swagger_params1.opportunity_list_get_params,
     )
+    @cache_response(
+        "opportunities",
+        "accounts",
+        "leads",
+        "contacts",
+        "profiles",
+        "teams",
+        "tags",
+        "attachments",
+        "comments",
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -108,6 +117,7 @@ class OpportunityListView(APIView, LimitOffsetPagination):
         tags=["Opportunities"],
         parameters=swagger_params1.organization_params,request=OpportunityCreateSwaggerSerializer
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         params = request.data
         serializer = OpportunityCreateSerializer(data=params, request_obj=request)
@@ -124,14 +134,7 @@ class OpportunityListView(APIView, LimitOffsetPagination):
                 opportunity_obj.contacts.add(*contacts)
 
             if params.get("tags"):
-                tags = params.get("tags")
-                for tag in tags:
-                    obj_tag = Tags.objects.filter(slug=tag.lower())
-                    if obj_tag.exists():
-                        obj_tag = obj_tag[0]
-                    else:
-                        obj_tag = Tags.objects.create(name=tag)
-                    opportunity_obj.tags.add(obj_tag)
+                set_tags(opportunity_obj, params.get("tags"))
 
             if params.get("stage"):
                 stage = params.get("stage")
@@ -164,7 +167,8 @@ class OpportunityListView(APIView, LimitOffsetPagination):
                 opportunity_obj.assigned_to.all().values_list("id", flat=True)
             )
 
-            send_email_to_assigned_user.delay(
+            enqueue(
+                send_email_to_assigned_user,
                 recipients,
                 opportunity_obj.id,
             )
@@ -191,6 +195,7 @@ class OpportunityDetailView(APIView):
         tags=["Opportunities"],
         parameters=swagger_params1.organization_params,request=OpportunityCreateSwaggerSerializer
     )
+    @transaction.atomic
     def put(self, request, pk, format=None):
         params = request.data
         opportunity_object = self.get_object(pk=pk)
@@ -221,44 +226,37 @@ class OpportunityDetailView(APIView):
 
         if serializer.is_valid():
             opportunity_object = serializer.save(closed_on=params.get("due_date"))
-            previous_assigned_to_users = list(
-                opportunity_object.assigned_to.all().values_list("id", flat=True)
+            sync_m2m(
+                opportunity_object,
+                "contacts",
+                Contact.objects.filter(
+                    id__in=params.get("contacts") or [], org=request.profile.org
+                ),
             )
-            opportunity_object.contacts.clear()
-            if params.get("contacts"):
-                contacts_list = params.get("contacts")
-                contacts = Contact.objects.filter(id__in=contacts_list, org=request.profile.org)
-                opportunity_object.contacts.add(*contacts)
 
-            opportunity_object.tags.clear()
-            if params.get("tags"):
-                tags = params.get("tags")
-                for tag in tags:
-                    obj_tag = Tags.objects.filter(slug=tag.lower())
-                    if obj_tag.exists():
-                        obj_tag = obj_tag[0]
-                    else:
-                        obj_tag = Tags.objects.create(name=tag)
-                    opportunity_object.tags.add(obj_tag)
+            set_tags(opportunity_object, params.get("tags"), clear=True)
 
             if params.get("stage"):
                 stage = params.get("stage")
                 if stage in ["CLOSED WON", "CLOSED LOST"]:
                     opportunity_object.closed_by = self.request.profile
 
-            opportunity_object.teams.clear()
-            if params.get("teams"):
-                teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                opportunity_object.teams.add(*teams)
-
-            opportunity_object.assigned_to.clear()
-            if params.get("assigned_to"):
-                assinged_to_list = params.get("assigned_to")
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org, is_active=True
-                )
-                opportunity_object.assigned_to.add(*profiles)
+            sync_m2m(
+                opportunity_object,
+                "teams",
+                Teams.objects.filter(
+                    id__in=params.get("teams") or [], org=request.profile.org
+                ),
+            )
+            recipients, _ = sync_m2m(
+                opportunity_object,
+                "assigned_to",
+                Profile.objects.filter(
+                    id__in=params.get("assigned_to") or [],
+                    org=request.profile.org,
+                    is_active=True,
+                ),
+            )
 
             if self.request.FILES.get("opportunity_attachment"):
                 attachment = Attachments()
@@ -270,12 +268,9 @@ class OpportunityDetailView(APIView):
                 attachment.attachment = self.request.FILES.get("opportunity_attachment")
                 attachment.save()
 
-            assigned_to_list = list(
-                opportunity_object.assigned_to.all().values_list("id", flat=True)
-            )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email_to_assigned_user.delay(
-                recipients,
+            enqueue(
+                send_email_to_assigned_user,
+                list(recipients),
                 opportunity_object.id,
             )
             return Response(
@@ -315,6 +310,7 @@ class OpportunityDetailView(APIView):
     @extend_schema(
         tags=["Opportunities"], parameters=swagger_params1.organization_params
     )
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, format=None):
         self.opportunity = self.get_object(pk=pk)
         context = {}
@@ -1,12 +1,8 @@
 from celery import Celery
 from django.conf import settings
-from django.core.mail import EmailMessage
 from django.shortcuts import reverse
-from django.template.loader import render_to_string
 
-from accounts.models import Account, Email
-from common.models import User
-from contacts.models import Contact
+from common.notifications import Notification, active_users
 from tasks.models import Task
 
 app = Celery("redis://")
@@ -15,25 +11,19 @@ app = Celery("redis://")
 @app.task
 def send_email(task_id, recipients, domain="demo.django-crm.io", protocol="http"):
     task = Task.objects.filter(id=task_id).first()
-    created_by = task.created_by
-    for user in recipients:
-        recipients_list = []
-        user = User.objects.filter(id=user, is_active=True).first()
-        if user:
-            recipients_list.append(user.email)
-            subject = " Assigned a task for you ."
-            context = {}
-            context["task_title"] = task.title
-            context["task_id"] = task.id
-            context["task_created_by"] = task.created_by
-            context["url"] = protocol + "://" + domain
-            context["user"] = user
-            html_content = render_to_string(
-                "tasks_email_template.html", context=context
-            )
-            msg = EmailMessage(subject=subject, body=html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    notification = Notification(
+        " Assigned a task for you .",
+        "tasks_email_template.html",
+        {
+            "task_title": task.title,
+            "task_id": task.id,
+            "task_created_by": task.created_by,
+            "url": protocol + "://" + domain,
+        },
+    )
+    for user in active_users(recipients):
+        notification.add(user.email, {"user": user})
+    notification.send()
 
     # if task:
     #     subject = ' Assigned a task for you .'
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_alter_task_created_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['org', 'status', '-created_at', '-id'], name='task_org_status_created_idx'),
+        ),
+        # through tables: (member, record) for lookups starting from the member
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "task_assigned_to_rev_idx" ON "task_assigned_to" ("profile_id", "task_id")',
+            'DROP INDEX IF EXISTS "task_assigned_to_rev_idx"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "task_teams_rev_idx" ON "task_teams" ("teams_id", "task_id")',
+            'DROP INDEX IF EXISTS "task_teams_rev_idx"',
+        ),
+    ]
@@ -52,6 +52,17 @@ class Task(BaseModel):
         verbose_name_plural = "Tasks"
         db_table = "task"
         ordering = ("-due_date",)
+        indexes = [
+            models.Index(
+                fields=["org", "status", "-created_at", "-id"],
+                name="task_org_status_created_idx",
+            ),
+            # the default list order, without a status filter
+            models.Index(
+                fields=["org", "-created_at", "-id"],
+                name="task_org_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from common.bulk import BulkRecordSerializer
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
@@ -21,6 +23,7 @@ class TaskSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "title",
@@ -72,6 +75,26 @@ class TaskCreateSerializer(serializers.ModelSerializer):
             "created_at",
         )
 
+class TaskBulkSerializer(BulkRecordSerializer):
+    account = serializers.UUIDField(required=False, allow_null=True)
+    contacts = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+    unique_in_org = ("title",)
+
+    class Meta(BulkRecordSerializer.Meta):
+        model = Task
+        fields = (
+            "id",
+            "title",
+            "status",
+            "priority",
+            "due_date",
+            "account",
+            "assigned_to",
+            "teams",
+            "contacts",
+        )
+
 class TaskDetailEditSwaggerSerializer(serializers.Serializer):
     comment = serializers.CharField()
     task_attachment = serializers.FileField()
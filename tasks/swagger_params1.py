@@ -14,4 +14,7 @@ task_list_get_params = [
     OpenApiParameter("title", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("status", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("priority", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
@@ -1,11 +1,14 @@
 from django.urls import path
 
+from common.views import BulkView, ExportView
 from tasks import views
 
 app_name = "api_tasks"
 
 urlpatterns = [
     path("", views.TaskListView.as_view()),
+    path("bulk/", BulkView.as_view(entity="tasks")),
+    path("export/", ExportView.as_view(entity="tasks")),
     path("<str:pk>/", views.TaskDetailView.as_view()),
     path("comment/<str:pk>/", views.TaskCommentView.as_view()),
     path("attachment/<str:pk>/", views.TaskAttachmentView.as_view()),
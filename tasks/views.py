@@ -3,16 +3,18 @@ import json
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import Account
 from accounts.serializer import AccountSerializer
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.pagination import KeysetPagination
 
 #from common.external_auth import CustomDualAuthentication
+from common.response_cache import ALL, cache_response
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
@@ -28,14 +30,14 @@ from teams.models import Teams
 from teams.serializer import TeamsSerializer
 
 
-class TaskListView(APIView, LimitOffsetPagination):
+class TaskListView(APIView, KeysetPagination):
     model = Task
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         accounts = Account.objects.filter(org=self.request.profile.org)
         contacts = Contact.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
@@ -62,16 +64,11 @@ class TaskListView(APIView, LimitOffsetPagination):
             queryset.distinct(), self.request, view=self
         )
         tasks = TaskSerializer(results_tasks, many=True).data
-        if results_tasks:
-            offset = queryset.filter(id__gte=results_tasks[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
         context.update(
             {
                 "tasks_count": self.count,
-                "offset": offset,
+                "next_cursor": self.next_cursor,
+                "previous_cursor": self.previous_cursor,
             }
         )
         context["tasks"] = tasks
@@ -84,6 +81,9 @@ class TaskListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["Tasks"], parameters=swagger_params1.task_list_get_params
     )
+    @cache_response(
+        "tasks", "accounts", "leads", "contacts", "profiles", "teams", "tags"
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -212,6 +212,7 @@ class TaskDetailView(APIView):
     @extend_schema(
         tags=["Tasks"], parameters=swagger_params1.organization_params
     )
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, **kwargs):
         self.task_obj = self.get_object(pk)
         context = self.get_context_data(**kwargs)
@@ -278,28 +279,29 @@ class TaskDetailView(APIView):
         )
         if serializer.is_valid():
             task_obj = serializer.save()
-            previous_assigned_to_users = list(
-                task_obj.assigned_to.all().values_list("id", flat=True)
+            sync_m2m(
+                task_obj,
+                "contacts",
+                Contact.objects.filter(
+                    id__in=params.get("contacts") or [], org=request.profile.org
+                ),
+            )
+            sync_m2m(
+                task_obj,
+                "teams",
+                Teams.objects.filter(
+                    id__in=params.get("teams") or [], org=request.profile.org
+                ),
+            )
+            sync_m2m(
+                task_obj,
+                "assigned_to",
+                Profile.objects.filter(
+                    id__in=params.get("assigned_to") or [],
+                    org=request.profile.org,
+                    is_active=True,
+                ),
             )
-            task_obj.contacts.clear()
-            if params.get("contacts"):
-                contacts_list = params.get("contacts")
-                contacts = Contact.objects.filter(id__in=contacts_list, org=request.profile.org)
-                task_obj.contacts.add(*contacts)
-
-            task_obj.teams.clear()
-            if params.get("teams"):
-                teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                task_obj.teams.add(*teams)
-
-            task_obj.assigned_to.clear()
-            if params.get("assigned_to"):
-                assinged_to_list = params.get("assigned_to")
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org, is_active=True
-                )
-                task_obj.assigned_to.add(*profiles)
 
             return Response(
                 {"error": False, "message": "Task updated Successfully"},
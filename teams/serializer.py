@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from common.prefetch import EagerLoadingListSerializer
 from common.serializer import ProfileSerializer,UserSerializer
 from teams.models import Teams
 
@@ -10,6 +11,7 @@ class TeamsSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Teams
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "name",
@@ -1,146 +1,159 @@
+import logging
+import time
+import uuid
+
 from celery import Celery
+from django.apps import apps
+from django.db import connection, transaction
 
-from common.models import Profile
+from common import response_cache
+from common.dashboard import mark_stale
+from common.models import Profile, User
 from teams.models import Teams
 
 app = Celery("redis://")
 
+logger = logging.getLogger(__name__)
+
+# (report label, model, m2m field holding the assignees)
+TEAM_RELATIONS = (
+    ("accounts", "accounts.Account", "assigned_to"),
+    ("contacts", "contacts.Contact", "assigned_to"),
+    ("leads", "leads.Lead", "assigned_to"),
+    ("opportunities", "opportunity.Opportunity", "assigned_to"),
+    ("cases", "cases.Case", "assigned_to"),
+    ("documents", "common.Document", "shared_to"),
+    ("tasks", "tasks.Task", "assigned_to"),
+    ("invoices", "invoices.Invoice", "assigned_to"),
+    ("events", "events.Event", "assigned_to"),
+)
+
+
+def _relation_fields(model_label, assignee_field):
+    model = apps.get_model(model_label)
+    return model._meta.get_field("teams"), model._meta.get_field(assignee_field)
+
+
+def _add_team_members(team_id, teams_field, assignee_field):
+    """
+    Link every member of the team to every record of the team with a single
+    INSERT ... SELECT; pairs that already exist are skipped by the unique
+    constraint of the through table.
+    """
+    qn = connection.ops.quote_name
+    team_users = Teams._meta.get_field("users")
+    assignees = assignee_field.remote_field.through._meta.db_table
+    record_teams = teams_field.remote_field.through._meta.db_table
+    # invoices are assigned to users rather than profiles
+    if assignee_field.related_model is User:
+        member = "p.{}".format(qn(Profile._meta.get_field("user").column))
+        join_profile = "JOIN {} p ON p.{} = u.{}".format(
+            qn(Profile._meta.db_table),
+            qn(Profile._meta.pk.column),
+            qn(team_users.m2m_reverse_name()),
+        )
+    else:
+        member = "u.{}".format(qn(team_users.m2m_reverse_name()))
+        join_profile = ""
+    sql = (
+        "INSERT INTO {assignees} ({record_col}, {member_col}) "
+        "SELECT t.{team_record_col}, {member} "
+        "FROM {record_teams} t "
+        "JOIN {team_users} u ON u.{team_users_team_col} = t.{record_teams_team_col} "
+        "{join_profile} "
+        "WHERE t.{record_teams_team_col} = %s "
+        "ON CONFLICT ({record_col}, {member_col}) DO NOTHING"
+    ).format(
+        assignees=qn(assignees),
+        record_col=qn(assignee_field.m2m_column_name()),
+        member_col=qn(assignee_field.m2m_reverse_name()),
+        team_record_col=qn(teams_field.m2m_column_name()),
+        member=member,
+        record_teams=qn(record_teams),
+        team_users=qn(team_users.remote_field.through._meta.db_table),
+        team_users_team_col=qn(team_users.m2m_column_name()),
+        record_teams_team_col=qn(teams_field.m2m_reverse_name()),
+        join_profile=join_profile,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [Teams._meta.pk.get_db_prep_value(team_id, connection)])
+        return cursor.rowcount
+
+
+def _remove_team_members(team_id, profile_ids, teams_field, assignee_field):
+    """Unlink the given profiles from every record of the team in one DELETE."""
+    through = assignee_field.remote_field.through
+    record_teams = teams_field.remote_field.through
+    records = record_teams.objects.filter(
+        **{teams_field.m2m_reverse_field_name(): team_id}
+    ).values(teams_field.m2m_field_name())
+    if assignee_field.related_model is User:
+        members = Profile.objects.filter(id__in=profile_ids).values("user_id")
+    else:
+        members = profile_ids
+    deleted, _ = through.objects.filter(
+        **{
+            "{}__in".format(assignee_field.m2m_field_name()): records,
+            "{}__in".format(assignee_field.m2m_reverse_field_name()): members,
+        }
+    ).delete()
+    return deleted
+
+
+def _changed(team_id):
+    # the through rows are written in bulk, no m2m_changed is sent for them
+    org_id = Teams.objects.filter(id=team_id).values_list("org_id", flat=True).first()
+    mark_stale(org_id)
+    response_cache.invalidate(org_id, *(label for label, _, _ in TEAM_RELATIONS))
+
+
+def _log_report(action, team_id, report):
+    logger.info(
+        "%s team %s: %s",
+        action,
+        team_id,
+        ", ".join(
+            "{} {} rows in {:.3f}s".format(label, r["rows"], r["seconds"])
+            for label, r in report.items()
+        ),
+    )
+
 
 @app.task
 def remove_users(removed_users_list, team_id):
-    removed_users_list = [i for i in removed_users_list if i.isdigit()]
-    users_list = Profile.objects.filter(id__in=removed_users_list)
-    if users_list.exists():
-        team = Teams.objects.filter(id=team_id).first()
-        if team:
-            accounts = team.account_teams.all()
-            for account in accounts:
-                for user in users_list:
-                    account.assigned_to.remove(user)
-
-            # for contacts
-            contacts = team.contact_teams.all()
-            for contact in contacts:
-                for user in users_list:
-                    contact.assigned_to.remove(user)
-
-            # for leads
-            leads = team.lead_teams.all()
-            for lead in leads:
-                for user in users_list:
-                    lead.assigned_to.remove(user)
-
-            # for opportunities
-            opportunities = team.oppurtunity_teams.all()
-            for opportunity in opportunities:
-                for user in users_list:
-                    opportunity.assigned_to.remove(user)
-
-            # for cases
-            cases = team.cases_teams.all()
-            for case in cases:
-                for user in users_list:
-                    case.assigned_to.remove(user)
-
-            # for documents
-            docs = team.document_teams.all()
-            for doc in docs:
-                for user in users_list:
-                    doc.shared_to.remove(user)
-
-            # for tasks
-            tasks = team.tasks_teams.all()
-            for task in tasks:
-                for user in users_list:
-                    task.assigned_to.remove(user)
-
-            # for invoices
-            invoices = team.invoices_teams.all()
-            for invoice in invoices:
-                for user in users_list:
-                    invoice.assigned_to.remove(user)
-
-            # for events
-            events = team.event_teams.all()
-            for event in events:
-                for user in users_list:
-                    event.assigned_to.remove(user)
+    """Unassign removed team members from every record linked to the team."""
+    profile_ids = []
+    for profile_id in removed_users_list:
+        try:
+            profile_ids.append(uuid.UUID(str(profile_id)))
+        except ValueError:
+            continue
+    if not profile_ids or not Teams.objects.filter(id=team_id).exists():
+        return {}
+    report = {}
+    for label, model_label, assignee in TEAM_RELATIONS:
+        started = time.perf_counter()
+        teams_field, assignee_field = _relation_fields(model_label, assignee)
+        with transaction.atomic():
+            rows = _remove_team_members(team_id, profile_ids, teams_field, assignee_field)
+        report[label] = {"rows": rows, "seconds": time.perf_counter() - started}
+    _log_report("remove_users", team_id, report)
+    _changed(team_id)
+    return report
 
 
 @app.task
 def update_team_users(team_id):
     """this function updates assigned_to field on all models when a team is updated"""
-    team = Teams.objects.filter(id=team_id).first()
-    if team:
-        teams_members = team.users.all()
-        # for accounts
-        accounts = team.account_teams.all()
-        for account in accounts:
-            account_assigned_to_users = account.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in account_assigned_to_users:
-                    account.assigned_to.add(team_member)
-
-        # for contacts
-        contacts = team.contact_teams.all()
-        for contact in contacts:
-            contact_assigned_to_users = contact.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in contact_assigned_to_users:
-                    contact.assigned_to.add(team_member)
-
-        # for leads
-        leads = team.lead_teams.all()
-        for lead in leads:
-            lead_assigned_to_users = lead.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in lead_assigned_to_users:
-                    lead.assigned_to.add(team_member)
-
-        # for opportunities
-        opportunities = team.oppurtunity_teams.all()
-        for opportunity in opportunities:
-            opportunity_assigned_to_users = opportunity.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in opportunity_assigned_to_users:
-                    opportunity.assigned_to.add(team_member)
-
-        # for cases
-        cases = team.cases_teams.all()
-        for case in cases:
-            case_assigned_to_users = case.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in case_assigned_to_users:
-                    case.assigned_to.add(team_member)
-
-        # for documents
-        docs = team.document_teams.all()
-        for doc in docs:
-            doc_assigned_to_users = doc.shared_to.all()
-            for team_member in teams_members:
-                if team_member not in doc_assigned_to_users:
-                    doc.shared_to.add(team_member)
-
-        # for tasks
-        tasks = team.tasks_teams.all()
-        for task in tasks:
-            task_assigned_to_users = task.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in task_assigned_to_users:
-                    task.assigned_to.add(team_member)
-
-        # for invoices
-        invoices = team.invoices_teams.all()
-        for invoice in invoices:
-            invoice_assigned_to_users = invoice.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in invoice_assigned_to_users:
-                    invoice.assigned_to.add(team_member)
-
-        # for events
-        events = team.event_teams.all()
-        for event in events:
-            event_assigned_to_users = event.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in event_assigned_to_users:
-                    event.assigned_to.add(team_member)
+    if not Teams.objects.filter(id=team_id).exists():
+        return {}
+    report = {}
+    for label, model_label, assignee in TEAM_RELATIONS:
+        started = time.perf_counter()
+        teams_field, assignee_field = _relation_fields(model_label, assignee)
+        with transaction.atomic():
+            rows = _add_team_members(team_id, teams_field, assignee_field)
+        report[label] = {"rows": rows, "seconds": time.perf_counter() - started}
+    _log_report("update_team_users", team_id, report)
+    _changed(team_id)
+    return report
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from common.testing import OrgTestMixin, create_profile
+from invoices.models import Invoice
+from leads.models import Lead
+from teams import tasks
+from teams.models import Teams
+
+
+class TeamMembershipTest(OrgTestMixin, TestCase):
+    org_name = "teams"
+
+    def setUp(self):
+        super().setUp()
+        self.other = create_profile(self.org, "other@example.com")
+        self.team = Teams.objects.create(name="team", description="", org=self.org)
+        self.team.users.set([self.admin, self.user])
+        self.leads = [
+            Lead.objects.create(title="lead {}".format(i), org=self.org)
+            for i in range(3)
+        ]
+        for lead in self.leads:
+            lead.teams.add(self.team)
+        self.leads[0].assigned_to.add(self.user, self.other)
+        self.invoice = Invoice.objects.create(
+            invoice_title="title", name="name", email="a@example.com", org=self.org
+        )
+        self.invoice.teams.add(self.team)
+
+    def assignees(self, record):
+        return set(record.assigned_to.values_list("id", flat=True))
+
+    def test_members_are_assigned_to_every_team_record(self):
+        report = tasks.update_team_users(self.team.id)
+        # the existing (leads[0], user) pair is skipped by ON CONFLICT
+        self.assertEqual(report["leads"]["rows"], 5)
+        self.assertEqual(report["invoices"]["rows"], 2)
+        self.assertEqual(
+            self.assignees(self.leads[0]), {self.admin.id, self.user.id, self.other.id}
+        )
+        for lead in self.leads[1:]:
+            self.assertEqual(self.assignees(lead), {self.admin.id, self.user.id})
+        # invoices are assigned to the users of the members
+        self.assertEqual(
+            self.assignees(self.invoice), {self.admin.user_id, self.user.user_id}
+        )
+
+        report = tasks.update_team_users(self.team.id)
+        self.assertEqual(report["leads"]["rows"], 0)
+        self.assertEqual(report["invoices"]["rows"], 0)
+
+    def test_removed_members_are_unassigned_with_one_delete_per_relation(self):
+        tasks.update_team_users(self.team.id)
+        other_lead = Lead.objects.create(title="outside the team", org=self.org)
+        other_lead.assigned_to.add(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            report = tasks.remove_users([str(self.user.id), "not-a-uuid"], self.team.id)
+        deletes = [q for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), len(tasks.TEAM_RELATIONS))
+        self.assertEqual(report["leads"]["rows"], 3)
+        self.assertEqual(report["invoices"]["rows"], 1)
+
+        for lead in self.leads[1:]:
+            self.assertEqual(self.assignees(lead), {self.admin.id})
+        self.assertEqual(self.assignees(self.leads[0]), {self.admin.id, self.other.id})
+        self.assertEqual(self.assignees(self.invoice), {self.admin.user_id})
+        self.assertEqual(self.assignees(other_lead), {self.user.id})
+
+    def test_unknown_team_or_members_do_nothing(self):
+        self.assertEqual(tasks.remove_users(["not-a-uuid"], self.team.id), {})
+        self.team.delete()
+        self.assertEqual(tasks.update_team_users(self.team.id), {})
@@ -1,28 +1,32 @@
 import json
+from django.db import transaction
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 
 #from common.external_auth import CustomDualAuthentication
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.m2m import sync_m2m
 from common.models import Profile
+from common.outbox import enqueue
+from common.pagination import KeysetPagination
+from common.response_cache import ALL, cache_response
 from teams import swagger_params1
 from teams.models import Teams
 from teams.serializer import TeamCreateSerializer, TeamsSerializer,TeamswaggerCreateSerializer
 from teams.tasks import remove_users, update_team_users
 
 
-class TeamsListView(APIView, LimitOffsetPagination):
+class TeamsListView(APIView, KeysetPagination):
     model = Teams
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if params:
             if params.get("team_name"):
                 queryset = queryset.filter(name__icontains=params.get("team_name"))
@@ -38,22 +42,21 @@ class TeamsListView(APIView, LimitOffsetPagination):
             queryset.distinct(), self.request, view=self
         )
         teams = TeamsSerializer(results_teams, many=True).data
-        if results_teams:
-            offset = queryset.filter(id__gte=results_teams[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context.update({"teams_count": self.count, "offset": offset})
+        context["per_page"] = self.limit
+        context.update(
+            {
+                "teams_count": self.count,
+                "next_cursor": self.next_cursor,
+                "previous_cursor": self.previous_cursor,
+            }
+        )
         context["teams"] = teams
         return context
 
     @extend_schema(
         tags=["Teams"], parameters=swagger_params1.teams_list_get_params
     )
+    @cache_response("teams", "profiles")
     def get(self, *args, **kwargs):
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             return Response(
@@ -79,7 +82,6 @@ class TeamsListView(APIView, LimitOffsetPagination):
                 status=status.HTTP_403_FORBIDDEN,
             )
         params = self.request.data
-        print(request,self.request)
         serializer = TeamCreateSerializer(data=params, request_obj=request)
         if serializer.is_valid():
             team_obj = serializer.save(org=request.profile.org)
@@ -112,6 +114,7 @@ class TeamsDetailView(APIView):
     @extend_schema(
         tags=["Teams"], parameters=swagger_params1.organization_params
     )
+    @cache_response(*ALL, shared_by_admins=False)
     def get(self, request, pk, **kwargs):
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             return Response(
@@ -129,6 +132,7 @@ class TeamsDetailView(APIView):
     @extend_schema(
         tags=["Teams"], request=TeamswaggerCreateSerializer,parameters=swagger_params1.organization_params
     )
+    @transaction.atomic
     def put(self, request, pk, *args, **kwargs):
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             return Response(
@@ -140,28 +144,23 @@ class TeamsDetailView(APIView):
             )
         params = request.data
         self.team = self.get_object(pk)
-        actual_users = self.team.get_users()
-        removed_users = []
         serializer = TeamCreateSerializer(
             data=params, instance=self.team, request_obj=request
         )
         if serializer.is_valid():
             team_obj = serializer.save()
 
-            team_obj.users.clear()
-            if params.get("assign_users"):
-                assinged_to_list = params.get("assign_users")
-                profiles = Profile.objects.filter(
-                    id__in=assinged_to_list, org=request.profile.org
-                )
-                if profiles:
-                    team_obj.users.add(*profiles)
-            update_team_users.delay(pk)
-            latest_users = team_obj.get_users()
-            for user in actual_users:
-                if user not in latest_users:
-                    removed_users.append(user)
-            remove_users.delay(removed_users, pk)
+            _, removed = sync_m2m(
+                team_obj,
+                "users",
+                Profile.objects.filter(
+                    id__in=params.get("assign_users") or [], org=request.profile.org
+                ),
+            )
+            enqueue(update_team_users, pk)
+            removed_users = [str(user) for user in removed]
+            if removed_users:
+                enqueue(remove_users, removed_users, pk)
             return Response(
                 {"error": False, "message": "Team Updated Successfully"},
                 status=status.HTTP_200_OK,